@@ -199,16 +199,8 @@ def render_reading_page():
     
     # Since we can't implement real audio recording in this example, we'll simulate it
     if st.button("Start Recording"):
-        with st.spinner("Recording your reading..."):
-            # Simulate recording delay
-            import time
-            time.sleep(2)
         st.success("Recording completed!")
         
-        # Simulate analysis
-        with st.spinner("Analyzing your reading..."):
-            time.sleep(3)
-        
         # Display feedback
         st.subheader("Your Reading Analysis")
         
@@ -301,15 +293,11 @@ def render_writing_page():
             # Show character-by-character comparison
             st.markdown("### Character Analysis")
             
-            comparison = ""
-            for i in range(max(len(user_answer), len(correct_answer))):
-                if i < len(user_answer) and i < len(correct_answer):
-                    if user_answer[i].lower() == correct_answer[i].lower():
-                        comparison += f"<span style='color:green'>{correct_answer[i]}</span>"
-                    else:
-                        comparison += f"<span style='color:red'>{correct_answer[i]}</span>"
-                elif i < len(correct_answer):
-                    comparison += f"<span style='color:red'>{correct_answer[i]}</span>"
+            result = writing_generator.check_spelling_answer(user_answer, correct_answer)
+            comparison = "".join(
+                f"<span style='color:{'green' if item['status'] == 'correct' else 'red'}'>{item['char']}</span>"
+                for item in result["comparison"] if item["char"]
+            )
             
             st.markdown(f"Correct spelling: {comparison}", unsafe_allow_html=True)
             
@@ -0,0 +1,108 @@
+"""
+Load-test the draft store with many students autosaving at once.
+
+Starts --writers threads that each create a draft and then autosave it
+--saves times, every --interval seconds, either as delta saves of the
+changed range (the default) or as full saves (--full). Each save waits
+until its record is fsynced. Prints throughput, save latency, how many
+records shared each fsync and the log size, then compacts, reopens the
+store and checks every draft survived intact.
+
+Usage:
+    python benchmarks/bench_draft_store.py [--writers 1000] [--saves 20] [--interval 0] [--full]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The writing services live in the Flask app, which imports them as top-level packages
+sys.path.insert(0, os.path.join(ROOT, "rebuild"))
+
+from services.draft_store import DraftStore
+
+
+def load_words():
+    """Words of the bundled sample passages, to type into the drafts."""
+    with open(os.path.join(ROOT, "modules", "reading_analysis.py"), "r", encoding="utf-8") as f:
+        return re.findall(r"[a-z]+", " ".join(re.findall(r'"text":\s*"([^"]+)"', f.read())))
+
+
+def writer(store, user, words, args, latencies, finals, barrier):
+    """One student: start a draft, then keep typing and autosaving it."""
+    rng = random.Random(user)
+    content = " ".join(rng.choice(words) for _ in range(200))
+    barrier.wait()
+    draft = store.save(user, content, title=f"Essay {user}")
+    for _ in range(args.saves):
+        if args.interval:
+            time.sleep(rng.uniform(0, 2 * args.interval))
+        addition = " " + " ".join(rng.choice(words) for _ in range(rng.randint(1, 8)))
+        start = time.perf_counter()
+        if args.full:
+            draft = store.save(user, draft.content + addition, draft_id=draft.id)
+        else:
+            end = len(draft.content)
+            draft = store.save_delta(user, draft.id, draft.version, [(end, end, addition)])
+        latencies.append(time.perf_counter() - start)
+    finals[user] = (draft.id, draft.content)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=1000, help="students saving concurrently")
+    parser.add_argument("--saves", type=int, default=20, help="autosaves per student after the first save")
+    parser.add_argument("--interval", type=float, default=0.0, help="mean seconds between a student's autosaves")
+    parser.add_argument("--full", action="store_true", help="send the whole draft on every autosave")
+    args = parser.parse_args()
+
+    words = load_words()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "drafts.log")
+        store = DraftStore(path, min_compact_bytes=1 << 40)
+        latencies, finals = [], {}
+        barrier = threading.Barrier(args.writers + 1)
+        threads = [threading.Thread(target=writer, args=(store, f"student-{index}", words, args, latencies, finals, barrier))
+                   for index in range(args.writers)]
+        for thread in threads:
+            thread.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        stats = store.stats()
+        latencies.sort()
+        saves = stats["puts"] + stats["deltas"]
+        print(f"{args.writers} writers, {saves} saves ({'full' if args.full else 'delta'} autosaves) in {elapsed:.2f} s")
+        print(f"throughput        {saves / elapsed:10.0f} saves/s")
+        print(f"autosave latency  p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+              f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms")
+        print(f"fsyncs            {stats['fsyncs']:10d}  ({stats['records_per_fsync']} records each)")
+        print(f"log               {stats['log_bytes'] / 1e6:10.2f} MB for {stats['live_bytes'] / 1e6:.2f} MB of drafts")
+
+        start = time.perf_counter()
+        store.compact()
+        print(f"compaction        {(time.perf_counter() - start) * 1000:10.1f} ms -> {store.stats()['log_bytes'] / 1e6:.2f} MB")
+        store.close()
+
+        start = time.perf_counter()
+        reopened = DraftStore(path)
+        replay = time.perf_counter() - start
+        lost = sum(1 for user, (draft_id, content) in finals.items()
+                   if (reopened.get(user, draft_id) or None) is None or reopened.get(user, draft_id).content != content)
+        reopened.close()
+        print(f"reopen            {replay * 1000:10.1f} ms, {len(finals) - lost}/{len(finals)} drafts intact")
+        if lost:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
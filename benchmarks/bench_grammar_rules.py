@@ -0,0 +1,101 @@
+"""
+Time the grammar rule engine on adversarial input.
+
+Builds --chars character inputs that made the old per-pattern scan
+backtrack (run-on text with commas but no closing punctuation, long
+unpunctuated text, capitals without a full stop) plus an ordinary essay,
+and times GrammarRuleEngine.scan against the old three re.finditer passes.
+The old passes run in a child process that is stopped after --timeout
+seconds, since some of them never finish.
+
+Usage:
+    python benchmarks/bench_grammar_rules.py [--chars 10000] [--timeout 10] [--repeat 5]
+"""
+import argparse
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The writing services live in the Flask app, which imports them as top-level packages
+sys.path.insert(0, os.path.join(ROOT, "rebuild"))
+
+from services.grammar_rules import GrammarRuleEngine
+
+LEGACY_PATTERNS = {
+    'sentence_fragments': r'[A-Z][^.!?]*(?=[.!?])',
+    'run_on_sentences': r'[^.!?]+(?:[,.][^.!?]+){3,}[.!?]',
+    'passive_voice': r'\b(?:am|is|are|was|were|be|being|been)\s+\w+ed\b',
+}
+
+
+def build_inputs(chars):
+    """Adversarial and ordinary texts of about the requested length."""
+    with open(os.path.join(ROOT, "modules", "reading_analysis.py"), "r", encoding="utf-8") as f:
+        passages = re.findall(r'"text":\s*"([^"]+)"', f.read())
+    essay = " ".join(passages)
+    return {
+        "run-on, commas, no full stop": ("and then we went, " * (chars // 18 + 1))[:chars],
+        "run-on, no punctuation": ("and then we went " * (chars // 17 + 1))[:chars],
+        "capitals, no full stop": ("The Big Red Dog " * (chars // 16 + 1))[:chars],
+        "ordinary essay": (essay * (chars // len(essay) + 1))[:chars],
+    }
+
+
+def legacy_scan(text):
+    """The three finditer passes the service ran before the rule engine."""
+    return [match.span() for pattern in LEGACY_PATTERNS.values() for match in re.finditer(pattern, text)]
+
+
+def _time_legacy(text, results):
+    start = time.perf_counter()
+    legacy_scan(text)
+    results.put(time.perf_counter() - start)
+
+
+def time_legacy(text, timeout):
+    """Seconds the old scan took, or None if it was stopped at the timeout."""
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_time_legacy, args=(text, results))
+    process.start()
+    process.join(timeout)
+    if process.is_alive():
+        process.terminate()
+        process.join()
+        return None
+    return results.get()
+
+
+def best_time(function, text, repeat):
+    """Best wall time of several runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chars", type=int, default=10000, help="characters per input")
+    parser.add_argument("--timeout", type=float, default=10.0, help="seconds before the old scan is stopped")
+    parser.add_argument("--repeat", type=int, default=5, help="runs of the engine per input; the best is reported")
+    args = parser.parse_args()
+
+    engine = GrammarRuleEngine()
+    print(f"{'input':<30}{'issues':>8}{'engine':>12}{'old passes':>14}")
+    for label, text in build_inputs(args.chars).items():
+        issues = len(engine.scan(text))
+        engine_time = best_time(engine.scan, text, args.repeat)
+        legacy_time = time_legacy(text, args.timeout)
+        legacy = f"> {args.timeout:.0f} s" if legacy_time is None else f"{legacy_time * 1000:.2f} ms"
+        print(f"{label:<30}{issues:>8}{engine_time * 1000:>9.2f} ms{legacy:>14}")
+    print(f"\nengine: {engine.stats}, disabled rules: {engine.disabled or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
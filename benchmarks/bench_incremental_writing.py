@@ -0,0 +1,97 @@
+"""
+Time re-analysis of an essay after a one-word edit.
+
+Builds an essay of --words words from the sentences of the bundled sample
+passages, then replaces one random word at a time and compares a full
+WritingAnalysisService.analyze_text with IncrementalWritingAnalyzer.update,
+after checking that both give the same scores.
+
+Usage:
+    python benchmarks/bench_incremental_writing.py [--words 2000] [--edits 2000] [--full-sample 50]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The writing services live in the Flask app, which imports them as top-level packages
+sys.path.insert(0, os.path.join(ROOT, "rebuild"))
+
+from services.writing_intervention import WritingAnalysisService
+
+SCORES = ("grammar_score", "vocabulary_score", "structure_score", "organization_score", "suggestions")
+
+
+def build_essay(word_total, seed=7):
+    """Assemble an essay from the sentences of the bundled sample passages."""
+    with open(os.path.join(ROOT, "modules", "reading_analysis.py"), "r", encoding="utf-8") as f:
+        source = f.read()
+    passages = re.findall(r'"text":\s*"([^"]+)"', source)
+    sentences = [sentence for passage in passages for sentence in re.findall(r'[^.!?]+[.!?]+', passage)]
+
+    rng = random.Random(seed)
+    parts = []
+    words = 0
+    while words < word_total:
+        sentence = rng.choice(sentences)
+        parts.append(sentence)
+        words += len(sentence.split())
+    return "".join(parts).strip()
+
+
+def scores(analysis):
+    """The parts of an analysis that do not depend on when it ran."""
+    return tuple(getattr(analysis, name) for name in SCORES)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, default=2000, help="approximate words in the essay")
+    parser.add_argument("--edits", type=int, default=2000, help="one-word edits to time")
+    parser.add_argument("--full-sample", type=int, default=50, help="edits timed with the full analysis")
+    args = parser.parse_args()
+
+    service = WritingAnalysisService()
+    analyzer = service.incremental_analyzer()
+    rng = random.Random(11)
+    words = build_essay(args.words).split(" ")
+    analyzer.update(" ".join(words))
+
+    drafts = []
+    for _ in range(args.edits):
+        words[rng.randrange(len(words))] = rng.choice(("bright", "river", "however", "was", "jumped"))
+        drafts.append(" ".join(words))
+
+    for draft in drafts[:50]:
+        if scores(analyzer.update(draft)) != scores(service.analyze_text(draft)):
+            print(f"MISMATCH after edit: {draft[:60]!r}")
+            sys.exit(1)
+
+    # Full analysis is slow enough that a sample of the edits gives its rate
+    sample = drafts[:args.full_sample]
+    start = time.perf_counter()
+    for draft in sample:
+        service.analyze_text(draft)
+    full = (time.perf_counter() - start) / len(sample)
+
+    timings = []
+    for draft in drafts:
+        start = time.perf_counter()
+        analyzer.update(draft)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    mean = sum(timings) / len(timings)
+
+    print(f"essay: {len(words)} words, {len(drafts)} one-word edits")
+    print(f"full analysis        {full * 1e6:8.1f} us per edit")
+    print(f"incremental (mean)   {mean * 1e6:8.1f} us per edit  ({full / mean:.1f}x)")
+    print(f"incremental (p99)    {timings[int(len(timings) * 0.99)] * 1e6:8.1f} us")
+    print(f"sentences: {analyzer.stats}")
+
+
+if __name__ == "__main__":
+    main()
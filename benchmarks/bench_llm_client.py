@@ -0,0 +1,61 @@
+"""
+Load test the LLM client against the offline stub backend.
+
+Usage:
+    python benchmarks/bench_llm_client.py [--requests 200] [--distinct 10] [--latency 0.5]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.llm_client import LLMClient, StubBackend
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="Total requests to issue")
+    parser.add_argument("--distinct", type=int, default=10, help="Number of distinct prompts")
+    parser.add_argument("--latency", type=float, default=0.5, help="Stub latency in seconds")
+    parser.add_argument("--concurrency", type=int, default=4, help="In-flight cap for the client")
+    parser.add_argument("--timeout", type=float, default=5.0, help="Per-call deadline in seconds")
+    args = parser.parse_args()
+
+    client = LLMClient(
+        StubBackend(latency=args.latency, jitter=args.latency / 5),
+        timeout=args.timeout,
+        max_concurrency=args.concurrency
+    )
+    prompts = [f"Create an engaging reading passage about topic {i % args.distinct}" for i in range(args.requests)]
+    latencies = []
+
+    def call(prompt):
+        started = time.perf_counter()
+        try:
+            client.generate(prompt)
+        except TimeoutError:
+            pass
+        latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=64) as executor:
+        list(executor.map(call, prompts))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    stats = client.stats()
+    print(f"requests:        {args.requests} ({args.distinct} distinct prompts)")
+    print(f"wall time:       {elapsed:.2f}s")
+    print(f"p50 latency:     {latencies[len(latencies) // 2] * 1000:.0f}ms")
+    print(f"p95 latency:     {latencies[int(len(latencies) * 0.95) - 1] * 1000:.0f}ms")
+    print(f"upstream calls:  {stats['upstream_calls']}")
+    print(f"coalesced:       {stats['coalesced']}")
+    print(f"timeouts:        {stats['timeouts']}")
+
+
+if __name__ == "__main__":
+    main()
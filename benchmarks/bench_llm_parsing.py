@@ -0,0 +1,87 @@
+"""
+Micro-benchmark the model response parser over a corpus of model outputs.
+
+The bundled corpus is synthetic, not captured: hand-written responses in the
+shapes the model returns (fenced, bare-fenced, prose-wrapped, cut-off fence,
+Title:/Text: plain text, refusals), with one sentence repeated to give the
+passages realistic lengths. Pass --corpus to run on captured responses.
+
+Compares the old split-based extraction with the single-pass parser and prints
+the parse outcome counters for the corpus.
+
+Usage:
+    python benchmarks/bench_llm_parsing.py [--repeat 2000] [--corpus benchmarks/data/model_outputs.jsonl]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.llm_parsing import ParseError, parse_llm_response, parse_stats
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "model_outputs.jsonl")
+
+
+def legacy_parse(response_text):
+    """The split-based parsing the app used before the shared parser."""
+    if "```json" in response_text:
+        json_str = response_text.split("```json")[1].split("```")[0].strip()
+    elif "```" in response_text:
+        json_str = response_text.split("```")[1].strip()
+    else:
+        json_str = response_text
+    try:
+        return json.loads(json_str)
+    except ValueError:
+        fallback_text = response_text.replace("```json", "").replace("```", "")
+        if "Title:" in fallback_text and "Text:" in fallback_text:
+            title = fallback_text.split("Title:")[1].split("Text:")[0].strip()
+            text = fallback_text.split("Text:")[1].strip()
+            return {"title": title, "text": text}
+        return None
+
+
+def unified_parse(schema, response_text):
+    """Parse with the shared parser, counting failures instead of raising."""
+    try:
+        return parse_llm_response(response_text, schema, allow_plain_text=schema == "passage")
+    except ParseError:
+        return None
+
+
+def time_it(label, func, corpus, repeat):
+    """Run func over the corpus repeat times and print per-response timings."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for schema, text in corpus:
+            func(schema, text)
+    elapsed = time.perf_counter() - started
+    calls = repeat * len(corpus)
+    print(f"{label:<10} {calls} parses in {elapsed:.3f}s ({elapsed / calls * 1e6:.1f} us/parse)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000, help="Passes over the corpus")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="JSONL file of {schema, text} records")
+    args = parser.parse_args()
+
+    with open(args.corpus, "r") as f:
+        corpus = [(record["schema"], record["text"]) for record in map(json.loads, f) if record]
+
+    print(f"Corpus: {len(corpus)} responses, {sum(len(text) for _, text in corpus)} characters")
+    time_it("legacy", lambda schema, text: legacy_parse(text), corpus, args.repeat)
+    time_it("unified", unified_parse, corpus, args.repeat)
+
+    print("Outcomes per schema (unified):")
+    for schema, counts in sorted(parse_stats().items()):
+        per_pass = {outcome: count // args.repeat for outcome, count in sorted(counts.items())}
+        print(f"  {schema:<20} {per_pass}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Micro-benchmark calculate_reading_stats on book-length input.
+
+Compares the old multi-pass implementation (findall for words, split for
+sentences, a regex per word for syllables) with the single-pass scanner,
+after checking that both give identical statistics.
+
+Usage:
+    python benchmarks/bench_reading_stats.py [--words 200000] [--repeat 5]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.data_processing import calculate_reading_stats, count_syllables
+
+PASSAGE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "modules")
+
+
+def legacy_reading_stats(text):
+    """The multi-pass statistics the app used before the single-pass scanner."""
+    words = re.findall(r'\b\w+\b', text)
+    word_count = len(words)
+    sentences = re.split(r'[.!?]+', text)
+    sentence_count = len([s for s in sentences if s.strip()])
+    syllable_count = 0
+    for word in words:
+        word = word.lower()
+        count = len(re.findall(r'[aeiouy]+', word))
+        if word.endswith('e') and len(word) > 2 and word[-2] not in 'aeiou':
+            count -= 1
+        if count == 0:
+            count = 1
+        syllable_count += count
+
+    avg_words_per_sentence = word_count / max(1, sentence_count)
+    avg_syllables_per_word = syllable_count / max(1, word_count)
+    flesch_reading_ease = 206.835 - (1.015 * avg_words_per_sentence) - (84.6 * avg_syllables_per_word)
+    flesch_kincaid_grade = (0.39 * avg_words_per_sentence) + (11.8 * avg_syllables_per_word) - 15.59
+    flesch_reading_ease = max(0, min(100, flesch_reading_ease))
+    flesch_kincaid_grade = max(0, min(12, flesch_kincaid_grade))
+    return {
+        "word_count": word_count,
+        "sentence_count": sentence_count,
+        "syllable_count": syllable_count,
+        "avg_words_per_sentence": round(avg_words_per_sentence, 1),
+        "avg_syllables_per_word": round(avg_syllables_per_word, 2),
+        "flesch_reading_ease": round(flesch_reading_ease, 1),
+        "flesch_kincaid_grade": round(flesch_kincaid_grade, 1)
+    }
+
+
+def build_book(word_total, seed=7):
+    """Assemble a book-length text from the sentences of the bundled sample passages."""
+    with open(os.path.join(PASSAGE_DIR, "reading_analysis.py"), "r", encoding="utf-8") as f:
+        source = f.read()
+    passages = re.findall(r'"text":\s*"([^"]+)"', source)
+    sentences = [sentence for passage in passages for sentence in re.findall(r'[^.!?]+[.!?]+', passage)]
+
+    rng = random.Random(seed)
+    parts = []
+    words = 0
+    while words < word_total:
+        sentence = rng.choice(sentences)
+        parts.append(sentence)
+        words += len(sentence.split())
+        if rng.random() < 0.05:
+            parts.append("\n\n")
+    return "".join(parts)
+
+
+def time_call(function, text, repeat):
+    """Best wall time of several runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, default=200000, help="approximate words in the generated book")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per implementation; the best is reported")
+    args = parser.parse_args()
+
+    book = build_book(args.words)
+    expected = legacy_reading_stats(book)
+    actual = calculate_reading_stats(book)
+    if actual != expected:
+        print(f"MISMATCH\n  legacy: {expected}\n  single-pass: {actual}")
+        sys.exit(1)
+
+    legacy = time_call(legacy_reading_stats, book, args.repeat)
+    count_syllables.cache_clear()
+    cold = time_call(calculate_reading_stats, book, 1)
+    warm = time_call(calculate_reading_stats, book, args.repeat)
+
+    print(f"book: {expected['word_count']} words, {expected['sentence_count']} sentences, {len(book)} characters")
+    print(f"legacy multi-pass       {legacy * 1000:9.1f} ms")
+    print(f"single pass (cold LRU)  {cold * 1000:9.1f} ms  ({legacy / cold:.1f}x)")
+    print(f"single pass (warm LRU)  {warm * 1000:9.1f} ms  ({legacy / warm:.1f}x)")
+    print(f"syllable cache: {count_syllables.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
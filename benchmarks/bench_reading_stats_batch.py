@@ -0,0 +1,94 @@
+"""
+Score every bundled passage with the vectorized reading statistics.
+
+Collects the sample passages of rebuild/app.py, modules/reading_analysis.py
+and rebuild/static/js/passages.js, prints their grade per source and level,
+then times calculate_reading_stats_batch against a per-text loop of
+calculate_reading_stats on a corpus of --passages texts.
+
+Usage:
+    python benchmarks/bench_reading_stats_batch.py [--passages 5000] [--repeat 5]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.data_processing import calculate_reading_stats, calculate_reading_stats_batch
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# (label, path, passage field). Levels are the enclosing "level: [" keys.
+SOURCES = [
+    ("rebuild sample_passages", os.path.join(ROOT, "rebuild", "app.py"), "text"),
+    ("ReadingAnalyzer.sample_passages", os.path.join(ROOT, "modules", "reading_analysis.py"), "text"),
+    ("static/js/passages.js", os.path.join(ROOT, "rebuild", "static", "js", "passages.js"), "passage"),
+]
+
+
+def load_passages(path, field):
+    """Read (level, text) pairs out of a Python or JavaScript sample table."""
+    with open(path, "r", encoding="utf-8") as f:
+        source = f.read()
+    level_pattern = re.compile(r'^\s*"?(\w+)"?\s*:\s*\[\s*$')
+    text_pattern = re.compile(r'^\s*"?' + field + r'"?\s*:\s*"((?:[^"\\]|\\.)*)"')
+    passages = []
+    level = None
+    for line in source.splitlines():
+        match = level_pattern.match(line)
+        if match:
+            level = match.group(1)
+            continue
+        match = text_pattern.match(line)
+        if match and level:
+            passages.append((level, match.group(1).replace('\\"', '"').replace("\\'", "'")))
+    return passages
+
+
+def best_time(function, repeat):
+    """Best wall time of several runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--passages", type=int, default=5000, help="texts in the timed corpus")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per implementation; the best is reported")
+    args = parser.parse_args()
+
+    corpus = []
+    for label, path, field in SOURCES:
+        passages = load_passages(path, field)
+        stats = calculate_reading_stats_batch(text for _, text in passages)
+        print(f"{label} ({len(passages)} passages)")
+        for level in dict.fromkeys(level for level, _ in passages):
+            grades = stats.flesch_kincaid_grade[[index for index, (name, _) in enumerate(passages) if name == level]]
+            print(f"  {level:<13} grade {grades.min():4.1f} - {grades.max():4.1f}  (mean {grades.mean():4.1f})")
+        corpus.extend(text for _, text in passages)
+
+    texts = [corpus[index % len(corpus)] for index in range(args.passages)]
+    batch = calculate_reading_stats_batch(texts)
+    fields = batch.dtype.names
+    for text, record in zip(texts, batch):
+        if calculate_reading_stats(text) != {name: record[name].item() for name in fields}:
+            print(f"MISMATCH for {text[:60]!r}")
+            sys.exit(1)
+
+    loop = best_time(lambda: [calculate_reading_stats(text) for text in texts], args.repeat)
+    vectorized = best_time(lambda: calculate_reading_stats_batch(texts), args.repeat)
+    print(f"\n{len(texts)} passages, {int(batch.word_count.sum())} words")
+    print(f"per-text loop   {loop * 1000:8.1f} ms")
+    print(f"batch (NumPy)   {vectorized * 1000:8.1f} ms  ({loop / vectorized:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
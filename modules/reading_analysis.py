@@ -1,13 +1,19 @@
 import streamlit as st
 import os
 import logging
-import time
 import random
-from typing import Dict, List, Tuple, Any
-import json
+from typing import Dict, List, Tuple, Any, Optional
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+from utils.passage_pool import PassagePool
+from utils.llm_client import LLMClient
+from utils.circuit_breaker import get_breaker
+from utils.llm_parsing import ParseError, parse_llm_response
+from utils.readability_gate import readability_gate
+from utils.reading_pipeline import ReadingPipeline
+from utils.syllables import guide, preload
+
 # Set up logging
 logger = logging.getLogger(__name__)
 
@@ -24,6 +30,12 @@ except Exception as e:
     logger.error(f"Error configuring Gemini API: {e}")
     model = None
 
+# Shares the "gemini" breaker with every other model caller in the process
+llm_client = LLMClient(model, breaker=get_breaker("gemini"))
+
+# Module-level so stage timings accumulate across Streamlit reruns
+reading_pipeline = ReadingPipeline()
+
 class ReadingAnalyzer:
     """
     A class to handle reading passage generation and analysis.
@@ -111,7 +123,54 @@ class ReadingAnalyzer:
             sample_for_level = self.sample_passages[reading_level]
             return random.choice(sample_for_level)
         
-        # Otherwise, generate a passage using Google Gemini API
+        # Serve a pre-generated passage if one is ready; generation itself
+        # happens on the pool's background threads
+        passage = passage_pool.take(reading_level, interests[:3])
+        if passage is not None:
+            return passage
+        
+        # Fall back to sample passages while the pool warms up
+        sample_for_level = self.sample_passages[reading_level]
+        return random.choice(sample_for_level)
+    
+    def _generate_with_model(self, interests: List[str], reading_level: str) -> Optional[Dict[str, Any]]:
+        """
+        Generate a reading passage with Google Gemini API that reads at the requested level.
+        
+        Drafts outside the level's grade band are regenerated within the
+        readability gate's attempt budget; after that the closest draft or
+        sample passage is used.
+        
+        Args:
+            interests (List[str]): List of user interests
+            reading_level (str): The reading level (beginner, elementary, intermediate, advanced, expert)
+            
+        Returns:
+            Dict: A dictionary containing the title and text of the passage, or None on error
+        """
+        # Skip the call entirely while the breaker is open
+        if not llm_client.available():
+            return None
+        
+        return readability_gate.generate(
+            reading_level,
+            lambda hint: self._request_passage(interests, reading_level, hint),
+            near_matches=self.sample_passages.get(reading_level, [])
+        )
+    
+    def _request_passage(self, interests: List[str], reading_level: str,
+                         hint: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Ask the model for one passage.
+        
+        Args:
+            interests (List[str]): List of user interests
+            reading_level (str): The reading level (beginner, elementary, intermediate, advanced, expert)
+            hint (str, optional): Feedback on a rejected draft to add to the prompt
+            
+        Returns:
+            Dict: A dictionary containing the title and text of the passage, or None on error
+        """
         try:
             # Create prompt for the model
             interest_text = ", ".join(interests[:3])  # Use up to 3 interests
@@ -144,106 +203,62 @@ class ReadingAnalyzer:
             
             Make the passage interesting, informative, and appropriate for a school-age reader.
             """
+            if hint:
+                prompt += f"\n            {hint}\n"
             
             # Generate response
-            response = model.generate_content(prompt)
+            response_text = llm_client.generate(prompt)
             
-            # Parse the response
+            # Parse the response, reading plain "Title:/Text:" output if the model skipped the JSON
             try:
-                # Try to extract JSON from the response
-                response_text = response.text
-                if "```json" in response_text:
-                    # Extract JSON from markdown code block
-                    json_str = response_text.split("```json")[1].split("```")[0].strip()
-                elif "```" in response_text:
-                    # Extract JSON from generic code block
-                    json_str = response_text.split("```")[1].strip()
-                else:
-                    # Assume the whole response is JSON
-                    json_str = response_text
-                
-                passage_data = json.loads(json_str)
-                logger.info(f"Successfully generated passage about {interest_text}")
-                return passage_data
+                passage_data = parse_llm_response(response_text, "passage", allow_plain_text=True)
+            except ParseError as e:
+                logger.error(f"Error parsing passage from model response: {e}")
+                return None
             
-            except Exception as e:
-                # If JSON parsing fails, create a structured passage from the text
-                logger.error(f"Error parsing JSON from model response: {e}")
-                fallback_text = response.text.replace("```json", "").replace("```", "")
-                if "Title:" in fallback_text and "Text:" in fallback_text:
-                    title = fallback_text.split("Title:")[1].split("Text:")[0].strip()
-                    text = fallback_text.split("Text:")[1].strip()
-                else:
-                    # If we can't parse it properly, make a best guess
-                    parts = fallback_text.split("\n\n", 1)
-                    title = parts[0].strip() if len(parts) > 1 else "Interesting Facts"
-                    text = parts[1] if len(parts) > 1 else fallback_text
-                
-                return {"title": title, "text": text}
+            logger.info(f"Successfully generated passage about {interest_text}")
+            return passage_data
         
         except Exception as e:
             logger.error(f"Error generating passage: {e}")
-            # Fall back to sample passages
-            sample_for_level = self.sample_passages[reading_level]
-            return random.choice(sample_for_level)
+            return None
     
-    def analyze_reading(self, audio_data: bytes, expected_text: str) -> Dict[str, Any]:
+    def analyze_reading(self, audio_data: bytes, expected_text: str, spoken_text: Optional[str] = None,
+                        duration_seconds: Optional[float] = None) -> Dict[str, Any]:
         """
         Analyze a reading sample against the expected text.
         
         Args:
             audio_data (bytes): The recorded audio data
             expected_text (str): The text that was supposed to be read
+            spoken_text (str, optional): Transcript of the recording; when given,
+                it is aligned word by word against the expected text
+            duration_seconds (float, optional): Length of the reading in seconds
             
         Returns:
-            Dict: Analysis results including accuracy, fluency, etc.
+            Dict: Analysis results including accuracy, fluency, etc. Without a
+                transcript, "transcribed" is False and the scores are None.
         """
-        # In a real application, this would use speech recognition and analysis
-        # For the hackathon, we'll simulate the analysis
-        
-        # Simulate processing time
-        time.sleep(2)
-        
-        # Generate mock analysis results
-        word_count = len(expected_text.split())
-        
-        # Calculate mock metrics
-        accuracy = random.uniform(80.0, 98.0)
-        words_per_minute = random.uniform(85.0, 140.0)
-        fluency_score = random.uniform(70.0, 95.0)
-        
-        # Generate mock error words (words that were difficult to pronounce)
-        words = expected_text.split()
-        error_words = []
-        for word in words:
-            if len(word) > 8 and random.random() < 0.3:  # 30% chance for long words
-                error_words.append(word)
-            elif word.endswith('ing') and random.random() < 0.2:  # 20% chance for -ing words
-                error_words.append(word)
-        
-        # Limit to 3 error words
-        error_words = error_words[:3]
-        
-        analysis_results = {
-            "accuracy": accuracy,
-            "words_per_minute": words_per_minute,
-            "fluency_score": fluency_score,
-            "error_words": error_words,
-            "total_words": word_count,
-            "strengths": [
-                "Good pacing throughout most of the passage",
-                "Clear pronunciation of most words",
-                "Appropriate expression for the content"
-            ],
-            "areas_for_improvement": [
-                f"Some difficulty with longer words like '{', '.join(error_words)}'",
-                "Occasional hesitation between sentences",
-                "Could improve reading speed consistency"
-            ]
-        }
+        if spoken_text is None:
+            # Without a transcript there is nothing to align, so nothing is scored
+            logger.info("Reading analysis skipped: no transcript of the recording")
+            return {
+                "transcribed": False,
+                "accuracy": None,
+                "words_per_minute": None,
+                "fluency_score": None,
+                "total_words": len(expected_text.split()),
+                "error_words": [],
+                "strengths": [],
+                "areas_for_improvement": [],
+                "message": "The recording could not be transcribed, so this reading was not scored"
+            }
         
-        logger.info(f"Reading analysis completed with accuracy: {accuracy:.1f}%")
-        return analysis_results
+        results = reading_pipeline.run(expected_text, spoken_text, duration_seconds=duration_seconds)
+        results["transcribed"] = True
+        logger.info(f"Reading analysis completed with accuracy: {results['accuracy']:.1f}% "
+                    f"in {results['timings']['total']:.1f}ms")
+        return results
     
     def get_pronunciation_guide(self, word: str) -> str:
         """
@@ -276,19 +291,14 @@ class ReadingAnalyzer:
             return pronunciation_guides[word.lower()]
         
         # Otherwise, make a simple syllable breakdown
-        syllables = []
-        current = ""
-        
-        for i, char in enumerate(word):
-            current += char
-            if char.lower() in 'aeiou' and i < len(word) - 1 and word[i+1].lower() not in 'aeiou':
-                syllables.append(current)
-                current = ""
-        
-        if current:
-            syllables.append(current)
-        
-        # Join with dots
-        syllable_text = "·".join(syllables)
-        
-        return f"{syllable_text} ({word.upper()})" 
\ No newline at end of file
+        return guide(word)
+
+
+# Module-level so the warm stock survives Streamlit reruns, which build a new
+# ReadingAnalyzer every time the page renders
+passage_pool = PassagePool(
+    producer=lambda reading_level, interest: ReadingAnalyzer()._generate_with_model([interest], reading_level)
+)
+
+# Precompute pronunciation guides for every word in the sample passages
+preload(passage["text"] for passages in ReadingAnalyzer().sample_passages.values() for passage in passages)
@@ -2,12 +2,18 @@ import streamlit as st
 import os
 import logging
 import random
-import json
 import time
 from typing import Dict, List, Any
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+from utils.llm_client import LLMClient
+from utils.circuit_breaker import get_breaker
+from utils.llm_parsing import ParseError, parse_llm_response
+from utils.syllables import preload
+from utils.error_patterns import error_index
+from utils.text_diff import classify_spelling_errors, default_max_distance, spelling_comparison
+
 # Set up logging
 logger = logging.getLogger(__name__)
 
@@ -24,6 +30,9 @@ except Exception as e:
     logger.error(f"Error configuring Gemini API for writing exercises: {e}")
     model = None
 
+# Shares the "gemini" breaker with every other model caller in the process
+llm_client = LLMClient(model, breaker=get_breaker("gemini"))
+
 class WritingExerciseGenerator:
     """
     A class to generate writing exercises for spelling, grammar, and sentence structure.
@@ -195,8 +204,8 @@ class WritingExerciseGenerator:
             
             logger.warning(f"Adjusted difficulty to {difficulty} based on available options")
         
-        # If no interests or no API key, use sample exercises
-        if not interests or not model:
+        # If no interests, no API key or the circuit is open, use sample exercises
+        if not interests or not llm_client.available():
             sample_exercises = self.sample_exercises[exercise_type][difficulty]
             exercise = random.choice(sample_exercises)
             logger.info(f"Generated {exercise_type} exercise from samples")
@@ -216,27 +225,15 @@ class WritingExerciseGenerator:
                 prompt = self._create_sentence_structure_prompt(difficulty, interest)
             
             # Generate response
-            response = model.generate_content(prompt)
+            response_text = llm_client.generate(prompt)
             
-            # Parse the response
+            # Parse and validate the response against the exercise type
             try:
-                # Try to extract JSON from the response
-                response_text = response.text
-                if "```json" in response_text:
-                    # Extract JSON from markdown code block
-                    json_str = response_text.split("```json")[1].split("```")[0].strip()
-                elif "```" in response_text:
-                    # Extract JSON from generic code block
-                    json_str = response_text.split("```")[1].strip()
-                else:
-                    # Assume the whole response is JSON
-                    json_str = response_text
-                
-                exercise_data = json.loads(json_str)
+                exercise_data = parse_llm_response(response_text, exercise_type)
                 logger.info(f"Successfully generated {exercise_type} exercise using Gemini")
                 return exercise_data
             
-            except Exception as e:
+            except ParseError as e:
                 # If JSON parsing fails, fall back to sample
                 logger.error(f"Error parsing JSON from model response: {e}")
                 sample_exercises = self.sample_exercises[exercise_type][difficulty]
@@ -332,37 +329,26 @@ class WritingExerciseGenerator:
         """
         is_correct = user_answer.lower() == correct_answer.lower()
         
-        # Prepare character-by-character comparison
-        comparison = []
-        for i in range(max(len(user_answer), len(correct_answer))):
-            if i < len(user_answer) and i < len(correct_answer):
-                if user_answer[i].lower() == correct_answer[i].lower():
-                    # Correct character
-                    comparison.append({"char": correct_answer[i], "status": "correct"})
-                else:
-                    # Incorrect character
-                    comparison.append({"char": correct_answer[i], "status": "incorrect", "user_char": user_answer[i]})
-            elif i < len(correct_answer):
-                # Missing character
-                comparison.append({"char": correct_answer[i], "status": "missing"})
-            else:
-                # Extra character
-                comparison.append({"char": "", "status": "extra", "user_char": user_answer[i]})
+        # Prepare character-by-character comparison from a bounded edit-distance diff
+        comparison = spelling_comparison(correct_answer, user_answer, default_max_distance(correct_answer))
         
         # Determine error type and feedback
         feedback = ""
         if not is_correct:
-            # Check for common error patterns
-            if len(user_answer) < len(correct_answer):
+            # Check for common error patterns, looked up in the precomputed index
+            errors = classify_spelling_errors(correct_answer, comparison)
+            if errors["transposed"]:
+                feedback = "Two letters are swapped. Check the order of the letters."
+            elif errors["double_consonant"]:
+                feedback = "Pay attention to double letters. Some words have repeated letters."
+            elif errors["ie_ei"]:
+                feedback = "Remember the rule: 'i' before 'e', except after 'c', or when sounded like 'a' as in 'neighbor' and 'weigh'."
+            elif len(user_answer) < len(correct_answer):
                 feedback = "You're missing some letters. Try sounding out the word more carefully."
             elif len(user_answer) > len(correct_answer):
                 feedback = "You've added extra letters. Try listening to the word again."
-            elif self._has_vowel_errors(user_answer, correct_answer):
+            elif errors["vowel"]:
                 feedback = "Check the vowels in your spelling. Remember the difference between 'a', 'e', 'i', 'o', and 'u'."
-            elif self._has_double_letter_errors(user_answer, correct_answer):
-                feedback = "Pay attention to double letters. Some words have repeated letters."
-            elif correct_answer.lower() in self.error_patterns["ie_ei_words"] and ('ie' in user_answer.lower() or 'ei' in user_answer.lower()):
-                feedback = "Remember the rule: 'i' before 'e', except after 'c', or when sounded like 'a' as in 'neighbor' and 'weigh'."
             else:
                 feedback = "Try sounding out the word carefully, one syllable at a time."
         
@@ -374,22 +360,27 @@ class WritingExerciseGenerator:
         
         logger.info(f"Spelling check: {'correct' if is_correct else 'incorrect'}")
         return result
-    
-    def _has_vowel_errors(self, user_answer: str, correct_answer: str) -> bool:
-        """Check if the error is related to vowels."""
-        vowels = 'aeiou'
-        for i in range(min(len(user_answer), len(correct_answer))):
-            if user_answer[i].lower() != correct_answer[i].lower():
-                if user_answer[i].lower() in vowels or correct_answer[i].lower() in vowels:
-                    return True
-        return False
-    
-    def _has_double_letter_errors(self, user_answer: str, correct_answer: str) -> bool:
-        """Check if the error is related to double letters."""
-        # Look for patterns where a letter is doubled in one but not the other
-        for i in range(min(len(user_answer), len(correct_answer)) - 1):
-            if correct_answer[i] == correct_answer[i+1] and (i >= len(user_answer) - 1 or user_answer[i] != user_answer[i+1]):
-                return True
-            if i < len(user_answer) - 1 and user_answer[i] == user_answer[i+1] and correct_answer[i] != correct_answer[i+1]:
-                return True
-        return False 
\ No newline at end of file
+
+
+# Sample banks, read once below to warm the shared lookup tables
+_generator = WritingExerciseGenerator()
+
+# Precompute pronunciation guides for the words in the sample exercise banks
+preload(
+    exercise.get("target_word") or exercise.get("correct_answer", "")
+    for levels in _generator.sample_exercises.values()
+    for exercises in levels.values()
+    for exercise in exercises
+)
+
+# Index the spelling traps of every target word so feedback is a lookup
+error_index.add(
+    exercise["target_word"]
+    for exercises in _generator.sample_exercises["spelling"].values()
+    for exercise in exercises
+)
+error_index.add(
+    word
+    for key in ("silent_letters", "double_consonants", "ie_ei_words")
+    for word in _generator.error_patterns[key]
+)
@@ -1,12 +1,16 @@
 import os
+import sys
+import atexit
 import json
+import hashlib
+import math
 import time
 import random
+import uuid
 from datetime import datetime, timedelta
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for
+from flask import Flask, Response, render_template, request, jsonify, session, redirect, url_for, stream_with_context
 from dotenv import load_dotenv
 import logging
-import re
 
 # Load environment variables
 load_dotenv()
@@ -18,6 +22,24 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Make the shared utils package at the repository root importable
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.cache import TTLCache, make_cache_key
+from utils.passage_pool import PassagePool
+from utils.llm_client import LLMClient, StubBackend
+from utils.circuit_breaker import CircuitBreaker, get_breaker
+from utils.llm_parsing import ParseError, PassageStreamParser, parse_json_array, parse_llm_response, parse_stats, validate
+from utils.readability_gate import readability_gate
+from utils.reading_pipeline import ReadingPipeline
+from utils.highlighting import highlight_words
+from utils.error_patterns import error_index
+from utils.text_diff import classify_spelling_errors, default_max_distance, spelling_comparison
+from utils.syllables import guides, preload, syllable_stats
+from utils.session_store import ServerSideSessionInterface, create_session_backend
+from utils.word_store import WordStore
+from services.draft_store import DraftConflict, DraftStore
+from services.writing_intervention import AchievementService, WritingAnalysisService, serialize_analysis
+
 # Try to import and configure Google Gemini API, but make it optional
 try:
     import google.generativeai as genai
@@ -31,9 +53,47 @@ except (ImportError, Exception) as e:
     model = None
     GEMINI_AVAILABLE = False
 
+# Offline stand-in for load testing without an API key
+if os.getenv("LLM_BACKEND") == "stub":
+    model = StubBackend(latency=float(os.getenv("LLM_STUB_LATENCY", "0.5")))
+    logger.info("Using stub LLM backend")
+    GEMINI_AVAILABLE = True
+
+# Every model call goes through the client so it has a deadline, shares the
+# in-flight cap, is coalesced with identical concurrent prompts and fails fast
+# while the shared breaker is open
+llm_client = LLMClient(model, breaker=get_breaker("gemini"))
+
 app = Flask(__name__)
 app.secret_key = os.getenv("SECRET_KEY", "literleap-secret-key")
 
+# Session data stays on the server and the cookie only carries an opaque id. The
+# default SQLite backend is shared by every worker on the host; "memory" keeps
+# sessions in this process only. SESSION_BUFFER_SAVES=1 also batches saves,
+# which loses updates when two workers change one session within a flush.
+session_backend = create_session_backend(
+    os.getenv("SESSION_BACKEND", "sqlite"),
+    path=os.getenv("SESSION_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".data", "sessions.db")),
+    maxsize=int(os.getenv("SESSION_CACHE_SIZE", "10000")),
+    ttl=app.permanent_session_lifetime.total_seconds(),
+    flush_interval=float(os.getenv("SESSION_FLUSH_INTERVAL", "1.0")),
+    buffer_saves=os.getenv("SESSION_BUFFER_SAVES", "0") == "1"
+)
+app.session_interface = ServerSideSessionInterface(session_backend)
+atexit.register(session_backend.close)
+
+# Bump whenever the passage prompt changes so stale cached passages are ignored
+PASSAGE_PROMPT_VERSION = "v1"
+
+# Generated passages depend only on level and interests, so students with the
+# same profile can share one model call
+passage_cache = TTLCache(
+    maxsize=int(os.getenv("PASSAGE_CACHE_SIZE", "512")),
+    ttl=float(os.getenv("PASSAGE_CACHE_TTL", "86400")),
+    disk_dir=os.getenv("PASSAGE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "passages")),
+    disk_maxsize=int(os.getenv("PASSAGE_CACHE_DISK_SIZE", "4096"))
+)
+
 # Sample data
 sample_passages = {
     "easy": [
@@ -76,84 +136,195 @@ AVAILABLE_INTERESTS = [
     "Ancient Civilizations", "World Wars", "American History", "Famous People",
     "Inventions", "Exploration", "Medieval Times", "Archaeology"
 ]
+INTEREST_MAX_LENGTH = 64
+MAX_SAVED_INTERESTS = len(AVAILABLE_INTERESTS)
+
+# Spelling words and dictation phrases, parsed once and served one at a time
+word_store = WordStore.from_file(os.path.join(app.static_folder, "data", "word_database.js"))
+
+# Precompute pronunciation guides for every word the app ships with
+preload(passage["text"] for passages in sample_passages.values() for passage in passages)
+preload(entry.word for entry in word_store.words)
+preload(phrase.text for phrase in word_store.phrases)
+
+# Index the spelling traps of every target word so feedback is a lookup
+error_index.add(entry.word for entry in word_store.words)
 
 # Helper functions
+def _sample_passage(reading_level):
+    """Pick a random sample passage for the given level"""
+    # Normalize difficulty level
+    if reading_level not in sample_passages:
+        reading_level = "medium"
+    
+    selected_passage = random.choice(sample_passages[reading_level])
+    return {
+        "title": selected_passage["title"],
+        "passage": selected_passage["text"]
+    }
+
+def _build_passage_prompt(interests, reading_level, hint=None):
+    """Build the passage prompt for the model, with feedback on a rejected draft if given"""
+    interest_text = ", ".join(interests[:3])
+    
+    prompt = f"""
+        Create an engaging reading passage for a {reading_level} level student.
+        The passage should be about the following interests: {interest_text}
+        Please format the output as a JSON object with two fields:
+        - title: A catchy title for the passage
+        - passage: The text of the passage
+        """
+    if hint:
+        prompt += f"{hint}\n"
+    return prompt
+
+def _build_stream_prompt(interests, reading_level):
+    """Build a plain-text passage prompt that can be shown while it streams"""
+    interest_text = ", ".join(interests[:3])
+    
+    return f"""
+        Create an engaging reading passage for a {reading_level} level student.
+        The passage should be about the following interests: {interest_text}
+        Write the title on the first line, then a blank line, then the text of the passage.
+        Do not use JSON or markdown formatting.
+        """
+
+def _request_model_passage(interests, reading_level, hint=None):
+    """Ask the model for one passage"""
+    response_text = llm_client.generate(_build_passage_prompt(interests, reading_level, hint))
+    
+    try:
+        data = parse_llm_response(response_text, "passage")
+    except ParseError as e:
+        logger.error(f"Error parsing response: {e}")
+        return None
+    
+    return {"title": data["title"], "passage": data.get("passage") or data["text"]}
+
+def _request_passage(interests, reading_level):
+    """Ask the model for a passage at the right grade level and cache the result"""
+    samples = [{"title": passage["title"], "passage": passage["text"]} for passage in sample_passages.get(reading_level, [])]
+    passage_data = readability_gate.generate(
+        reading_level,
+        lambda hint: _request_model_passage(interests, reading_level, hint),
+        near_matches=samples
+    )
+    
+    # A sample served as the nearest match is not worth caching under these interests
+    if passage_data is not None and not any(passage_data is sample for sample in samples):
+        passage_cache.put(make_cache_key(reading_level, interests[:3], PASSAGE_PROMPT_VERSION), passage_data)
+    return passage_data
+
+def _produce_pool_passage(reading_level, interest):
+    """Generate one passage for the background pool"""
+    # Skip the refill entirely while the breaker is open
+    if not llm_client.available():
+        return None
+    return _request_passage([interest], reading_level)
+
+# Keeps a few ready passages per (level, interest) so requests never wait on the model
+passage_pool = PassagePool(
+    producer=_produce_pool_passage,
+    capacity=int(os.getenv("PASSAGE_POOL_SIZE", "3")),
+    max_workers=int(os.getenv("PASSAGE_POOL_WORKERS", "2"))
+)
+
 def generate_passage(interests, reading_level="medium"):
     """Generate a reading passage based on interests and level"""
     # Default to sample passages if no model is available or if interests not provided
     if not interests or not GEMINI_AVAILABLE or not model:
-        # Normalize difficulty level
-        if reading_level not in sample_passages:
-            reading_level = "medium"
-        
-        # Pick a random passage from the appropriate difficulty
-        passages = sample_passages[reading_level]
-        selected_passage = random.choice(passages)
-        return {
-            "title": selected_passage["title"],
-            "passage": selected_passage["text"]
-        }
+        return _sample_passage(reading_level)
     
-    try:
-        interest_text = ", ".join(interests[:3])
-        
-        prompt = f"""
-        Create an engaging reading passage for a {reading_level} level student.
-        The passage should be about the following interests: {interest_text}
-        Please format the output as a JSON object with two fields:
+    # Keep pool queues to the levels we actually serve
+    if reading_level not in sample_passages:
+        reading_level = "medium"
+    
+    # Serve a freshly pre-generated passage if one is in stock; this also
+    # tells the pool which queues to refill
+    passage = passage_pool.take(reading_level, interests[:3])
+    if passage is not None:
+        return passage
+    
+    # Otherwise reuse the last passage generated for one of these interests
+    for interest in interests[:3]:
+        cached_passage = passage_cache.get(make_cache_key(reading_level, [interest], PASSAGE_PROMPT_VERSION))
+        if cached_passage is not None:
+            return cached_passage
+    
+    # Fallback to sample passages while the pool warms up
+    return _sample_passage(reading_level)
+
+# Upper bound on passages requested in one model call, to keep responses short
+# enough that they are not truncated
+BATCH_MAX_PASSAGES = int(os.getenv("PASSAGE_BATCH_SIZE", "6"))
+
+def _build_batch_prompt(specs, per_spec):
+    """Build a prompt asking for several passages in one response"""
+    requests_text = "\n".join(
+        f"        {i}. A {level} level student interested in: {interest}"
+        for i, (level, interest) in enumerate(specs, start=1)
+    )
+    
+    return f"""
+        Create {len(specs) * per_spec} engaging reading passages, {per_spec} for each of the following requests:
+{requests_text}
+        Please format the output as a JSON array of objects with three fields:
+        - request: The number of the request the passage is for
         - title: A catchy title for the passage
         - passage: The text of the passage
         """
-        
-        response = model.generate_content(prompt)
-        
+
+def generate_passage_batch(specs, per_spec=1):
+    """Generate passages for several (level, interest) pairs in as few model calls as possible"""
+    results = [[] for _ in specs]
+    if not specs or not GEMINI_AVAILABLE or not model:
+        return results
+    
+    specs_per_call = max(1, BATCH_MAX_PASSAGES // per_spec)
+    for offset in range(0, len(specs), specs_per_call):
+        chunk = specs[offset:offset + specs_per_call]
         try:
-            response_text = response.text
-            if "```json" in response_text:
-                json_str = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                json_str = response_text.split("```")[1].strip()
-            else:
-                json_str = response_text
-            
-            passage_data = json.loads(json_str)
-            return passage_data
+            items = parse_json_array(llm_client.generate(_build_batch_prompt(chunk, per_spec)))
         except Exception as e:
-            logger.error(f"Error parsing response: {e}")
-            # Fallback to sample passages
-            passages = sample_passages[reading_level]
-            selected_passage = random.choice(passages)
-            return {
-                "title": selected_passage["title"],
-                "passage": selected_passage["text"]
-            }
-            
-    except Exception as e:
-        logger.error(f"Error generating passage: {e}")
-        # Fallback to sample passages
-        passages = sample_passages[reading_level]
-        selected_passage = random.choice(passages)
-        return {
-            "title": selected_passage["title"],
-            "passage": selected_passage["text"]
-        }
+            logger.error(f"Error generating passage batch: {e}")
+            continue
+        
+        for item in items:
+            # Drop elements that do not look like a passage for one of our requests
+            try:
+                validate(item, "passage")
+                index = int(item.get("request")) - 1
+            except (ParseError, TypeError, ValueError):
+                continue
+            if not 0 <= index < len(chunk) or len(results[offset + index]) >= per_spec:
+                continue
+            passage = {"title": item["title"], "passage": item.get("passage") or item["text"]}
+            # Batches are not regenerated; passages off their grade band are just dropped
+            if readability_gate.check(chunk[index][0], passage):
+                results[offset + index].append(passage)
+    
+    # Fan out so later requests for any of these pairs skip the model
+    for (level, interest), passages in zip(specs, results):
+        if passages:
+            passage_cache.put(make_cache_key(level, [interest], PASSAGE_PROMPT_VERSION), passages[0])
+        for passage in passages:
+            passage_pool.offer(level, interest, passage)
+    
+    return results
+
+def _student_key():
+    """Identify the student's browser session, for word sampling and achievements"""
+    if 'word_session' not in session:
+        session['word_session'] = uuid.uuid4().hex
+    return session['word_session']
 
-def generate_spelling_exercise(difficulty="intermediate"):
+def generate_spelling_exercise(difficulty="intermediate", category=None):
     """Generate a spelling exercise"""
-    spelling_exercises = {
-        "beginner": {
-            "instruction": "Listen to the word and type it correctly.",
-            "target_word": "play",
-            "hint": "What you do with toys or games"
-        },
-        "intermediate": {
-            "instruction": "Listen to the word and type it correctly.",
-            "target_word": "particularly",
-            "hint": "Especially or specifically"
-        }
-    }
-    
-    return spelling_exercises.get(difficulty, spelling_exercises["intermediate"])
+    return word_store.next_word(_student_key(), difficulty, category)
+
+def generate_dictation_exercise(difficulty="intermediate"):
+    """Generate a dictation exercise"""
+    return word_store.next_phrase(_student_key(), difficulty)
 
 def generate_progress_data(days=14):
     """Generate mock progress data for charts"""
@@ -252,9 +423,22 @@ def milestones():
 @app.route('/save_interests', methods=['POST'])
 def save_interests():
     """Save user interests"""
-    data = request.get_json()
-    interests = data.get('interests', [])
+    data = request.get_json(silent=True)
+    interests = data.get('interests', []) if isinstance(data, dict) else None
+    # Every later lesson reads the saved interests, so only clean lists are stored
+    if not isinstance(interests, list) or not all(
+        isinstance(interest, str) and 0 < len(interest.strip()) <= INTEREST_MAX_LENGTH for interest in interests
+    ):
+        return jsonify({"error": f"Expected `interests` as a list of non-empty strings "
+                                 f"of at most {INTEREST_MAX_LENGTH} characters"}), 400
+    if len(interests) > MAX_SAVED_INTERESTS:
+        return jsonify({"error": f"At most {MAX_SAVED_INTERESTS} interests"}), 400
     session['interests'] = interests
+    
+    # Start generating passages for the new interests before the first lesson
+    if GEMINI_AVAILABLE and model:
+        passage_pool.prime("medium", interests[:3])
+    
     return jsonify({"success": True})
 
 @app.route('/reading')
@@ -266,6 +450,9 @@ def reading():
         # Check if a specific passage was requested
         requested_passage = request.args.get('passage', None)
         
+        if interests and GEMINI_AVAILABLE and model and reading_level in sample_passages:
+            passage_pool.prime(reading_level, interests[:3])
+        
         logger.info(f"Rendering reading template with interests={interests}, level={reading_level}, passage={requested_passage}")
         
         return render_template('reading.html', 
@@ -297,37 +484,146 @@ def get_passage():
     passage = generate_passage(interests, reading_level)
     return jsonify(passage)
 
-@app.route('/analyze_reading', methods=['POST'])
-def analyze_reading():
-    """API endpoint to analyze reading with speech recognition"""
-    data = request.get_json()
+def _sse(event, data):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.route('/get_passage/stream', methods=['GET'])
+def stream_passage():
+    """API endpoint that streams a reading passage as Server-Sent Events
     
-    # Get the data from the request
-    spoken_text = data.get('spoken_text', '')
-    original_text = data.get('original_text', '')
-    client_comparison = data.get('comparison', None)
+    Ready passages (pool, cache or samples) arrive as a single `passage` event.
+    Live generations send `title` once, then `chunk` events with text deltas,
+    then `done`. A stream that fails partway ends with a `failed` event.
+    """
+    interests = session.get('interests', [])
+    reading_level = request.args.get('level', 'medium')
+    if reading_level not in sample_passages:
+        reading_level = "medium"
     
-    # If client already did the comparison, use that data
-    if client_comparison:
-        accuracy = client_comparison.get('accuracy', 85.0)
-        words_per_minute = client_comparison.get('words_per_minute', 110.0)
-        fluency_score = client_comparison.get('fluency_score', 80.0)
-        difficult_words = client_comparison.get('difficult_words', [])
-    else:
-        # Fallback if client comparison isn't provided
-        word_count = len(original_text.split())
-        accuracy = random.uniform(80.0, 98.0)
-        words_per_minute = random.uniform(85.0, 140.0)
-        fluency_score = random.uniform(70.0, 95.0)
+    def send_ready(passage):
+        yield _sse("passage", passage)
+        yield _sse("done", {})
+    
+    if not interests or not GEMINI_AVAILABLE or not model or not llm_client.available():
+        return _event_stream(send_ready(_sample_passage(reading_level)))
+    
+    # Anything already generated is sent in full straight away, looked up per
+    # interest like generate_passage does
+    passage = passage_pool.take(reading_level, interests[:3])
+    for interest in interests[:3] if passage is None else ():
+        passage = passage_cache.get(make_cache_key(reading_level, [interest], PASSAGE_PROMPT_VERSION))
+        if passage is not None:
+            break
+    if passage is not None:
+        return _event_stream(send_ready(passage))
+    
+    def send_live():
+        # Students with the same level and interests share one upstream stream
+        parser = PassageStreamParser()
+        try:
+            for chunk in llm_client.stream(_build_stream_prompt(interests, reading_level)):
+                for event, value in parser.feed(chunk):
+                    yield _sse("title", {"title": value}) if event == "title" else _sse("chunk", {"text": value})
+            for event, value in parser.close():
+                yield _sse("title", {"title": value}) if event == "title" else _sse("chunk", {"text": value})
+        except Exception as e:
+            logger.error(f"Error streaming passage: {e}")
+            if parser.title is None:
+                # Nothing reached the student yet, so a sample is a seamless fallback
+                yield from send_ready(_sample_passage(reading_level))
+            else:
+                yield _sse("failed", {"error": "Passage generation was interrupted"})
+            return
         
-        # Simulate finding difficult words
-        difficult_words = []
-        words = original_text.split()
-        for word in words:
-            if len(word) > 8 and random.random() < 0.3:
-                difficult_words.append(word)
-    
-    # Generate appropriate feedback based on accuracy and fluency
+        passage_data = {"title": parser.title, "passage": parser.text}
+        # The student already has this one, but only reuse it if it reads at the level
+        if readability_gate.check(reading_level, passage_data):
+            for interest in interests[:3]:
+                passage_cache.put(make_cache_key(reading_level, [interest], PASSAGE_PROMPT_VERSION), passage_data)
+        yield _sse("done", {})
+    
+    return _event_stream(send_live())
+
+def _event_stream(events):
+    """Wrap an event generator in an unbuffered SSE response"""
+    return Response(
+        stream_with_context(events),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+# Upper bound on interests in one prepare request; every (level, interest) pair costs model time
+PREPARE_MAX_INTERESTS = int(os.getenv("PASSAGE_PREPARE_MAX_INTERESTS", "10"))
+
+@app.route('/api/passages/prepare', methods=['POST'])
+def prepare_passages():
+    """Generate a stock of passages for a class ahead of time"""
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+    levels = data.get('levels', ['medium'])
+    interests = data.get('interests') or session.get('interests', [])
+    count = data.get('count', 1)
+    
+    if not isinstance(levels, list) or not all(isinstance(level, str) for level in levels):
+        return jsonify({"error": "Expected `levels` as a list of reading levels"}), 400
+    if not isinstance(interests, list) or not all(isinstance(interest, str) and interest.strip() for interest in interests):
+        return jsonify({"error": "Expected `interests` as a list of non-empty strings"}), 400
+    if len(interests) > PREPARE_MAX_INTERESTS:
+        return jsonify({"error": f"At most {PREPARE_MAX_INTERESTS} interests per request"}), 400
+    if isinstance(count, bool) or not isinstance(count, int) or count < 1:
+        return jsonify({"error": "Expected `count` as a positive integer"}), 400
+    
+    # Unknown levels are skipped and duplicates asked for once
+    levels = [level for level in dict.fromkeys(levels) if level in sample_passages]
+    interests = list(dict.fromkeys(interests))
+    per_spec = min(count, BATCH_MAX_PASSAGES)
+    
+    specs = [(level, interest) for level in levels for interest in interests]
+    results = generate_passage_batch(specs, per_spec)
+    
+    passages = [
+        {"level": level, "interest": interest, "title": passage["title"], "passage": passage["passage"]}
+        for (level, interest), batch in zip(specs, results)
+        for passage in batch
+    ]
+    return jsonify({
+        "requested": len(specs) * per_spec,
+        "generated": len(passages),
+        "passages": passages
+    })
+
+def _is_number(value):
+    """Check for a finite JSON number; JSON booleans are not numbers"""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+def _comparison_stage(state):
+    """Take the scores the browser already computed instead of aligning here"""
+    comparison = state["comparison"]
+    
+    def number(name, default):
+        value = comparison.get(name, default)
+        return value if _is_number(value) else default
+    
+    # The browser sends no reading speed when it could not time the reading
+    words_per_minute = comparison.get('words_per_minute', 110.0)
+    difficult_words = comparison.get('difficult_words', [])
+    state["result"].update({
+        "accuracy": number('accuracy', 85.0),
+        "words_per_minute": words_per_minute if words_per_minute is None or _is_number(words_per_minute) else 110.0,
+        "fluency_score": number('fluency_score', 80.0),
+        "difficult_words": [word for word in difficult_words if isinstance(word, str)] if isinstance(difficult_words, list) else []
+    })
+
+def _feedback_stage(state):
+    """Turn accuracy, reading speed and fluency into strengths and areas for improvement"""
+    result = state["result"]
+    accuracy = result["accuracy"]
+    words_per_minute = result["words_per_minute"]
+    fluency_score = result["fluency_score"]
+    difficult_words = result["difficult_words"]
+    
     strengths = []
     areas_for_improvement = []
     
@@ -337,7 +633,10 @@ def analyze_reading():
     elif accuracy > 80:
         strengths.append("Good word recognition for most of the passage")
     
-    if words_per_minute > 120:
+    # Reading speed is unknown when the client sent no timing
+    if words_per_minute is None:
+        pass
+    elif words_per_minute > 120:
         strengths.append("Strong reading speed")
     elif words_per_minute > 100:
         strengths.append("Good reading pace")
@@ -355,7 +654,9 @@ def analyze_reading():
     if accuracy < 85:
         areas_for_improvement.append("Focus on pronouncing words more clearly")
     
-    if words_per_minute < 90:
+    if words_per_minute is None:
+        pass
+    elif words_per_minute < 90:
         areas_for_improvement.append("Work on increasing your reading speed")
     elif words_per_minute > 140:
         areas_for_improvement.append("Consider slowing down slightly for better clarity")
@@ -368,50 +669,79 @@ def analyze_reading():
         word_list = ", ".join(difficult_words[:3])
         areas_for_improvement.append(f"Practice pronouncing longer words like: {word_list}")
     
+    result["strengths"] = strengths
+    result["areas_for_improvement"] = areas_for_improvement
+
+# The route words its feedback for the web page, and client-side comparisons
+# skip the aligner but still go through the same timed feedback stage
+reading_pipeline = ReadingPipeline().with_stage("feedback", _feedback_stage)
+comparison_pipeline = ReadingPipeline([("comparison", _comparison_stage), ("feedback", _feedback_stage)])
+
+@app.route('/analyze_reading', methods=['POST'])
+def analyze_reading():
+    """API endpoint to analyze reading with speech recognition
+    
+    Without a client-side `comparison`, `spoken_text` is aligned against
+    `original_text` here; reading speed comes from `duration` (seconds) or
+    per-word `timestamps` (seconds) when the client sends them.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+    
+    # Get the data from the request
+    spoken_text = data.get('spoken_text', '')
+    original_text = data.get('original_text', '')
+    client_comparison = data.get('comparison', None)
+    duration = data.get('duration')
+    timestamps = data.get('timestamps')
+    
+    if not isinstance(spoken_text, str) or not isinstance(original_text, str):
+        return jsonify({"error": "Expected `spoken_text` and `original_text` as strings"}), 400
+    if duration is not None and not _is_number(duration):
+        return jsonify({"error": "Expected `duration` as a number of seconds"}), 400
+    if timestamps is not None and not (isinstance(timestamps, list) and all(_is_number(t) for t in timestamps)):
+        return jsonify({"error": "Expected `timestamps` as a list of numbers of seconds"}), 400
+    if client_comparison is not None and not isinstance(client_comparison, dict):
+        return jsonify({"error": "Expected `comparison` as an object"}), 400
+    
+    # If client already did the comparison, use that data; otherwise align
+    # the transcript against the passage word by word
+    if client_comparison:
+        analysis = comparison_pipeline.run(original_text, spoken_text, comparison=client_comparison)
+    else:
+        analysis = reading_pipeline.run(original_text, spoken_text, duration_seconds=duration, timestamps=timestamps)
+    words_per_minute = analysis["words_per_minute"]
+    difficult_words = analysis["difficult_words"]
+    
     # Create pronunciation guides for difficult words
-    pronunciation_guides = {}
-    for word in difficult_words:
-        # Create simple phonetic breakdown
-        syllables = []
-        current = ""
-        
-        for i, char in enumerate(word):
-            current += char
-            if char.lower() in 'aeiou' and i < len(word) - 1 and word[i+1].lower() not in 'aeiou':
-                syllables.append(current)
-                current = ""
-        
-        if current:
-            syllables.append(current)
-        
-        # Join with dots and create guide
-        syllable_text = "·".join(syllables)
-        pronunciation_guides[word] = f"{syllable_text} ({word.upper()})"
+    pronunciation_guides = guides(difficult_words)
     
-    # Create highlighted passage
-    highlighted_passage = original_text
-    if difficult_words:
-        # Safely create a regex pattern with all difficult words
-        # Will highlight all occurrences of difficult words in the passage
-        safe_words = [re.escape(word) for word in difficult_words]
-        pattern = r'\b(' + '|'.join(safe_words) + r')\b'
-        highlighted_passage = re.sub(pattern, r'<span class="highlighted-word">\1</span>', original_text, flags=re.IGNORECASE)
+    # Create highlighted passage (HTML-escaped, difficult words wrapped in spans)
+    highlighted_passage = highlight_words(original_text, difficult_words)
     
     # If not completed an exercise today, update streak
     if not session.get('exercise_completed_today', False):
         session['streak_count'] = session.get('streak_count', 0) + 1
         session['exercise_completed_today'] = True
     
-    return jsonify({
-        "accuracy": round(accuracy, 1),
-        "words_per_minute": round(words_per_minute, 1),
-        "fluency_score": round(fluency_score, 1),
-        "strengths": strengths,
-        "areas_for_improvement": areas_for_improvement,
+    result = {
+        "accuracy": round(analysis["accuracy"], 1),
+        "words_per_minute": round(words_per_minute, 1) if words_per_minute is not None else None,
+        "fluency_score": round(analysis["fluency_score"], 1),
+        "strengths": analysis["strengths"],
+        "areas_for_improvement": analysis["areas_for_improvement"],
         "difficult_words": difficult_words,
         "pronunciation_guides": pronunciation_guides,
-        "highlighted_passage": highlighted_passage
-    })
+        "highlighted_passage": highlighted_passage,
+        "timings": analysis["timings"]
+    }
+    if not client_comparison:
+        result["substitutions"] = analysis["substitutions"]
+        result["omissions"] = analysis["omissions"]
+        result["insertions"] = analysis["insertions"]
+    
+    return jsonify(result)
 
 @app.route('/writing')
 def writing():
@@ -421,101 +751,126 @@ def writing():
     exercise_type = request.args.get('type', 'word')
     
     if exercise_type == 'word':
-        exercise = {
-            "instruction": "Listen to the word and type it correctly.",
-            "target_word": "particularly",
-            "hint": "Especially or specifically"
-        }
+        exercise = generate_spelling_exercise(difficulty)
     else:
-        exercise = {
-            "instruction": "Listen to the phrase and type it exactly as you hear it.",
-            "target_text": "The ancient map showed a hidden treasure location.",
-            "hint": "About a valuable discovery"
-        }
+        exercise = generate_dictation_exercise(difficulty)
         
-    return render_template('writing.html', exercise=exercise)
+    return render_template('writing.html', exercise=exercise, word_categories=word_store.categories())
+
+@app.route('/api/spelling/next', methods=['GET'])
+def next_spelling_exercise():
+    """Draw the next word or phrase for this session without repeats"""
+    level = request.args.get('level', 'intermediate')
+    
+    if request.args.get('type', 'word') == 'phrase':
+        exercise = generate_dictation_exercise(level)
+    elif request.args.get('challenge'):
+        exercise = word_store.next_word(_student_key(), challenge=request.args['challenge'])
+    else:
+        exercise = generate_spelling_exercise(level, request.args.get('category') or None)
+    
+    if exercise is None:
+        return jsonify({"error": "No exercises available"}), 404
+    return jsonify(exercise)
+
+# Upper bound on items in one batch spelling check
+SPELLING_BATCH_MAX_ITEMS = 100
+
+def _spelling_feedback(user_answer, target_text, exercise_type, comparison):
+    """Explain a wrong spelling answer"""
+    if exercise_type == 'word':
+        # Word-specific feedback
+        errors = classify_spelling_errors(target_text, comparison)
+        if errors['transposed']:
+            return "Two letters are swapped. Check the order of the letters."
+        if errors['double_consonant']:
+            return "This word contains double consonants. Listen carefully for repeated sounds."
+        if errors['ie_ei']:
+            return "Remember the rule: 'i' before 'e', except after 'c', or when sounded like 'a'."
+        if len(user_answer) < len(target_text):
+            return "You're missing some letters. Try sounding out the word completely."
+        if len(user_answer) > len(target_text):
+            return "You've added extra letters. Listen to the word again carefully."
+        if errors['vowel']:
+            return "Check the vowels in your spelling. Pay attention to 'a', 'e', 'i', 'o', and 'u'."
+        return "Try sounding out the word syllable by syllable."
+    
+    # Phrase-specific feedback
+    words_target = target_text.split()
+    words_user = user_answer.split()
+    
+    if len(words_user) < len(words_target):
+        return f"Your answer is missing some words. The phrase has {len(words_target)} words but you typed {len(words_user)}."
+    if len(words_user) > len(words_target):
+        return f"You added extra words. The phrase has {len(words_target)} words but you typed {len(words_user)}."
+    
+    # Find the first mismatched word
+    for target_word, user_word in zip(words_target, words_user):
+        if target_word != user_word:
+            return f"Check your spelling of '{user_word}'. The correct word is '{target_word}'."
+    return "Check your punctuation and capitalization."
+
+def _check_spelling_item(answer, target_text, exercise_type='word'):
+    """Compare one answer with its target and build the feedback"""
+    user_answer = (answer or '').strip().lower()
+    target_text = (target_text or '').strip().lower()
+    is_correct = user_answer == target_text
+    
+    # Compare characters with a bounded edit-distance diff for detailed feedback
+    comparison = spelling_comparison(target_text, user_answer, default_max_distance(target_text))
+    
+    return {
+        "is_correct": is_correct,
+        "comparison": comparison,
+        "feedback": "" if is_correct else _spelling_feedback(user_answer, target_text, exercise_type, comparison)
+    }
+
+def _record_completed_exercise():
+    """If not completed an exercise today, update streak"""
+    if not session.get('exercise_completed_today', False):
+        session['streak_count'] = session.get('streak_count', 0) + 1
+        session['exercise_completed_today'] = True
 
 @app.route('/check_spelling', methods=['POST'])
 def check_spelling():
     """API endpoint to check spelling and provide feedback for words and phrases"""
     data = request.get_json()
-    user_answer = data.get('answer', '').strip().lower()
-    target_text = data.get('target_text', '').strip().lower()
-    exercise_type = data.get('exercise_type', 'word')
+    result = _check_spelling_item(data.get('answer', ''), data.get('target_text', ''), data.get('exercise_type', 'word'))
     
-    # Check if answer is correct
-    is_correct = user_answer == target_text
+    if result["is_correct"]:
+        _record_completed_exercise()
     
-    # Compare characters for detailed feedback
-    comparison = []
+    return jsonify(result)
+
+@app.route('/check_spelling/batch', methods=['POST'])
+def check_spelling_batch():
+    """Check a whole list of spelling answers in one request"""
+    data = request.get_json(silent=True) or {}
+    items = data.get('items') if isinstance(data, dict) else data
     
-    if not user_answer:
-        comparison = [{'char': c, 'status': 'missing'} for c in target_text]
-    else:
-        # Use dynamic programming approach for more sophisticated comparison
-        # This is a simplified version of the Levenshtein distance algorithm
-        
-        i, j = 0, 0
-        while i < len(target_text) or j < len(user_answer):
-            if i < len(target_text) and j < len(user_answer) and target_text[i] == user_answer[j]:
-                # Characters match
-                comparison.append({'char': target_text[i], 'status': 'correct'})
-                i += 1
-                j += 1
-            elif j < len(user_answer) and (i >= len(target_text) or i < len(target_text) and j < len(user_answer) and target_text[i] != user_answer[j]):
-                # Extra character in user answer
-                comparison.append({'user_char': user_answer[j], 'status': 'extra'})
-                j += 1
-            elif i < len(target_text):
-                # Missing character in user answer
-                comparison.append({'char': target_text[i], 'status': 'missing'})
-                i += 1
-    
-    # Generate appropriate feedback
-    feedback = ""
-    if not is_correct:
-        if exercise_type == 'word':
-            # Word-specific feedback
-            if len(user_answer) < len(target_text):
-                feedback = "You're missing some letters. Try sounding out the word completely."
-            elif len(user_answer) > len(target_text):
-                feedback = "You've added extra letters. Listen to the word again carefully."
-            elif any(c in target_text for c in 'aeiou') and not any(c == user_answer[i] for i, c in enumerate(target_text) if c in 'aeiou' and i < len(user_answer)):
-                feedback = "Check the vowels in your spelling. Pay attention to 'a', 'e', 'i', 'o', and 'u'."
-            elif any(c+c in target_text for c in 'bcdfghjklmnpqrstvwxyz'):
-                feedback = "This word contains double consonants. Listen carefully for repeated sounds."
-            elif 'ie' in target_text or 'ei' in target_text:
-                feedback = "Remember the rule: 'i' before 'e', except after 'c', or when sounded like 'a'."
-            else:
-                feedback = "Try sounding out the word syllable by syllable."
-        else:
-            # Phrase-specific feedback
-            words_target = target_text.split()
-            words_user = user_answer.split()
-            
-            if len(words_user) < len(words_target):
-                feedback = f"Your answer is missing some words. The phrase has {len(words_target)} words but you typed {len(words_user)}."
-            elif len(words_user) > len(words_target):
-                feedback = f"You added extra words. The phrase has {len(words_target)} words but you typed {len(words_user)}."
-            else:
-                # Find the first mismatched word
-                for i, (target_word, user_word) in enumerate(zip(words_target, words_user)):
-                    if target_word != user_word:
-                        feedback = f"Check your spelling of '{user_word}'. The correct word is '{target_word}'."
-                        break
-                
-                if not feedback:
-                    feedback = "Check your punctuation and capitalization."
+    if not isinstance(items, list) or not all(
+        isinstance(item, dict) and all(isinstance(item.get(field, ''), str)
+                                       for field in ('answer', 'target_text', 'exercise_type'))
+        for item in items
+    ):
+        return jsonify({"error": "Expected a list of {answer, target_text, exercise_type} items with string fields"}), 400
+    if len(items) > SPELLING_BATCH_MAX_ITEMS:
+        return jsonify({"error": f"At most {SPELLING_BATCH_MAX_ITEMS} items per batch"}), 400
     
-    # If not completed an exercise today, update streak
-    if is_correct and not session.get('exercise_completed_today', False):
-        session['streak_count'] = session.get('streak_count', 0) + 1
-        session['exercise_completed_today'] = True
+    results = [
+        _check_spelling_item(item.get('answer', ''), item.get('target_text', ''), item.get('exercise_type', 'word'))
+        for item in items
+    ]
+    correct = sum(1 for result in results if result["is_correct"])
+    
+    # One session update for the whole quiz
+    if correct:
+        _record_completed_exercise()
     
     return jsonify({
-        "is_correct": is_correct,
-        "comparison": comparison,
-        "feedback": feedback
+        "results": results,
+        "correct": correct,
+        "total": len(results)
     })
 
 @app.route('/progress')
@@ -530,38 +885,107 @@ def progress():
                           progress_data=progress_data,
                           activities=activities)
 
+@app.route('/health')
+def health():
+    """Report the state of the content generation path"""
+    breaker = get_breaker("gemini").snapshot()
+    degraded = GEMINI_AVAILABLE and breaker["state"] != CircuitBreaker.CLOSED
+    
+    return jsonify({
+        "status": "degraded" if degraded else "ok",
+        "llm": {
+            "available": GEMINI_AVAILABLE,
+            "breaker": breaker,
+            "client": llm_client.stats(),
+            "parsing": parse_stats()
+        },
+        "passage_cache": passage_cache.stats(),
+        "passage_pool": passage_pool.stats(),
+        "reading_pipeline": reading_pipeline.timing_stats(),
+        "comparison_pipeline": comparison_pipeline.timing_stats(),
+        "readability_gate": readability_gate.stats(),
+        "syllables": syllable_stats(),
+        "word_store": word_store.stats(),
+        "writing_analysis": {
+            "cache": writing_analysis_cache.stats(),
+            "analyzers": writing_analyzers.stats(),
+            "grammar_rules": {**writing_analysis_service.grammar_rules.stats,
+                              "disabled": writing_analysis_service.grammar_rules.disabled},
+            "achievements": dict(achievement_service.stats)
+        },
+        "draft_store": draft_store.stats(),
+        "sessions": session_backend.stats()
+    })
+
 @app.route('/get_progress_data')
 def get_progress_data():
     """API endpoint to get progress data for charts"""
     return jsonify(generate_progress_data())
 
 # Writing Intervention System Routes
+writing_analysis_service = WritingAnalysisService()
+achievement_service = AchievementService(max_users=int(os.getenv("ACHIEVEMENT_MAX_USERS", "10000")))
+
+# Students resubmit unchanged drafts, so analyses are memoized by the draft's content hash
+writing_analysis_cache = TTLCache(
+    maxsize=int(os.getenv("WRITING_ANALYSIS_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("WRITING_ANALYSIS_CACHE_TTL", "3600"))
+)
+
+# One incremental analyzer per student draft, so live feedback after each
+# typing pause re-analyzes only the sentences that changed
+writing_analyzers = TTLCache(
+    maxsize=int(os.getenv("WRITING_ANALYZER_CACHE_SIZE", "1024")),
+    ttl=float(os.getenv("WRITING_ANALYZER_TTL", "1800"))
+)
+
+def _draft_analyzer(draft_id):
+    """Get the student's incremental analyzer for a draft, creating it on first use"""
+    key = f"{_student_key()}:{draft_id}"
+    analyzer = writing_analyzers.get(key)
+    if analyzer is None:
+        analyzer = writing_analysis_service.incremental_analyzer()
+        writing_analyzers.put(key, analyzer)
+    return analyzer
+
 @app.route('/api/writing/analyze', methods=['POST'])
 def analyze_writing():
-    """Analyze submitted writing and return detailed feedback"""
-    content = request.json.get('content', '')
-    
-    # Perform writing analysis
-    analysis = {
-        'grammar': {
-            'score': random.randint(60, 100),
-            'suggestions': []
-        },
-        'vocabulary': {
-            'score': random.randint(60, 100),
-            'suggestions': []
-        },
-        'structure': {
-            'score': random.randint(60, 100),
-            'suggestions': []
-        },
-        'organization': {
-            'score': random.randint(60, 100),
-            'suggestions': []
-        }
-    }
+    """Analyze submitted writing and return detailed feedback
+    
+    Clients analyzing a draft as it is typed send the same `draft_id` with
+    every request, so each analysis only revisits the edited sentences.
+    """
+    data = request.get_json(silent=True) or {}
+    content = data.get('content', '') if isinstance(data, dict) else None
+    draft_id = data.get('draft_id') if isinstance(data, dict) else None
+    if not isinstance(content, str):
+        return jsonify({"error": "Expected the draft as a string in `content`"}), 400
+    if draft_id is not None and (isinstance(draft_id, bool) or not isinstance(draft_id, (int, str))):
+        return jsonify({"error": "Expected `draft_id` as an integer or string"}), 400
+    
+    start = time.perf_counter()
+    key = hashlib.sha256(content.encode('utf-8')).hexdigest()
+    analysis = writing_analysis_cache.get(key)
+    cache_hit = analysis is not None
+    if not cache_hit:
+        analysis = serialize_analysis(_draft_analyzer(draft_id).update(content))
+        writing_analysis_cache.put(key, analysis)
+    elapsed_ms = (time.perf_counter() - start) * 1000
     
-    return jsonify(analysis)
+    user = _student_key()
+    unlocked = achievement_service.update_metrics(user, {
+        'words_written': sum(draft.word_count for draft in draft_store.drafts_for(user)),
+        'avg_sentence_score': analysis['structure']['score'],
+        'organization_score': analysis['organization']['score']
+    })
+    
+    # Cached results are shared between requests, so the per-request fields go on a copy
+    return jsonify({
+        **analysis,
+        "achievements_unlocked": [{"id": a.id, "title": a.title} for a in unlocked],
+        "cache": {"hit": cache_hit, "hit_rate": writing_analysis_cache.stats()["hit_rate"]},
+        "timings": {"analysis_ms": round(elapsed_ms, 3)}
+    })
 
 @app.route('/api/writing/generate-topic', methods=['POST'])
 def generate_topic():
@@ -604,48 +1028,88 @@ def generate_topic():
     
     return jsonify({'topic': selected_topic})
 
+# Drafts are logged to local disk; every acknowledged save has been fsynced
+draft_store = DraftStore(
+    os.getenv("DRAFT_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".data", "drafts.log"))
+)
+atexit.register(draft_store.close)
+
+def _draft_json(draft, include_content=True):
+    """Serialize a stored draft for the writing API"""
+    result = {
+        'id': draft.id,
+        'title': draft.title,
+        'version': draft.version,
+        'word_count': draft.word_count,
+        'timestamp': draft.last_modified.isoformat()
+    }
+    if include_content:
+        result['content'] = draft.content
+    return result
+
 @app.route('/api/writing/save-draft', methods=['POST'])
 def save_draft():
-    """Save a writing draft"""
-    content = request.json.get('content', '')
-    title = request.json.get('title', f'Draft - {datetime.now().strftime("%Y-%m-%d %H:%M")}')
-    
-    # In a real implementation, this would save to a database
-    draft = {
-        'id': random.randint(1000, 9999),
-        'title': title,
-        'content': content,
-        'timestamp': datetime.now().isoformat()
-    }
+    """Save a writing draft
+    
+    A full save sends `content` (plus `title`, and `draft_id` to overwrite a
+    draft). An autosave can instead send `draft_id`, `base_version` and
+    `edits`, a list of [start, end, text] ranges of that version, and gets
+    the new version back without the content. A `draft_id` the student does
+    not own is answered with 404. A stale `base_version` is answered with 409
+    and the current version, so the client can save in full; a failed disk
+    write is answered with 503 and the save is not kept.
+    """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"error": "Expected a JSON object"}), 400
+    user = _student_key()
+    
+    try:
+        if 'edits' in data:
+            draft = draft_store.save_delta(user, data.get('draft_id'), data.get('base_version'), data['edits'])
+            return jsonify(_draft_json(draft, include_content=False))
+        
+        content = data.get('content', '')
+        title = data.get('title')
+        if not isinstance(content, str) or not isinstance(title, (str, type(None))):
+            raise ValueError("Expected `content` and `title` as strings")
+        draft = draft_store.save(user, content, title=title, draft_id=data.get('draft_id'))
+    except DraftConflict as e:
+        return jsonify({"error": "The draft changed since base_version", "version": e.current_version}), 409
+    except KeyError:
+        return jsonify({"error": "Unknown draft"}), 404
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    except OSError:
+        # The store rolled the save back, so the client still holds the only copy
+        return jsonify({"error": "The draft could not be saved, please try again"}), 503
     
-    return jsonify(draft)
+    return jsonify(_draft_json(draft))
+
+@app.route('/api/writing/drafts', methods=['GET'])
+def list_drafts():
+    """List the student's saved drafts, with content when `draft_id` picks one"""
+    draft_id = request.args.get('draft_id', type=int)
+    if draft_id is not None:
+        draft = draft_store.get(_student_key(), draft_id)
+        if draft is None:
+            return jsonify({"error": "Unknown draft"}), 404
+        return jsonify(_draft_json(draft))
+    return jsonify([_draft_json(draft, include_content=False) for draft in draft_store.drafts_for(_student_key())])
 
 @app.route('/api/writing/achievements', methods=['GET'])
 def get_achievements():
     """Get user's writing achievements"""
-    # Sample achievements data
     achievements = [
         {
-            'id': 1,
-            'title': 'Word Wizard',
-            'description': 'Master basic vocabulary and simple sentences',
-            'progress': 75,
-            'unlocked': True
-        },
-        {
-            'id': 2,
-            'title': 'Sentence Sculptor',
-            'description': 'Create varied sentences with descriptive language',
-            'progress': 45,
-            'unlocked': False
-        },
-        {
-            'id': 3,
-            'title': 'Paragraph Pro',
-            'description': 'Develop organized paragraphs with supporting details',
-            'progress': 20,
-            'unlocked': False
+            'id': achievement.id,
+            'title': achievement.title,
+            'description': achievement.description,
+            'progress': achievement.progress,
+            'unlocked': achievement.unlocked,
+            'unlocked_date': achievement.unlocked_date.isoformat() if achievement.unlocked_date else None
         }
+        for achievement in achievement_service.achievements_for(_student_key())
     ]
     
     return jsonify(achievements)
@@ -28,6 +28,7 @@ class WritingDraft:
     last_modified: datetime
     word_count: int
     analysis_scores: Dict[str, float]
+    version: int = 0
 
 @dataclass
 class WritingProfile:
@@ -0,0 +1,3 @@
+"""
+Writing intervention services for the LiterLeap Flask app.
+"""
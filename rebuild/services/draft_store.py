@@ -0,0 +1,423 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Hashable, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from models.writing_intervention import WritingDraft
+
+# Locking the log is POSIX only; elsewhere the store trusts the deployment to run one process
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+class DraftConflict(Exception):
+    """A delta was based on a version of the draft that is no longer current"""
+    
+    def __init__(self, current_version: int):
+        super().__init__(f"Draft is at version {current_version}")
+        self.current_version = current_version
+
+class _Draft(NamedTuple):
+    """A stored draft; replaced on every save, never changed in place"""
+    id: int
+    user: str
+    title: str
+    content: str
+    created: float
+    modified: float
+    version: int
+
+class _Commit:
+    """The outcome of one group of log records, shared by the savers waiting on it"""
+    __slots__ = ('done', 'error', 'undo')
+    
+    def __init__(self):
+        self.done = False
+        self.error: Optional[OSError] = None
+        # (draft id, version it replaced) per save, so a failed write can be rolled back
+        self.undo: List[Tuple[int, Optional[_Draft]]] = []
+
+def apply_edits(content: str, edits: Sequence[Tuple[int, int, str]]) -> str:
+    """Replace the (start, end) ranges of the content, given in order and not overlapping"""
+    pieces = []
+    position = 0
+    for start, end, text in edits:
+        if not (isinstance(start, int) and isinstance(end, int) and isinstance(text, str)):
+            raise ValueError("Edits are (start, end, text) with integer offsets")
+        if not position <= start <= end <= len(content):
+            raise ValueError(f"Edit range {start}-{end} is out of order or outside the draft")
+        pieces.append(content[position:start])
+        pieces.append(text)
+        position = end
+    pieces.append(content[position:])
+    return ''.join(pieces)
+
+class DraftStore:
+    """Drafts kept in memory and persisted to an append-only log on local disk
+    
+    Every save appends one JSON line: a full "put" or, for autosaves, a
+    "delta" holding only the changed ranges. A single writer thread commits
+    lines in groups, one fsync for everything queued while the previous fsync
+    ran, and callers that wait are released once their line is durable.
+    When the log grows past compact_ratio times the live drafts it is rewritten
+    as one put per draft and atomically swapped in. Opening the store replays
+    the log, dropping a torn last line left by a crash.
+    
+    Saves are visible to readers before they are durable. If a write fails,
+    every save not yet on disk is rolled back and its caller gets the OSError;
+    the writer keeps running, so the next save tries the disk again.
+    
+    The index and id counter live in this process, so only one process may
+    own a log: opening takes an exclusive lock on a ".lock" file beside it
+    and raises RuntimeError if another process holds it.
+    """
+    
+    def __init__(self, path: str, compact_ratio: float = 4.0, min_compact_bytes: int = 1 << 20):
+        self.path = path
+        self.compact_ratio = compact_ratio
+        self.min_compact_bytes = min_compact_bytes
+        self._drafts: Dict[int, _Draft] = {}
+        self._by_user: Dict[str, Dict[int, None]] = {}
+        self._next_id = 1
+        self._live_bytes = 0
+        
+        # The writer thread waits for work and savers wait for durability on separate
+        # conditions, so a save wakes only the writer instead of every waiting saver
+        self._lock = threading.Lock()
+        self._work = threading.Condition(self._lock)
+        self._durable_changed = threading.Condition(self._lock)
+        self._pending: List[Dict] = []
+        self._commit = _Commit()
+        self._compact_requested = False
+        self._closed = False
+        # Set after a failed append, which may have left part of a record at the end of the log
+        self._log_dirty = False
+        self._stats = {'puts': 0, 'deltas': 0, 'fsyncs': 0, 'records_written': 0, 'compactions': 0,
+                       'write_errors': 0, 'rolled_back': 0}
+        
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock_file = self._acquire_lock()
+        try:
+            self._log_bytes = self._replay()
+            # Unbuffered, so a failed write leaves nothing behind to be flushed later
+            self._file = open(path, 'ab', buffering=0)
+        except BaseException:
+            self._lock_file.close()
+            raise
+        self._writer = threading.Thread(target=self._write_loop, name='draft-store-writer', daemon=True)
+        self._writer.start()
+    
+    def save(self, user_id: Hashable, content: str, title: Optional[str] = None,
+             draft_id: Optional[int] = None, wait: bool = True) -> WritingDraft:
+        """Store the full text of a new draft, or of the user's draft draft_id; raises KeyError if unknown"""
+        user = str(user_id)
+        with self._lock:
+            now = time.time()
+            current = self._owned(user, draft_id) if draft_id is not None else None
+            if draft_id is not None and current is None:
+                raise KeyError(draft_id)
+            if current is None:
+                draft_id, self._next_id = self._next_id, self._next_id + 1
+                draft = _Draft(draft_id, user, title or f'Draft - {datetime.now().strftime("%Y-%m-%d %H:%M")}',
+                               content, now, now, 1)
+            else:
+                draft = current._replace(title=title or current.title, content=content,
+                                         modified=now, version=current.version + 1)
+            self._install(draft, current)
+            self._stats['puts'] += 1
+            commit = self._append(self._put_record(draft), draft.id, current)
+        if wait:
+            self._wait(commit)
+        return self._to_draft(draft)
+    
+    def save_delta(self, user_id: Hashable, draft_id: int, base_version: int,
+                   edits: Iterable[Tuple[int, int, str]], wait: bool = True) -> WritingDraft:
+        """Apply changed ranges to a draft; raises KeyError, ValueError or DraftConflict"""
+        user = str(user_id)
+        edits = [tuple(edit) for edit in edits]
+        with self._lock:
+            current = self._owned(user, draft_id)
+            if current is None:
+                raise KeyError(draft_id)
+            if current.version != base_version:
+                raise DraftConflict(current.version)
+            draft = current._replace(content=apply_edits(current.content, edits),
+                                     modified=time.time(), version=current.version + 1)
+            self._install(draft, current)
+            self._stats['deltas'] += 1
+            commit = self._append({'op': 'delta', 'id': draft.id, 'base': base_version,
+                                   'edits': edits, 'modified': draft.modified}, draft.id, current)
+        if wait:
+            self._wait(commit)
+        return self._to_draft(draft)
+    
+    def get(self, user_id: Hashable, draft_id: int) -> Optional[WritingDraft]:
+        """Get one of the user's drafts"""
+        with self._lock:
+            draft = self._owned(str(user_id), draft_id)
+        return self._to_draft(draft) if draft else None
+    
+    def drafts_for(self, user_id: Hashable) -> List[WritingDraft]:
+        """Get the user's drafts, oldest first"""
+        with self._lock:
+            drafts = [self._drafts[draft_id] for draft_id in self._by_user.get(str(user_id), ())]
+        return [self._to_draft(draft) for draft in drafts]
+    
+    def compact(self, wait: bool = True):
+        """Rewrite the log as one record per draft"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Draft store is closed")
+            self._compact_requested = True
+            commit = self._commit
+            self._work.notify()
+        if wait:
+            self._wait(commit)
+    
+    def close(self):
+        """Write everything queued and stop the writer thread"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._work.notify()
+        self._writer.join()
+        self._file.close()
+        # Closing the lock file releases the lock
+        self._lock_file.close()
+    
+    def stats(self) -> Dict:
+        """Get save, fsync and log size counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update(drafts=len(self._drafts), users=len(self._by_user), pending=len(self._pending),
+                         log_bytes=self._log_bytes, live_bytes=self._live_bytes)
+        stats['records_per_fsync'] = round(stats['records_written'] / stats['fsyncs'], 1) if stats['fsyncs'] else 0.0
+        return stats
+    
+    def _acquire_lock(self):
+        """Lock the log for this process; a separate file, since compaction replaces the log"""
+        lock_file = open(f"{self.path}.lock", 'a+b')
+        if fcntl is None:
+            return lock_file
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            raise RuntimeError(f"Draft log {self.path} is in use by another process; "
+                               f"the draft store must run in a single worker")
+        return lock_file
+    
+    def _owned(self, user: str, draft_id: int) -> Optional[_Draft]:
+        """Look up a draft, hiding other users' drafts. Caller holds the lock."""
+        draft = self._drafts.get(draft_id)
+        return draft if draft is not None and draft.user == user else None
+    
+    def _install(self, draft: _Draft, previous: Optional[_Draft]):
+        """Make a draft version current in the index. Caller holds the lock."""
+        self._drafts[draft.id] = draft
+        self._by_user.setdefault(draft.user, {})[draft.id] = None
+        self._live_bytes += len(draft.content) - (len(previous.content) if previous else 0)
+    
+    @staticmethod
+    def _put_record(draft: _Draft) -> Dict:
+        """The log record holding a whole draft"""
+        return {'op': 'put', 'id': draft.id, 'user': draft.user, 'title': draft.title, 'content': draft.content,
+                'created': draft.created, 'modified': draft.modified, 'version': draft.version}
+    
+    @staticmethod
+    def _to_draft(draft: _Draft) -> WritingDraft:
+        """Convert a stored draft to the model"""
+        return WritingDraft(
+            id=draft.id,
+            title=draft.title,
+            content=draft.content,
+            created_at=datetime.fromtimestamp(draft.created),
+            last_modified=datetime.fromtimestamp(draft.modified),
+            word_count=len(draft.content.split()),
+            analysis_scores={},
+            version=draft.version
+        )
+    
+    def _append(self, record: Dict, draft_id: int, previous: Optional[_Draft]) -> _Commit:
+        """Queue a record for the writer thread. Caller holds the lock."""
+        if self._closed:
+            raise RuntimeError("Draft store is closed")
+        self._pending.append(record)
+        self._commit.undo.append((draft_id, previous))
+        self._work.notify()
+        return self._commit
+    
+    def _wait(self, commit: _Commit):
+        """Block until a group of records is on disk, raising the OSError if writing it failed"""
+        with self._lock:
+            while not commit.done and commit.error is None:
+                self._durable_changed.wait()
+        if commit.error is not None:
+            raise commit.error
+    
+    def _rollback(self, undo: List[Tuple[int, Optional[_Draft]]]):
+        """Put back the versions a group of saves replaced, newest first. Caller holds the lock."""
+        for draft_id, previous in reversed(undo):
+            current = self._drafts[draft_id]
+            if previous is not None:
+                self._install(previous, current)
+                continue
+            del self._drafts[draft_id]
+            drafts = self._by_user[current.user]
+            del drafts[draft_id]
+            if not drafts:
+                del self._by_user[current.user]
+            self._live_bytes -= len(current.content)
+        self._stats['rolled_back'] += len(undo)
+    
+    def _write_loop(self):
+        """Commit queued records in groups until the store is closed"""
+        while True:
+            with self._lock:
+                while not self._pending and not self._compact_requested and not self._closed:
+                    self._work.wait()
+                if not self._pending and not self._compact_requested:
+                    return
+                compact = self._compact_requested or self._log_bytes > max(
+                    self.min_compact_bytes, self.compact_ratio * self._live_bytes)
+                if compact:
+                    # The snapshot already holds the effect of every queued record
+                    records = [self._put_record(draft) for draft in self._drafts.values()]
+                    self._compact_requested = False
+                else:
+                    records = self._pending
+                self._pending = []
+                commit, self._commit = self._commit, _Commit()
+            
+            try:
+                data = b''.join(json.dumps(record, separators=(',', ':')).encode('utf-8') + b'\n'
+                                for record in records)
+                if compact:
+                    self._rewrite(data)
+                else:
+                    self._write(data)
+            except OSError as e:
+                logger.error(f"Draft store write failed, rolling back unsaved drafts: {e}")
+                with self._lock:
+                    # Saves queued meanwhile may build on the failed ones, so they go too
+                    queued, self._commit = self._commit, _Commit()
+                    self._pending = []
+                    for failed in (queued, commit):
+                        self._rollback(failed.undo)
+                        failed.error = e
+                    self._stats['write_errors'] += 1
+                    self._durable_changed.notify_all()
+                continue
+            
+            with self._lock:
+                self._stats['fsyncs'] += 1
+                self._stats['records_written'] += len(records)
+                if compact:
+                    self._stats['compactions'] += 1
+                    self._log_bytes = len(data)
+                else:
+                    self._log_bytes += len(data)
+                commit.done = True
+                self._durable_changed.notify_all()
+    
+    def _write(self, data: bytes):
+        """Append records to the log and fsync them"""
+        fd = self._file.fileno()
+        if self._log_dirty:
+            # Cut off whatever part of a failed append reached the file
+            os.ftruncate(fd, self._log_bytes)
+        self._log_dirty = True
+        view = memoryview(data)
+        while view:
+            view = view[self._file.write(view):]
+        os.fsync(fd)
+        self._log_dirty = False
+    
+    def _rewrite(self, data: bytes):
+        """Atomically replace the log with a compacted one"""
+        tmp_path = f"{self.path}.compact"
+        new_file = None
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            # The open handle follows the file through the rename
+            new_file = open(tmp_path, 'ab', buffering=0)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            if new_file is not None:
+                new_file.close()
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+        self._file.close()
+        self._file = new_file
+        self._log_dirty = False
+        try:
+            self._fsync_directory()
+        except OSError as e:
+            # The compacted log holds every draft either way; only the rename may not survive a crash
+            logger.warning(f"Could not fsync the draft log directory: {e}")
+    
+    def _fsync_directory(self):
+        """Make a rename durable; not every platform can open a directory"""
+        flags = getattr(os, 'O_DIRECTORY', None)
+        if flags is None:
+            return
+        fd = os.open(os.path.dirname(os.path.abspath(self.path)), flags)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    
+    def _replay(self) -> int:
+        """Rebuild the index from the log and return its size in bytes"""
+        try:
+            with open(self.path, 'rb') as f:
+                lines = f.readlines()
+        except FileNotFoundError:
+            return 0
+        
+        size = 0
+        for number, line in enumerate(lines, 1):
+            if not line.endswith(b'\n'):
+                # A crash mid-append leaves at most one torn line, at the end
+                logger.warning(f"Dropping torn last record of {self.path}")
+                with open(self.path, 'r+b') as f:
+                    f.truncate(size)
+                break
+            try:
+                self._replay_record(json.loads(line))
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Skipping bad record {number} of {self.path}: {e}")
+            size += len(line)
+        
+        logger.info(f"Loaded {len(self._drafts)} drafts for {len(self._by_user)} users from {self.path}")
+        return size
+    
+    def _replay_record(self, record: Dict):
+        """Apply one log record to the index"""
+        if record['op'] == 'put':
+            draft = _Draft(record['id'], record['user'], record['title'], record['content'],
+                           record['created'], record['modified'], record['version'])
+            self._install(draft, self._drafts.get(draft.id))
+            self._next_id = max(self._next_id, draft.id + 1)
+        elif record['op'] == 'delta':
+            current = self._drafts[record['id']]
+            if current.version != record['base']:
+                raise ValueError(f"delta for version {record['base']} of a draft at {current.version}")
+            draft = current._replace(content=apply_edits(current.content, [tuple(edit) for edit in record['edits']]),
+                                     modified=record['modified'], version=current.version + 1)
+            self._install(draft, current)
+        else:
+            raise ValueError(f"unknown op {record['op']!r}")
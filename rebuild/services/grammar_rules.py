@@ -0,0 +1,146 @@
+import logging
+import re
+import threading
+import time
+from typing import Dict, Iterable, List, NamedTuple
+
+logger = logging.getLogger(__name__)
+
+# Matches only where a sentence starts: at the beginning of the text or right after closing punctuation
+SENTENCE_START = r'(?<![^.!?])'
+
+class GrammarRule(NamedTuple):
+    """One grammar check; the pattern marks the flagged text with a group named after the rule"""
+    name: str
+    pattern: str
+    # Sentence rules are tried once at every sentence start and may overlap other issues;
+    # span rules are scanned for anywhere and do not overlap each other
+    sentence: bool = False
+    # Seconds the rule may spend per 1,000 characters before it is switched off
+    budget: float = 0.002
+
+# Every rule is linear in the text: sentence rules are anchored at sentence starts, and each
+# clause of a run-on ends at the first comma it reaches instead of trying every comma in turn
+GRAMMAR_RULES = [
+    GrammarRule(
+        'sentence_fragments',
+        r'[^.!?A-Z]*(?P<sentence_fragments>[A-Z][^.!?]*)(?=[.!?])',
+        sentence=True,
+    ),
+    GrammarRule(
+        'run_on_sentences',
+        r'(?P<run_on_sentences>(?:[^.!?][^.!?,]*,){3}[^.!?]+[.!?])',
+        sentence=True,
+    ),
+    GrammarRule(
+        'passive_voice',
+        r'\b(?P<passive_voice>(?:am|is|are|was|were|be|being|been)\s+\w+ed)\b',
+    ),
+]
+
+class GrammarRuleEngine:
+    """Runs all grammar rules in one combined scan compiled up front
+    
+    Sentence rules become optional lookaheads behind a single sentence-start
+    anchor and span rules become alternatives after it, so one finditer pass
+    reports every rule through its named group. Python's re cannot stop a
+    match halfway, so budgets are enforced after the fact: a scan slower than
+    the rules' combined budget times each rule on its own. A rule over its
+    budget in max_strikes audits in a row is switched off and the scan
+    recompiled without it; after retry_after seconds it is switched back on
+    for one more chance, so a burst of load does not change scores for good.
+    """
+    
+    def __init__(self, rules: Iterable[GrammarRule] = GRAMMAR_RULES, max_strikes: int = 3,
+                 retry_after: float = 300.0):
+        self.rules = list(rules)
+        self.max_strikes = max_strikes
+        self.retry_after = retry_after
+        self._solo = {}
+        for rule in self.rules:
+            if rule.name not in re.compile(rule.pattern).groupindex:
+                raise ValueError(f"Grammar rule {rule.name!r} has no group named after it")
+            self._solo[rule.name] = re.compile(self._combine([rule]))
+        self._lock = threading.Lock()
+        self._strikes = {rule.name: 0 for rule in self.rules}
+        self._disabled_at: Dict[str, float] = {}
+        self.disabled: List[str] = []
+        self.stats = {'scans': 0, 'audits': 0, 'retries': 0}
+        self._compile()
+    
+    @staticmethod
+    def _combine(rules: List[GrammarRule]) -> str:
+        """Build the combined pattern for a set of rules"""
+        sentence = ''.join(f'(?:(?={rule.pattern}))?' for rule in rules if rule.sentence)
+        alternatives = [rule.pattern for rule in rules if not rule.sentence]
+        if sentence:
+            alternatives.insert(0, SENTENCE_START + sentence)
+        return '|'.join(alternatives)
+    
+    def _compile(self):
+        """Compile the combined scan over the rules still enabled. Caller holds the lock."""
+        active = [rule for rule in self.rules if rule.name not in self.disabled]
+        pattern = re.compile(self._combine(active)) if active else None
+        # Swapped in as one tuple so a concurrent scan never pairs a pattern with another's group names
+        self._compiled = (pattern, [rule.name for rule in active], sum(rule.budget for rule in active))
+    
+    def scan(self, text: str) -> List[Dict]:
+        """Find every issue in the text, in order of position"""
+        pattern, names, budget = self._compiled
+        issues = []
+        start = time.perf_counter()
+        if pattern is not None:
+            for match in pattern.finditer(text):
+                for name in names:
+                    begin, end = match.span(name)
+                    if begin >= 0:
+                        issues.append({'type': name, 'text': text[begin:end], 'position': (begin, end)})
+        elapsed = time.perf_counter() - start
+        
+        with self._lock:
+            self.stats['scans'] += 1
+            now = time.monotonic()
+            if any(now - disabled_at >= self.retry_after for disabled_at in self._disabled_at.values()):
+                self._retry(now)
+        if pattern is not None and elapsed > budget * max(len(text), 1000) / 1000:
+            self._audit(text)
+        return issues
+    
+    def _retry(self, now: float):
+        """Switch rules back on once they have been off for retry_after. Caller holds the lock."""
+        for name, disabled_at in list(self._disabled_at.items()):
+            if now - disabled_at < self.retry_after:
+                continue
+            logger.info(f"Re-enabling grammar rule {name} on probation")
+            del self._disabled_at[name]
+            self.disabled.remove(name)
+            # One more overrun switches it straight back off
+            self._strikes[name] = self.max_strikes - 1
+            self.stats['retries'] += 1
+        self._compile()
+    
+    def _audit(self, text: str):
+        """Time each enabled rule alone and switch off the ones over budget too often"""
+        allowed = max(len(text), 1000) / 1000
+        with self._lock:
+            self.stats['audits'] += 1
+            changed = False
+            for rule in self.rules:
+                if rule.name in self.disabled:
+                    continue
+                start = time.perf_counter()
+                for _ in self._solo[rule.name].finditer(text):
+                    pass
+                elapsed = time.perf_counter() - start
+                if elapsed <= rule.budget * allowed:
+                    self._strikes[rule.name] = 0
+                    continue
+                self._strikes[rule.name] += 1
+                if self._strikes[rule.name] >= self.max_strikes:
+                    logger.warning(f"Disabling grammar rule {rule.name}: {elapsed * 1000:.1f} ms "
+                                   f"on {len(text)} characters is over its budget")
+                    self.disabled.append(rule.name)
+                    self._disabled_at[rule.name] = time.monotonic()
+                    changed = True
+            if changed:
+                self._compile()
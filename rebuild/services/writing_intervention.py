@@ -1,39 +1,44 @@
+import logging
 import re
-from typing import List, Dict, Tuple, Optional
+import threading
+from bisect import bisect_right
+from collections import Counter, OrderedDict
+from typing import Callable, List, Dict, Hashable, NamedTuple, Tuple, Optional
 from datetime import datetime
 import random
+from services.grammar_rules import GrammarRuleEngine
 from models.writing_intervention import (
     WritingProfile, WritingSession, WritingAnalysis,
     WritingStrength, Achievement, WritingPrompt,
     LearningCompanionInteraction, StoryAnimation
 )
 
+logger = logging.getLogger(__name__)
+
 class WritingAnalysisService:
     def __init__(self):
-        self.grammar_patterns = {
-            'sentence_fragments': r'[A-Z][^.!?]*(?=[.!?])',
-            'run_on_sentences': r'[^.!?]+(?:[,.][^.!?]+){3,}[.!?]',
-            'passive_voice': r'\b(?:am|is|are|was|were|be|being|been)\s+\w+ed\b',
-        }
+        self.grammar_rules = GrammarRuleEngine()
+        
+        self.transition_words = ['however', 'therefore', 'furthermore', 'moreover']
         
     def analyze_text(self, content: str) -> WritingAnalysis:
         """Perform comprehensive analysis of writing content"""
-        word_count = len(content.split())
-        sentences = self._split_into_sentences(content)
-        
-        # Analyze different aspects
-        grammar_score, grammar_issues = self._analyze_grammar(content)
-        vocab_score, vocab_analysis = self._analyze_vocabulary(content)
-        structure_score = self._analyze_structure(sentences)
-        org_score = self._analyze_organization(sentences)
-        
+        return IncrementalWritingAnalyzer(self).update(content)
+    
+    def incremental_analyzer(self) -> 'IncrementalWritingAnalyzer':
+        """Create an analyzer for one draft that is re-analyzed as it is edited"""
+        return IncrementalWritingAnalyzer(self)
+    
+    def _build_analysis(self, grammar_score: float, vocab_score: float, structure_score: float,
+                        org_score: float, grammar_issue_count: int, vocab_analysis: Dict) -> WritingAnalysis:
+        """Assemble the analysis from the aspect scores"""
         return WritingAnalysis(
             session_id=0,  # This would be set by the caller
             grammar_score=grammar_score,
             vocabulary_score=vocab_score,
             structure_score=structure_score,
             organization_score=org_score,
-            suggestions=self._generate_suggestions(grammar_issues, vocab_analysis),
+            suggestions=self._generate_suggestions(grammar_issue_count, vocab_analysis),
             strengths_identified=self._identify_strengths(
                 grammar_score, vocab_score, structure_score, org_score
             ),
@@ -43,78 +48,20 @@ class WritingAnalysisService:
             timestamp=datetime.now()
         )
     
-    def _split_into_sentences(self, text: str) -> List[str]:
-        """Split text into sentences"""
-        return re.split(r'[.!?]+', text)
-    
     def _analyze_grammar(self, text: str) -> Tuple[float, List[Dict]]:
         """Analyze grammar patterns and issues"""
-        issues = []
         score = 80.0  # Base score
-        
-        for pattern_name, pattern in self.grammar_patterns.items():
-            matches = re.finditer(pattern, text)
-            for match in matches:
-                issues.append({
-                    'type': pattern_name,
-                    'text': match.group(),
-                    'position': match.span()
-                })
-                score -= 2  # Deduct points for each issue
+        issues = self.grammar_rules.scan(text)
+        score -= 2 * len(issues)  # Deduct points for each issue
         
         return max(0.0, min(100.0, score)), issues
     
-    def _analyze_vocabulary(self, text: str) -> Tuple[float, Dict]:
-        """Analyze vocabulary usage and diversity"""
-        words = text.lower().split()
-        unique_words = len(set(words))
-        total_words = len(words)
-        
-        diversity_score = (unique_words / total_words * 100) if total_words > 0 else 0
-        
-        return diversity_score, {
-            'unique_words': unique_words,
-            'total_words': total_words,
-            'diversity_ratio': diversity_score
-        }
-    
-    def _analyze_structure(self, sentences: List[str]) -> float:
-        """Analyze sentence structure variety"""
-        lengths = [len(s.split()) for s in sentences if s.strip()]
-        if not lengths:
-            return 0.0
-        
-        avg_length = sum(lengths) / len(lengths)
-        variety_score = len(set(lengths)) / len(lengths) * 100
-        
-        return min(100.0, (variety_score + (avg_length / 20 * 100)) / 2)
-    
-    def _analyze_organization(self, sentences: List[str]) -> float:
-        """Analyze text organization"""
-        if not sentences:
-            return 0.0
-        
-        # Simple organization analysis based on paragraph breaks and transitions
-        score = 80.0  # Base score
-        
-        # Check for clear beginning and ending
-        if len(sentences) >= 3:
-            score += 10.0
-        
-        # Check for transition words
-        transition_words = ['however', 'therefore', 'furthermore', 'moreover']
-        for word in transition_words:
-            if any(word in s.lower() for s in sentences):
-                score += 2.5
-        
-        return min(100.0, score)
-    
-    def _generate_suggestions(self, grammar_issues: List[Dict], vocab_analysis: Dict) -> List[Dict[str, str]]:
+    def _generate_suggestions(self, grammar_issue_count: int, vocab_analysis: Dict) -> List[Dict[str, str]]:
         """Generate improvement suggestions based on analysis"""
         suggestions = []
         
         # Grammar suggestions
-        if grammar_issues:
+        if grammar_issue_count:
             suggestions.append({
                 'type': 'grammar',
                 'text': 'Review your sentence structure for potential improvements'
@@ -155,6 +102,195 @@ class WritingAnalysisService:
             improvements.append('Content organization')
         return improvements
 
+class _SentenceResult:
+    """Analysis of one sentence, reused for as long as the sentence is unchanged"""
+    __slots__ = ('length', 'grammar_issues', 'transitions', 'terminated')
+    
+    def __init__(self, service: WritingAnalysisService, sentence: str):
+        body = sentence.rstrip('.!?')
+        self.length = len(body.split()) if body.strip() else None
+        self.grammar_issues = service._analyze_grammar(sentence)[1]
+        lowered = body.lower()
+        self.transitions = [word for word in service.transition_words if word in lowered]
+        self.terminated = len(body) < len(sentence)
+
+class IncrementalWritingAnalyzer:
+    """Re-analyzes a draft as it is edited, touching only the sentences that changed
+    
+    The draft is cut into sentences, each running up to and including its
+    closing punctuation. Every sentence is analyzed on its own and the result is
+    kept under the sentence text, while the draft-wide scores come from running
+    totals (word counter, sentence-length counter, grammar issues, transition
+    words) that are adjusted only for the sentences removed and added by an edit.
+    
+    Punctuation inside a word such as "3.50" or "e.g." also ends a sentence, so
+    words are counted per segment instead: a run of sentences with no whitespace
+    between them. Every word then lies within one segment and the counts match
+    splitting the whole draft on whitespace.
+    """
+    
+    _SENTENCE_PATTERN = re.compile(r'[^.!?]*[.!?]+|[^.!?]+')
+    
+    def __init__(self, service: WritingAnalysisService):
+        self.service = service
+        self._sentences: List[str] = []
+        self._segments: List[str] = []
+        self._results: Dict[str, _SentenceResult] = {}
+        self._lock = threading.Lock()
+        
+        self._words = Counter()
+        self._total_words = 0
+        self._lengths = Counter()
+        self._length_sum = 0
+        self._length_count = 0
+        self._grammar_issues = 0
+        self._transitions = Counter()
+        self._terminated = 0
+        self.stats = {'updates': 0, 'sentences_analyzed': 0, 'sentences_reused': 0}
+    
+    def update(self, content: str) -> WritingAnalysis:
+        """Analyze the latest version of the draft"""
+        sentences = self._SENTENCE_PATTERN.findall(content)
+        segments = self._join_segments(sentences)
+        
+        with self._lock:
+            old = self._sentences
+            start, end = self._changed(old, sentences)
+            for sentence in old[start:len(old) - end]:
+                self._apply(self._results[sentence], -1)
+            for sentence in sentences[start:len(sentences) - end]:
+                self._apply(self._result(sentence), 1)
+            
+            old = self._segments
+            start, end = self._changed(old, segments)
+            for segment in old[start:len(old) - end]:
+                self._count_words(segment, -1)
+            for segment in segments[start:len(segments) - end]:
+                self._count_words(segment, 1)
+            
+            self._sentences = sentences
+            self._segments = segments
+            self.stats['updates'] += 1
+            
+            # Keep results only for sentences still in the draft
+            if len(self._results) > 2 * len(sentences) + 64:
+                current = set(sentences)
+                self._results = {sentence: result for sentence, result in self._results.items() if sentence in current}
+            
+            return self._analysis()
+    
+    @staticmethod
+    def _join_segments(sentences: List[str]) -> List[str]:
+        """Join the sentences that no whitespace separates"""
+        runs: List[List[str]] = []
+        for sentence in sentences:
+            if runs and not sentence[0].isspace():
+                runs[-1].append(sentence)
+            else:
+                runs.append([sentence])
+        return [''.join(run) for run in runs]
+    
+    @staticmethod
+    def _changed(old: List[str], new: List[str]) -> Tuple[int, int]:
+        """Count the unchanged pieces at the start and end; an edit touches the stretch between"""
+        start = 0
+        limit = min(len(old), len(new))
+        while start < limit and old[start] == new[start]:
+            start += 1
+        end = 0
+        while end < limit - start and old[-1 - end] == new[-1 - end]:
+            end += 1
+        return start, end
+    
+    def _result(self, sentence: str) -> _SentenceResult:
+        """Get the cached analysis of a sentence, computing it on a miss"""
+        result = self._results.get(sentence)
+        if result is None:
+            result = self._results[sentence] = _SentenceResult(self.service, sentence)
+            self.stats['sentences_analyzed'] += 1
+        else:
+            self.stats['sentences_reused'] += 1
+        return result
+    
+    def _count_words(self, segment: str, sign: int):
+        """Add a segment's words to the word counter, or take them out with sign -1"""
+        words = segment.lower().split()
+        for word in words:
+            count = self._words[word] + sign
+            if count:
+                self._words[word] = count
+            else:
+                del self._words[word]
+        self._total_words += sign * len(words)
+    
+    def _apply(self, result: _SentenceResult, sign: int):
+        """Add a sentence to the running totals, or take it out with sign -1"""
+        if result.length is not None:
+            count = self._lengths[result.length] + sign
+            if count:
+                self._lengths[result.length] = count
+            else:
+                del self._lengths[result.length]
+            self._length_sum += sign * result.length
+            self._length_count += sign
+        
+        self._grammar_issues += sign * len(result.grammar_issues)
+        for word in result.transitions:
+            self._transitions[word] += sign
+        self._terminated += sign * result.terminated
+    
+    def _analysis(self) -> WritingAnalysis:
+        """Turn the running totals into the aspect scores"""
+        grammar_score = max(0.0, min(100.0, 80.0 - 2 * self._grammar_issues))
+        
+        unique_words = len(self._words)
+        diversity_score = (unique_words / self._total_words * 100) if self._total_words > 0 else 0
+        vocab_analysis = {
+            'unique_words': unique_words,
+            'total_words': self._total_words,
+            'diversity_ratio': diversity_score
+        }
+        
+        if self._length_count:
+            avg_length = self._length_sum / self._length_count
+            variety_score = len(self._lengths) / self._length_count * 100
+            structure_score = min(100.0, (variety_score + (avg_length / 20 * 100)) / 2)
+        else:
+            structure_score = 0.0
+        
+        # Organization: a clear beginning and ending (the text splits into three or more pieces) and transitions
+        org_score = 80.0
+        if self._terminated + 1 >= 3:
+            org_score += 10.0
+        for word in self.service.transition_words:
+            if self._transitions[word] > 0:
+                org_score += 2.5
+        org_score = min(100.0, org_score)
+        
+        return self.service._build_analysis(
+            grammar_score, diversity_score, structure_score, org_score, self._grammar_issues, vocab_analysis
+        )
+
+ANALYSIS_ASPECTS = ('grammar', 'vocabulary', 'structure', 'organization')
+
+def serialize_analysis(analysis: WritingAnalysis) -> Dict:
+    """Convert an analysis to the JSON shape of /api/writing/analyze, field by field instead of a deep-copying asdict"""
+    suggestions = {aspect: [] for aspect in ANALYSIS_ASPECTS}
+    for suggestion in analysis.suggestions:
+        suggestions.setdefault(suggestion['type'], []).append(suggestion['text'])
+    
+    result = {
+        aspect: {'score': round(score, 1), 'suggestions': suggestions[aspect]}
+        for aspect, score in zip(ANALYSIS_ASPECTS, (
+            analysis.grammar_score, analysis.vocabulary_score,
+            analysis.structure_score, analysis.organization_score
+        ))
+    }
+    result['strengths'] = analysis.strengths_identified
+    result['areas_for_improvement'] = analysis.areas_for_improvement
+    result['analyzed_at'] = analysis.timestamp.isoformat()
+    return result
+
 class WritingPromptService:
     def __init__(self):
         self.prompts_by_level = self._initialize_prompts()
@@ -214,9 +350,32 @@ class WritingPromptService:
         available_prompts = self.prompts_by_level.get(level, self.prompts_by_level[1])
         return random.choice(available_prompts)
 
+class AchievementState(NamedTuple):
+    """One student's achievements, replaced as a whole and never changed in place"""
+    unlocked: int  # Bitset with one bit per achievement in catalog order
+    metrics: Dict[str, float]
+    unlocked_dates: Dict[int, datetime]
+
 class AchievementService:
-    def __init__(self):
+    # How each requirement is measured from a student's profile and latest analysis
+    METRICS: Dict[str, Callable[[WritingProfile, WritingAnalysis], float]] = {
+        'words_written': lambda profile, analysis: profile.total_words_written,
+        'avg_sentence_score': lambda profile, analysis: analysis.structure_score,
+        'organization_score': lambda profile, analysis: analysis.organization_score,
+    }
+    
+    def __init__(self, max_users: int = 10000):
+        # The catalog is shared by every student and never changes; unlocks live in per-user state
         self.achievements = self._initialize_achievements()
+        self._bits = {achievement.id: 1 << index for index, achievement in enumerate(self.achievements)}
+        self._rules = self._index_rules()
+        # Least recently updated first; beyond max_users the oldest students are forgotten,
+        # unlocks included, and start over from their next metrics
+        self.max_users = max_users
+        self._states: "OrderedDict[Hashable, AchievementState]" = OrderedDict()
+        self._empty = AchievementState(0, {}, {})
+        self._lock = threading.Lock()
+        self.stats = {'updates': 0, 'students': 0, 'evictions': 0}
     
     def _initialize_achievements(self) -> List[Achievement]:
         """Initialize available achievements"""
@@ -250,34 +409,90 @@ class AchievementService:
             )
         ]
     
+    def _index_rules(self) -> Dict[str, Tuple[List[float], List[int]]]:
+        """Index the requirements by metric as parallel lists sorted by threshold"""
+        rules = {}
+        for achievement in self.achievements:
+            for metric, threshold in achievement.requirements.items():
+                rules.setdefault(metric, []).append((threshold, achievement.id))
+        return {
+            metric: ([threshold for threshold, _ in sorted(entries)], [id for _, id in sorted(entries)])
+            for metric, entries in rules.items()
+        }
+    
     def check_achievements(self, profile: WritingProfile, analysis: WritingAnalysis) -> List[Achievement]:
         """Check for newly unlocked achievements"""
-        new_achievements = []
-        
-        for achievement in self.achievements:
-            if not achievement.unlocked:
-                if self._check_achievement_requirements(achievement, profile, analysis):
-                    achievement.unlocked = True
-                    achievement.unlocked_date = datetime.now()
-                    new_achievements.append(achievement)
-        
-        return new_achievements
+        metrics = {metric: measure(profile, analysis) for metric, measure in self.METRICS.items()}
+        return self.update_metrics(profile.user_id, metrics)
     
-    def _check_achievement_requirements(self, achievement: Achievement, profile: WritingProfile, analysis: WritingAnalysis) -> bool:
-        """Check if achievement requirements are met"""
-        if 'words_written' in achievement.requirements:
-            if profile.total_words_written >= achievement.requirements['words_written']:
-                return True
-        
-        if 'avg_sentence_score' in achievement.requirements:
-            if analysis.structure_score >= achievement.requirements['avg_sentence_score']:
-                return True
+    def update_metrics(self, user_id: Hashable, metrics: Dict[str, float]) -> List[Achievement]:
+        """Record a student's latest metrics and return the achievements they unlock
         
-        if 'organization_score' in achievement.requirements:
-            if analysis.organization_score >= achievement.requirements['organization_score']:
-                return True
+        An achievement unlocks once any of its requirements is met. Only the
+        rules of metrics whose value changed are looked at, and for each of
+        those only the requirements at or below the new value.
+        """
+        with self._lock:
+            self.stats['updates'] += 1
+            state = self._states.get(user_id, self._empty)
+            if state.metrics.items() >= metrics.items():
+                if user_id in self._states:
+                    self._states.move_to_end(user_id)
+                return []
+            unlocked = state.unlocked
+            new_ids = []
+            for metric, value in metrics.items():
+                if metric not in self._rules or state.metrics.get(metric) == value:
+                    continue
+                thresholds, ids = self._rules[metric]
+                for achievement_id in ids[:bisect_right(thresholds, value)]:
+                    bit = self._bits[achievement_id]
+                    if not unlocked & bit:
+                        unlocked |= bit
+                        new_ids.append(achievement_id)
+            
+            dates = state.unlocked_dates
+            if new_ids:
+                now = datetime.now()
+                dates = {**dates, **{achievement_id: now for achievement_id in new_ids}}
+            state = AchievementState(unlocked, {**state.metrics, **metrics}, dates)
+            self._states[user_id] = state
+            self._states.move_to_end(user_id)
+            while len(self._states) > self.max_users:
+                evicted, evicted_state = self._states.popitem(last=False)
+                self.stats['evictions'] += 1
+                logger.info(f"Forgetting achievements of student {evicted} "
+                            f"({bin(evicted_state.unlocked).count('1')} unlocked) beyond max_users={self.max_users}")
+            self.stats['students'] = len(self._states)
         
-        return False
+        return [self._view(achievement, state) for achievement in self.achievements if achievement.id in new_ids]
+    
+    def achievements_for(self, user_id: Hashable) -> List[Achievement]:
+        """Get every achievement with the student's unlocks and progress"""
+        # States are replaced rather than modified, so a snapshot read needs no lock
+        state = self._states.get(user_id, self._empty)
+        return [self._view(achievement, state) for achievement in self.achievements]
+    
+    def _view(self, achievement: Achievement, state: AchievementState) -> Achievement:
+        """Build the achievement as one student sees it"""
+        unlocked = bool(state.unlocked & self._bits[achievement.id])
+        if unlocked:
+            progress = 100
+        else:
+            progress = max(
+                (min(100, int(state.metrics.get(metric, 0) / threshold * 100))
+                 for metric, threshold in achievement.requirements.items()),
+                default=0
+            )
+        return Achievement(
+            id=achievement.id,
+            title=achievement.title,
+            description=achievement.description,
+            requirements=achievement.requirements,
+            unlocked=unlocked,
+            unlocked_date=state.unlocked_dates.get(achievement.id),
+            progress=progress
+        )
 
 class StoryAnimationService:
     def __init__(self):
@@ -1,10 +1,14 @@
 import os
 import logging
-import json
 from typing import Dict, Any, Optional, List
 import google.generativeai as genai
 from dotenv import load_dotenv
 
+from utils.llm_client import LLMClient, StubBackend
+from utils.circuit_breaker import get_breaker
+from utils.llm_parsing import ParseError, parse_llm_response
+from utils.readability_gate import readability_gate
+
 # Set up logging
 logger = logging.getLogger(__name__)
 
@@ -20,6 +24,16 @@ class GeminiService:
         """
         Initialize the Gemini API service.
         """
+        self.model = None
+        self.client = None
+        
+        # Offline stand-in for load testing without an API key
+        if os.getenv("LLM_BACKEND") == "stub":
+            self.model = StubBackend(latency=float(os.getenv("LLM_STUB_LATENCY", "0.5")))
+            self.client = LLMClient(self.model, breaker=get_breaker("gemini"))
+            logger.info("Gemini API service using stub backend")
+            return
+        
         try:
             # Get API key from environment
             self.api_key = os.getenv("GOOGLE_API_KEY")
@@ -34,6 +48,10 @@ class GeminiService:
             
             # Initialize the model
             self.model = genai.GenerativeModel('gemini-pro')
+            
+            # Wrap the model so calls have a deadline, a shared in-flight cap and
+            # fail fast while the shared breaker is open
+            self.client = LLMClient(self.model, breaker=get_breaker("gemini"))
             logger.info("Gemini API service initialized successfully")
             
         except Exception as e:
@@ -45,9 +63,9 @@ class GeminiService:
         Check if the Gemini API service is available.
         
         Returns:
-            bool: True if the service is available, False otherwise
+            bool: True if the service is available and its circuit is not open, False otherwise
         """
-        return self.model is not None
+        return self.client is not None and self.client.available()
     
     def generate_reading_passage(self, interests: List[str], reading_level: str) -> Dict[str, Any]:
         """
@@ -64,6 +82,27 @@ class GeminiService:
             logger.warning("Gemini API not available for generating reading passage")
             return {"title": "Sample Passage", "text": "This is a sample passage. The Gemini API is not available."}
         
+        # Drafts outside the level's grade band are regenerated within the gate's budget
+        passage_data = readability_gate.generate(
+            reading_level, lambda hint: self._request_reading_passage(interests, reading_level, hint)
+        )
+        if passage_data is None:
+            return {"title": "Error", "text": "An error occurred while generating the passage."}
+        return passage_data
+    
+    def _request_reading_passage(self, interests: List[str], reading_level: str,
+                                 hint: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Ask the model for one reading passage.
+        
+        Args:
+            interests (List[str]): User interests
+            reading_level (str): Reading level
+            hint (str, optional): Feedback on a rejected draft to add to the prompt
+            
+        Returns:
+            Dict: Generated passage with title and text, or None on error
+        """
         try:
             # Format interests as a comma-separated string
             interest_text = ", ".join(interests[:3])  # Use up to 3 interests
@@ -100,46 +139,20 @@ class GeminiService:
             
             Make the passage interesting, informative, and appropriate for a school-age reader.
             """
+            if hint:
+                prompt += f"\n            {hint}\n"
             
             # Generate response
-            response = self.model.generate_content(prompt)
+            response_text = self.client.generate(prompt)
             
-            # Try to extract JSON from the response
-            try:
-                response_text = response.text
-                if "```json" in response_text:
-                    # Extract JSON from markdown code block
-                    json_str = response_text.split("```json")[1].split("```")[0].strip()
-                elif "```" in response_text:
-                    # Extract JSON from generic code block
-                    json_str = response_text.split("```")[1].strip()
-                else:
-                    # Assume the whole response is JSON
-                    json_str = response_text
-                
-                passage_data = json.loads(json_str)
-                logger.info(f"Successfully generated passage about {interest_text}")
-                return passage_data
-                
-            except Exception as e:
-                # If JSON parsing fails, create a structured passage from the text
-                logger.error(f"Error parsing JSON from model response: {e}")
-                fallback_text = response.text.replace("```json", "").replace("```", "")
-                
-                if "Title:" in fallback_text and "Text:" in fallback_text:
-                    title = fallback_text.split("Title:")[1].split("Text:")[0].strip()
-                    text = fallback_text.split("Text:")[1].strip()
-                else:
-                    # If we can't parse it properly, make a best guess
-                    parts = fallback_text.split("\n\n", 1)
-                    title = parts[0].strip() if len(parts) > 1 else "Interesting Facts"
-                    text = parts[1] if len(parts) > 1 else fallback_text
-                
-                return {"title": title, "text": text}
+            # Parse the response, reading plain "Title:/Text:" output if the model skipped the JSON
+            passage_data = parse_llm_response(response_text, "passage", allow_plain_text=True)
+            logger.info(f"Successfully generated passage about {interest_text}")
+            return passage_data
         
         except Exception as e:
             logger.error(f"Error generating passage with Gemini API: {e}")
-            return {"title": "Error", "text": "An error occurred while generating the passage."}
+            return None
     
     def generate_writing_exercise(self, exercise_type: str, difficulty: str, interest: Optional[str] = None) -> Dict[str, Any]:
         """
@@ -171,26 +184,15 @@ class GeminiService:
                 prompt = self._create_sentence_structure_prompt(difficulty, interest)
             
             # Generate response
-            response = self.model.generate_content(prompt)
+            response_text = self.client.generate(prompt)
             
-            # Try to extract JSON from the response
+            # Parse and validate the response against the exercise type
             try:
-                response_text = response.text
-                if "```json" in response_text:
-                    # Extract JSON from markdown code block
-                    json_str = response_text.split("```json")[1].split("```")[0].strip()
-                elif "```" in response_text:
-                    # Extract JSON from generic code block
-                    json_str = response_text.split("```")[1].strip()
-                else:
-                    # Assume the whole response is JSON
-                    json_str = response_text
-                
-                exercise_data = json.loads(json_str)
+                exercise_data = parse_llm_response(response_text, exercise_type)
                 logger.info(f"Successfully generated {exercise_type} exercise using Gemini")
                 return exercise_data
                 
-            except Exception as e:
+            except ParseError as e:
                 logger.error(f"Error parsing JSON from model response: {e}")
                 return {
                     "instruction": "Listen to the word and type it correctly.",
@@ -0,0 +1,243 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+
+# The Flask app imports its services as top-level packages and keeps its data
+# in files, so point every store at a scratch directory before importing it
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "rebuild"))
+_data_dir = tempfile.TemporaryDirectory()
+os.environ.update({
+    "SESSION_BACKEND": "memory",
+    "DRAFT_STORE_PATH": os.path.join(_data_dir.name, "drafts.log"),
+    "PASSAGE_CACHE_DIR": os.path.join(_data_dir.name, "passages"),
+    "LLM_BACKEND": "stub",
+    "LLM_STUB_LATENCY": "0",
+})
+
+from app import app
+
+
+def read_events(response):
+    """Split a Server-Sent Events response into (event, data) pairs."""
+    events = []
+    for block in response.get_data(as_text=True).strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+class TestDraftRoutes(unittest.TestCase):
+    """Test cases for saving writing drafts."""
+
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_save_and_autosave(self):
+        """Test that a full save and a delta save build on each other."""
+        saved = self.client.post("/api/writing/save-draft", json={"content": "The cat sat."}).get_json()
+        response = self.client.post("/api/writing/save-draft", json={
+            "draft_id": saved["id"], "base_version": 1, "edits": [[4, 7, "dog"]]
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["version"], 2)
+
+        stale = self.client.post("/api/writing/save-draft", json={
+            "draft_id": saved["id"], "base_version": 1, "edits": [[0, 3, "A"]]
+        })
+        self.assertEqual(stale.status_code, 409)
+        self.assertEqual(stale.get_json()["version"], 2)
+
+    def test_body_must_be_object(self):
+        """Test that a JSON array or scalar body is answered with 400."""
+        for body in ([1], "text", 3):
+            self.assertEqual(self.client.post("/api/writing/save-draft", json=body).status_code, 400)
+
+    def test_unknown_draft_id(self):
+        """Test that saving over a draft the student does not own is answered with 404."""
+        saved = self.client.post("/api/writing/save-draft", json={"content": "Mine"}).get_json()
+        other = app.test_client()
+
+        for client, draft_id in ((self.client, 10 ** 6), (other, saved["id"])):
+            response = client.post("/api/writing/save-draft", json={"content": "x", "draft_id": draft_id})
+            self.assertEqual(response.status_code, 404)
+        self.assertEqual(other.get("/api/writing/drafts").get_json(), [])
+
+
+class TestInterestRoutes(unittest.TestCase):
+    """Test cases for saving a student's interests."""
+
+    def test_save_interests_validated(self):
+        """Test that only a list of short non-empty strings is saved, so later lessons can't fail on it."""
+        client = app.test_client()
+        self.assertEqual(client.post("/save_interests", json={"interests": ["Space", "Music"]}).status_code, 200)
+        for interests in ([1], [None], [""], ["x" * 65], "Space", ["Space"] * 29):
+            response = client.post("/save_interests", json={"interests": interests})
+            self.assertEqual(response.status_code, 400, interests)
+        self.assertEqual(client.post("/save_interests", json=[1]).status_code, 400)
+
+        self.assertEqual(client.get("/get_passage?level=easy").status_code, 200)
+
+
+class TestPassageStreamRoute(unittest.TestCase):
+    """Test cases for streaming a reading passage as Server-Sent Events."""
+
+    def client_with_interests(self, interests):
+        """A client whose session already holds interests, without priming the pool."""
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session["interests"] = interests
+        return client
+
+    def test_live_stream(self):
+        """Test that a fresh passage arrives as a title, text chunks and done."""
+        response = self.client_with_interests(["Volcanoes"]).get("/get_passage/stream?level=hard")
+        self.assertEqual(response.mimetype, "text/event-stream")
+        events = read_events(response)
+
+        self.assertEqual(events[0][0], "title")
+        self.assertTrue(events[0][1]["title"].startswith("Stub Passage"))
+        self.assertEqual(events[-1], ("done", {}))
+        chunks = [data["text"] for event, data in events[1:-1]]
+        self.assertEqual({event for event, _ in events[1:-1]}, {"chunk"})
+        self.assertTrue("".join(chunks).startswith("The team gathered early in the morning."))
+
+    def test_ready_passage_sent_whole(self):
+        """Test that once a passage is generated, the next request gets it in one event."""
+        client = self.client_with_interests(["Glaciers"])
+        self.assertEqual(read_events(client.get("/get_passage/stream?level=medium"))[0][0], "title")
+
+        events = read_events(client.get("/get_passage/stream?level=medium"))
+        self.assertEqual([event for event, _ in events], ["passage", "done"])
+        self.assertTrue(events[0][1]["passage"])
+
+    def test_sample_without_interests(self):
+        """Test that a student with no interests gets a sample passage for the level."""
+        events = read_events(app.test_client().get("/get_passage/stream?level=easy"))
+        self.assertEqual([event for event, _ in events], ["passage", "done"])
+        self.assertIn(events[0][1]["title"], ["The Lost Ball", "My Dog Friend"])
+
+
+class TestPreparePassagesRoute(unittest.TestCase):
+    """Test cases for generating a stock of passages ahead of time."""
+
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_prepare(self):
+        """Test that each level and interest is asked for once, count times, skipping unknown levels."""
+        # The stub's canned passage only passes the readability gate at medium
+        response = self.client.post("/api/passages/prepare", json={
+            "levels": ["medium", "nope", "medium"], "interests": ["Space", "Music", "Space"], "count": 2
+        })
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual((body["requested"], body["generated"]), (4, 4))
+        self.assertEqual(sorted((p["level"], p["interest"]) for p in body["passages"]),
+                         [("medium", "Music")] * 2 + [("medium", "Space")] * 2)
+
+    def test_bad_requests(self):
+        """Test that malformed fields and too many interests are answered with 400."""
+        bodies = [
+            [1],
+            {"levels": "medium", "interests": ["Space"]},
+            {"levels": [3], "interests": ["Space"]},
+            {"interests": "Space"},
+            {"interests": ["Space", " "]},
+            {"interests": ["Space", None]},
+            {"interests": [f"Topic {i}" for i in range(11)]},
+            {"interests": ["Space"], "count": 0},
+            {"interests": ["Space"], "count": True},
+            {"interests": ["Space"], "count": "2"},
+        ]
+        for body in bodies:
+            self.assertEqual(self.client.post("/api/passages/prepare", json=body).status_code, 400, body)
+
+
+class TestNextSpellingRoute(unittest.TestCase):
+    """Test cases for drawing spelling words and phrases."""
+
+    def test_no_repeats_until_exhausted(self):
+        """Test that a session sees every word of a level once before any repeats."""
+        client = app.test_client()
+        first = client.get("/api/spelling/next?level=beginner").get_json()
+        words = [first["target_word"]]
+        for _ in range(first["remaining"]):
+            exercise = client.get("/api/spelling/next?level=beginner").get_json()
+            self.assertEqual(exercise["level"], "beginner")
+            words.append(exercise["target_word"])
+        self.assertEqual(len(set(words)), len(words))
+
+        # Another student draws from a deck of their own
+        self.assertEqual(app.test_client().get("/api/spelling/next?level=beginner").get_json()["remaining"],
+                         first["remaining"])
+
+    def test_category_challenge_and_phrase(self):
+        """Test that category, challenge and phrase requests draw from the matching pool."""
+        client = app.test_client()
+        exercise = client.get("/api/spelling/next?level=beginner&category=animals").get_json()
+        self.assertEqual((exercise["level"], exercise["category"]), ("beginner", "animals"))
+
+        exercise = client.get("/api/spelling/next?challenge=homophones").get_json()
+        self.assertEqual(exercise["category"], "homophones")
+
+        exercise = client.get("/api/spelling/next?type=phrase&level=beginner").get_json()
+        self.assertEqual(exercise["level"], "beginner")
+        self.assertIn("target_text", exercise)
+        self.assertNotIn("target_word", exercise)
+
+
+class TestSpellingBatchRoute(unittest.TestCase):
+    """Test cases for checking a list of spelling answers in one request."""
+
+    def setUp(self):
+        self.client = app.test_client()
+
+    def test_mixed_batch(self):
+        """Test that each answer is checked on its own and the streak moves once."""
+        response = self.client.post("/check_spelling/batch", json=[
+            {"answer": "Necessary", "target_text": "necessary"},
+            {"answer": "neccesary", "target_text": "necessary"},
+            {"answer": "the quick fox", "target_text": "the quick fox", "exercise_type": "phrase"},
+        ])
+        self.assertEqual(response.status_code, 200)
+        body = response.get_json()
+        self.assertEqual([result["is_correct"] for result in body["results"]], [True, False, True])
+        self.assertEqual((body["correct"], body["total"]), (2, 3))
+        self.assertEqual(body["results"][0]["feedback"], "")
+        self.assertTrue(body["results"][1]["feedback"])
+
+        # The same list wrapped in an object is accepted too
+        wrapped = self.client.post("/check_spelling/batch", json={"items": [{"answer": "a", "target_text": "a"}]})
+        self.assertEqual(wrapped.get_json()["correct"], 1)
+
+    def test_item_limit(self):
+        """Test that a batch may hold 100 items but not more."""
+        item = {"answer": "cat", "target_text": "cat"}
+        self.assertEqual(self.client.post("/check_spelling/batch", json=[item] * 100).status_code, 200)
+        self.assertEqual(self.client.post("/check_spelling/batch", json=[item] * 101).status_code, 400)
+
+    def test_bad_body(self):
+        """Test that anything but a list of answer objects is answered with 400."""
+        for body in ({"answer": "cat"}, "cat", 3, [1], [{"answer": 5, "target_text": "five"}]):
+            self.assertEqual(self.client.post("/check_spelling/batch", json=body).status_code, 400, body)
+
+
+class TestWritingRoutes(unittest.TestCase):
+    """Test cases for writing analysis and achievements."""
+
+    def test_words_written_progress(self):
+        """Test that analyzing counts the student's saved words toward Word Wizard."""
+        client = app.test_client()
+        client.post("/api/writing/save-draft", json={"content": "word " * 250})
+        response = client.post("/api/writing/analyze", json={"content": "A short note. It is done."})
+        self.assertEqual(response.status_code, 200)
+
+        achievements = {a["title"]: a for a in client.get("/api/writing/achievements").get_json()}
+        self.assertEqual(achievements["Word Wizard"]["progress"], 25)
+        self.assertFalse(achievements["Word Wizard"]["unlocked"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import sys
+import os
+import tempfile
+import time
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.cache import TTLCache, make_cache_key
+
+
+class TestCache(unittest.TestCase):
+    """Test cases for the passage cache."""
+    
+    def test_make_cache_key(self):
+        """Test that keys ignore interest order and case."""
+        key = make_cache_key("medium", ["Space", "Animals"], "v1")
+        self.assertEqual(key, make_cache_key("Medium", ["animals", " space "], "v1"))
+        self.assertNotEqual(key, make_cache_key("hard", ["Space", "Animals"], "v1"))
+        self.assertNotEqual(key, make_cache_key("medium", ["Space", "Animals"], "v2"))
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = TTLCache(maxsize=2, ttl=None)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+    
+    def test_ttl_expiry(self):
+        """Test that expired entries are treated as misses."""
+        cache = TTLCache(maxsize=4, ttl=0.01)
+        cache.put("a", 1)
+        time.sleep(0.02)
+        
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.stats()["expired"], 1)
+    
+    def test_disk_tier(self):
+        """Test that entries survive a new cache instance."""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            TTLCache(disk_dir=cache_dir).put("a", {"title": "T", "passage": "P"})
+            cache = TTLCache(disk_dir=cache_dir)
+            
+            self.assertEqual(cache.get("a"), {"title": "T", "passage": "P"})
+            stats = cache.stats()
+            self.assertEqual(stats["disk_hits"], 1)
+            self.assertEqual(stats["hit_rate"], 1.0)
+    
+    def test_prune_disk(self):
+        """Test that the sweep deletes expired files and the oldest beyond disk_maxsize."""
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = TTLCache(ttl=100, disk_dir=cache_dir, disk_maxsize=2)
+            now = time.time()
+            for key, age in [("old", 1000), ("a", 3), ("b", 2), ("c", 1)]:
+                cache.put(key, age)
+                os.utime(os.path.join(cache_dir, f"{key}.json"), (now - age, now - age))
+            
+            self.assertEqual(cache.prune_disk(), 2)
+            self.assertEqual(sorted(os.listdir(cache_dir)), ["b.json", "c.json"])
+            self.assertEqual(cache.stats()["disk_pruned"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import sys
+import os
+import time
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+from utils.llm_client import LLMClient
+
+
+class FailingBackend:
+    """Backend whose calls always raise."""
+    
+    def __init__(self):
+        self.calls = 0
+    
+    def generate_content(self, prompt):
+        self.calls += 1
+        raise RuntimeError("upstream down")
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test cases for the circuit breaker."""
+    
+    def test_opens_on_error_rate(self):
+        """Test that the breaker opens once the error rate crosses the threshold."""
+        breaker = CircuitBreaker("test", min_calls=4, error_threshold=0.5)
+        for ok in (True, False, True, False):
+            self.assertTrue(breaker.allow_request())
+            if ok:
+                breaker.record_success(0.1)
+            else:
+                breaker.record_failure(0.1)
+        
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow_request())
+        self.assertEqual(breaker.snapshot()["rejected"], 1)
+    
+    def test_opens_on_slow_tail(self):
+        """Test that a slow latency percentile opens the breaker."""
+        breaker = CircuitBreaker("test", min_calls=5, latency_threshold=1.0, latency_percentile=0.8)
+        for latency in (0.1, 0.1, 0.1, 2.0, 2.0):
+            breaker.record_success(latency)
+        
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+    
+    def test_half_open_probe(self):
+        """Test that a successful probe after the cooldown closes the breaker."""
+        breaker = CircuitBreaker("test", min_calls=1, cooldown=0.01)
+        breaker.record_failure(0.1)
+        time.sleep(0.02)
+        
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertTrue(breaker.allow_request())
+        self.assertFalse(breaker.allow_request())
+        breaker.record_success(0.1)
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+    
+    def test_failed_probe_reopens(self):
+        """Test that a failed probe opens the breaker again."""
+        breaker = CircuitBreaker("test", min_calls=1, cooldown=0.01)
+        breaker.record_failure(0.1)
+        time.sleep(0.02)
+        
+        self.assertTrue(breaker.allow_request())
+        breaker.record_failure(0.1)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+    
+    def test_client_fails_fast_when_open(self):
+        """Test that the LLM client stops calling upstream once the breaker opens."""
+        backend = FailingBackend()
+        client = LLMClient(backend, timeout=1, breaker=CircuitBreaker("test", min_calls=2))
+        for _ in range(2):
+            with self.assertRaises(RuntimeError):
+                client.generate("prompt")
+        
+        self.assertFalse(client.available())
+        with self.assertRaises(CircuitOpenError):
+            client.generate("prompt")
+        self.assertEqual(backend.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -8,7 +8,10 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils.data_processing import (
     clean_text,
     extract_difficult_words,
+    iter_words,
+    scan_text,
     calculate_reading_stats,
+    calculate_reading_stats_batch,
     format_word_for_display
 )
 
@@ -46,15 +49,35 @@ class TestDataProcessing(unittest.TestCase):
         self.assertNotIn("is", difficult_words)
         self.assertNotIn("a", difficult_words)
     
+    def test_extract_difficult_words_streaming(self):
+        """Test extracting difficult words from chunks and with other scorers."""
+        text = "The hippopotamus is a large, mostly herbivorous, semiaquatic mammal. The hippopotamus swims."
+        chunks = [text[i:i + 7] for i in range(0, len(text), 7)]
+        
+        self.assertEqual(list(iter_words(chunks)), list(iter_words(text)))
+        self.assertEqual(extract_difficult_words(chunks), extract_difficult_words(text))
+        self.assertEqual(extract_difficult_words(text), ["hippopotamus", "herbivorous", "semiaquatic"])
+        
+        # Syllables and frequency rank
+        self.assertEqual(extract_difficult_words("a cat and an elephant", scorer="syllables"), ["elephant"])
+        self.assertEqual(extract_difficult_words("the water and the hippopotamus", scorer="frequency"), ["hippopotamus"])
+        
+        # Custom scorer
+        self.assertEqual(extract_difficult_words("zoo apple zebra", scorer=lambda word: word.count("z"), threshold=1),
+                         ["zoo", "zebra"])
+        with self.assertRaises(ValueError):
+            extract_difficult_words(text, scorer="unknown")
+    
     def test_calculate_reading_stats(self):
         """Test the calculate_reading_stats function."""
         text = "The cat sat on the mat. It was very comfortable."
         
         stats = calculate_reading_stats(text)
         
-        self.assertEqual(stats["word_count"], 9)
+        # "The cat sat on the mat" + "It was very comfortable"
+        self.assertEqual(stats["word_count"], 10)
         self.assertEqual(stats["sentence_count"], 2)
-        self.assertEqual(stats["avg_words_per_sentence"], 4.5)
+        self.assertEqual(stats["avg_words_per_sentence"], 5.0)
         
         # Check that all expected keys are present
         expected_keys = [
@@ -65,6 +88,37 @@ class TestDataProcessing(unittest.TestCase):
         for key in expected_keys:
             self.assertIn(key, stats)
     
+    def test_scan_text(self):
+        """Test the single-pass tokenizer behind calculate_reading_stats."""
+        scanned = scan_text("The cake is here... Really?! , Yes")
+        
+        self.assertEqual(scanned.words, ["The", "cake", "is", "here", "Really", "Yes"])
+        self.assertEqual(scanned.syllables, [1, 1, 1, 1, 2, 1])
+        self.assertEqual(scanned.sentence_ids, [0, 0, 0, 0, 1, 2])
+        self.assertEqual(scanned.sentence_count, 3)
+        
+        # A piece between terminators with only punctuation still counts, as before
+        self.assertEqual(scan_text("Hi. , . ").sentence_count, 2)
+        self.assertEqual(scan_text("").sentence_count, 0)
+    
+    def test_calculate_reading_stats_batch(self):
+        """Test that batch statistics match the per-text ones."""
+        texts = [
+            "The cat sat on the mat. It was very comfortable.",
+            "The relationship between climate change and global economic systems reveals complex interdependencies.",
+            "Hi. , . ",
+            "",
+        ]
+        
+        stats = calculate_reading_stats_batch(texts)
+        
+        self.assertEqual(len(stats), len(texts))
+        for text, record in zip(texts, stats):
+            self.assertEqual({name: record[name].item() for name in stats.dtype.names}, calculate_reading_stats(text))
+        # 39 words in 20 sentences is 1.95, which round() stores as 1.9
+        self.assertEqual(calculate_reading_stats_batch(["a b. " * 19 + "a."]).avg_words_per_sentence[0], 1.9)
+        self.assertEqual(len(calculate_reading_stats_batch([])), 0)
+    
     def test_format_word_for_display(self):
         """Test the format_word_for_display function."""
         # Test simple words
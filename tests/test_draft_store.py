@@ -0,0 +1,165 @@
+import unittest
+import sys
+import os
+import errno
+import tempfile
+
+# The writing services live in the Flask app, which imports them as top-level packages
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "rebuild"))
+
+from services.draft_store import DraftConflict, DraftStore
+
+
+class FailingLog:
+    """A log file whose next write stores half the data and then fails."""
+
+    def __init__(self, file):
+        self.file = file
+        self.fail = True
+
+    def write(self, data):
+        if self.fail:
+            self.fail = False
+            self.file.write(data[:len(data) // 2])
+            raise OSError(errno.ENOSPC, "No space left on device")
+        return self.file.write(data)
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+class TestDraftStore(unittest.TestCase):
+    """Test cases for the append-only draft log."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "drafts.log")
+        self.store = DraftStore(self.path)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def reopen(self):
+        self.store.close()
+        self.store = DraftStore(self.path)
+        return self.store
+
+    def test_replay(self):
+        """Test that puts and deltas survive reopening the store."""
+        draft = self.store.save("ana", "The cat sat.", title="Cats")
+        self.store.save_delta("ana", draft.id, 1, [(4, 7, "dog")])
+        self.store.save_delta("ana", draft.id, 2, [(12, 12, " It barked.")])
+        other = self.store.save("ben", "Hello")
+
+        store = self.reopen()
+        replayed = store.get("ana", draft.id)
+        self.assertEqual(replayed.content, "The dog sat. It barked.")
+        self.assertEqual(replayed.title, "Cats")
+        self.assertEqual(replayed.version, 3)
+        self.assertEqual(store.get("ben", other.id).content, "Hello")
+        # Ids keep counting from where the log left off
+        self.assertGreater(store.save("ana", "New").id, other.id)
+
+    def test_log_locked_to_one_store(self):
+        """Test that a second store on the same log fails instead of sharing it."""
+        with self.assertRaises(RuntimeError):
+            DraftStore(self.path)
+        self.store.save("ana", "Still mine")
+        self.store.compact()
+        with self.assertRaises(RuntimeError):
+            DraftStore(self.path)
+
+        store = self.reopen()
+        self.assertEqual([d.content for d in store.drafts_for("ana")], ["Still mine"])
+
+    def test_save_unknown_draft_id(self):
+        """Test that a full save over a missing or foreign draft is refused, not turned into a new draft."""
+        draft = self.store.save("ana", "Mine")
+        with self.assertRaises(KeyError):
+            self.store.save("ben", "Taken", draft_id=draft.id)
+        with self.assertRaises(KeyError):
+            self.store.save("ana", "Lost", draft_id=draft.id + 1)
+        self.assertEqual(self.store.drafts_for("ben"), [])
+        self.assertEqual(len(self.store.drafts_for("ana")), 1)
+
+    def test_torn_last_line_dropped(self):
+        """Test that a record cut short by a crash is truncated on open."""
+        draft = self.store.save("ana", "First")
+        self.store.close()
+        size = os.path.getsize(self.path)
+        with open(self.path, "ab") as f:
+            f.write(b'{"op":"put","id":9,"user":"ana","tit')
+
+        store = self.reopen()
+        self.assertEqual(os.path.getsize(self.path), size)
+        self.assertEqual([d.content for d in store.drafts_for("ana")], ["First"])
+        store.save_delta("ana", draft.id, 1, [(5, 5, "!")])
+        self.assertEqual(self.reopen().get("ana", draft.id).content, "First!")
+
+    def test_delta_conflict(self):
+        """Test that a delta against a stale version or another user's draft is refused."""
+        draft = self.store.save("ana", "abc")
+        self.store.save_delta("ana", draft.id, 1, [(0, 1, "A")])
+
+        with self.assertRaises(DraftConflict) as raised:
+            self.store.save_delta("ana", draft.id, 1, [(1, 2, "B")])
+        self.assertEqual(raised.exception.current_version, 2)
+        with self.assertRaises(KeyError):
+            self.store.save_delta("ben", draft.id, 2, [(1, 2, "B")])
+        with self.assertRaises(ValueError):
+            self.store.save_delta("ana", draft.id, 2, [(2, 9, "C")])
+        self.assertEqual(self.store.get("ana", draft.id).content, "Abc")
+
+    def test_compaction(self):
+        """Test that compacting shrinks the log to one record per draft and loses nothing."""
+        draft = self.store.save("ana", "x" * 100)
+        for version in range(1, 51):
+            self.store.save_delta("ana", draft.id, version, [(0, 1, "y")])
+        self.store.save("ben", "Hello")
+        size = os.path.getsize(self.path)
+
+        self.store.compact()
+        self.assertLess(os.path.getsize(self.path), size)
+        self.assertEqual(self.store.stats()["compactions"], 1)
+        with open(self.path, "rb") as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+        self.store.save_delta("ana", draft.id, 51, [(0, 1, "z")])
+        store = self.reopen()
+        self.assertEqual(store.get("ana", draft.id).content, "z" + "x" * 99)
+        self.assertEqual(store.get("ana", draft.id).version, 52)
+        self.assertEqual(len(store.drafts_for("ben")), 1)
+
+    def test_write_failure_rolls_back(self):
+        """Test that a failed write undoes the save and the store keeps working afterwards."""
+        draft = self.store.save("ana", "Kept")
+        self.store._file = FailingLog(self.store._file)
+
+        with self.assertRaises(OSError):
+            self.store.save_delta("ana", draft.id, 1, [(4, 4, " lost")])
+        self.assertEqual(self.store.get("ana", draft.id).content, "Kept")
+        self.assertEqual(self.store.get("ana", draft.id).version, 1)
+        self.assertEqual(self.store.stats()["write_errors"], 1)
+
+        self.store.save_delta("ana", draft.id, 1, [(4, 4, " safe")])
+        new = self.store.save("ben", "Hello")
+        store = self.reopen()
+        self.assertEqual(store.get("ana", draft.id).content, "Kept safe")
+        self.assertEqual(store.get("ben", new.id).content, "Hello")
+
+    def test_failed_new_draft_forgotten(self):
+        """Test that a new draft whose write failed is not listed."""
+        self.store._file = FailingLog(self.store._file)
+
+        with self.assertRaises(OSError):
+            self.store.save("ana", "Lost")
+        self.assertEqual(self.store.drafts_for("ana"), [])
+        self.assertEqual(self.store.stats()["live_bytes"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.error_patterns import ErrorPatternIndex
+from utils.text_diff import spelling_comparison
+
+
+class TestErrorPatterns(unittest.TestCase):
+    """Test cases for the spelling error-pattern index."""
+    
+    def setUp(self):
+        self.index = ErrorPatternIndex(["committee", "receive", "until"])
+    
+    def test_word_pattern(self):
+        """Test the precomputed positions of a word."""
+        pattern = self.index.get("Committee")
+        self.assertEqual(pattern.double_positions, {2, 3, 5, 6})
+        self.assertEqual(pattern.vowel_positions, {1, 4, 7, 8})
+        self.assertEqual(self.index.get("receive").ie_ei_positions, {3, 4})
+        self.assertEqual(len(self.index), 3)
+    
+    def test_classify(self):
+        """Test classification against the diff."""
+        flags = self.index.classify("committee", spelling_comparison("committee", "comittee"))
+        self.assertTrue(flags["double_consonant"])
+        self.assertFalse(flags["vowel"])
+        
+        flags = self.index.classify("until", spelling_comparison("until", "untill"))
+        self.assertTrue(flags["double_consonant"])
+        
+        flags = self.index.classify("receive", spelling_comparison("receive", "recieve"))
+        self.assertTrue(flags["transposed"])
+        self.assertTrue(flags["ie_ei"])
+    
+    def test_unindexed_word(self):
+        """Test that unknown targets are classified without growing the index."""
+        flags = self.index.classify("planet", spelling_comparison("planet", "planit"))
+        self.assertTrue(flags["vowel"])
+        self.assertEqual(len(self.index), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
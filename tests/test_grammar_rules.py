@@ -0,0 +1,48 @@
+import unittest
+import sys
+import os
+import time
+
+# The writing services live in the Flask app, which imports them as top-level packages
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "rebuild"))
+
+from services.grammar_rules import GRAMMAR_RULES, GrammarRuleEngine
+
+
+class TestGrammarRuleEngine(unittest.TestCase):
+    """Test cases for the combined grammar rule scan."""
+
+    def test_scan(self):
+        """Test that one scan reports sentence and span rules."""
+        issues = GrammarRuleEngine().scan("We ran, we hid, we sat, we ate. The cake was baked")
+        self.assertEqual(
+            [(issue['type'], issue['text']) for issue in issues],
+            [('sentence_fragments', 'We ran, we hid, we sat, we ate'),
+             ('run_on_sentences', 'We ran, we hid, we sat, we ate.'),
+             ('passive_voice', 'was baked')]
+        )
+
+    def test_disable_after_repeated_overruns_and_retry(self):
+        """Test that a rule is switched off only after max_strikes overruns and comes back after retry_after."""
+        # A zero budget makes every scan an overrun
+        rules = [rule._replace(budget=0.0) for rule in GRAMMAR_RULES if rule.name == 'passive_voice']
+        engine = GrammarRuleEngine(rules, max_strikes=2, retry_after=0.05)
+        text = "The cake was baked."
+
+        engine.scan(text)
+        self.assertEqual(engine.disabled, [])
+        engine.scan(text)
+        self.assertEqual(engine.disabled, ['passive_voice'])
+        self.assertEqual(engine.scan(text), [])
+
+        time.sleep(0.06)
+        engine.scan(text)
+        self.assertEqual(engine.disabled, [])
+        self.assertEqual(engine.stats['retries'], 1)
+        self.assertEqual(len(engine.scan(text)), 1)
+        # Back on probation, so the overrun of that scan switched it off again
+        self.assertEqual(engine.disabled, ['passive_voice'])
+
+
+if __name__ == "__main__":
+    unittest.main()
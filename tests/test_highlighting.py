@@ -0,0 +1,48 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.highlighting import get_highlighter, highlight_words
+
+
+class TestHighlighting(unittest.TestCase):
+    """Test cases for the difficult-word highlighter."""
+    
+    def test_word_boundaries_and_case(self):
+        """Test that only whole words match, in any case."""
+        html = highlight_words("Cat scatter cat's CAT", ["cat"])
+        self.assertEqual(html.count('<span class="highlighted-word">'), 3)
+        self.assertNotIn(">scatter<", html)
+    
+    def test_escapes_html(self):
+        """Test that the passage text is escaped around the spans."""
+        html = highlight_words("<b>volcano</b> & ash", ["volcano"])
+        self.assertEqual(html, '&lt;b&gt;<span class="highlighted-word">volcano</span>&lt;/b&gt; &amp; ash')
+    
+    def test_phrases_prefer_longest(self):
+        """Test leftmost-longest matching of phrases and contractions."""
+        html = highlight_words("I want ice cream, not ice. Cream! Don't", ["ice cream", "cream", "don't"])
+        self.assertIn('<span class="highlighted-word">ice cream</span>', html)
+        self.assertIn('<span class="highlighted-word">Cream</span>', html)
+        self.assertIn('<span class="highlighted-word">Don&#x27;t</span>', html)
+        self.assertNotIn('<span class="highlighted-word">ice</span>', html)
+    
+    def test_hyphenated_and_apostrophe_words(self):
+        """Test that hyphenated words and contractions highlight as one word."""
+        html = highlight_words("The wave-particle idea: send an e-mail, it's fine.", ["wave-particle", "e-mail", "it's"])
+        self.assertIn('<span class="highlighted-word">wave-particle</span>', html)
+        self.assertIn('<span class="highlighted-word">e-mail</span>', html)
+        self.assertIn('<span class="highlighted-word">it&#x27;s</span>', html)
+        self.assertEqual(highlight_words("wave, particle", ["wave-particle"]), "wave, particle")
+    
+    def test_highlighter_cache(self):
+        """Test that the same word set reuses one automaton."""
+        self.assertIs(get_highlighter(["Ocean", "reef"]), get_highlighter(["reef", "ocean"]))
+        self.assertEqual(highlight_words("Nothing here", []), "Nothing here")
+
+
+if __name__ == "__main__":
+    unittest.main()
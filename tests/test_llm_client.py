@@ -0,0 +1,89 @@
+import unittest
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.llm_client import LLMClient, StubBackend
+
+
+class CountingBackend:
+    """Backend that records how many calls run at once."""
+    
+    def __init__(self, latency):
+        self.latency = latency
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+    
+    def generate_content(self, prompt):
+        with self.lock:
+            self.calls += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.latency)
+        with self.lock:
+            self.active -= 1
+        return type("Response", (), {"text": prompt.upper()})()
+
+
+class TestLLMClient(unittest.TestCase):
+    """Test cases for the non-blocking LLM client."""
+    
+    def test_generate_returns_text(self):
+        """Test that the stub backend answers with fenced JSON."""
+        client = LLMClient(StubBackend(latency=0, jitter=0), timeout=1)
+        text = client.generate("Create an engaging reading passage")
+        self.assertIn('"passage"', text)
+    
+    def test_deadline(self):
+        """Test that slow calls raise TimeoutError after the deadline."""
+        client = LLMClient(CountingBackend(latency=0.5), timeout=5)
+        started = time.perf_counter()
+        with self.assertRaises(TimeoutError):
+            client.generate("slow", timeout=0.05)
+        self.assertLess(time.perf_counter() - started, 0.4)
+        self.assertEqual(client.stats()["timeouts"], 1)
+    
+    def test_coalescing(self):
+        """Test that identical concurrent prompts share one upstream call."""
+        backend = CountingBackend(latency=0.1)
+        client = LLMClient(backend, timeout=2)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(client.generate, ["same"] * 8))
+        
+        self.assertEqual(results, ["SAME"] * 8)
+        self.assertEqual(backend.calls, 1)
+        self.assertEqual(client.stats()["coalesced"], 7)
+    
+    def test_stream_coalescing(self):
+        """Test that a stream joined while running shares the upstream call and replays earlier chunks."""
+        backend = StubBackend(latency=0.2, jitter=0)
+        client = LLMClient(backend, timeout=2)
+        prompt = "Write the title on the first line"
+        first = client.stream(prompt)
+        head = next(first)
+        second = client.stream(prompt)
+        
+        self.assertEqual(head + "".join(first), "".join(second))
+        self.assertEqual(client.stats()["upstream_calls"], 1)
+        self.assertEqual(client.stats()["coalesced"], 1)
+    
+    def test_concurrency_cap(self):
+        """Test that distinct prompts never exceed the in-flight cap."""
+        backend = CountingBackend(latency=0.05)
+        client = LLMClient(backend, timeout=2, max_concurrency=2)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(client.generate, [f"prompt {i}" for i in range(8)]))
+        
+        self.assertEqual(backend.calls, 8)
+        self.assertLessEqual(backend.peak, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.llm_parsing import (
+    ParseError, PassageStreamParser, decode_json, parse_json_array,
+    parse_llm_response, parse_stats
+)
+
+
+class TestLLMParsing(unittest.TestCase):
+    """Test cases for model response parsing."""
+    
+    def test_decode_json(self):
+        """Test decoding JSON wrapped in prose, tagged fences and cut-off fences."""
+        self.assertEqual(decode_json('Sure! Here it is: {"a": 1} Enjoy.'), {"a": 1})
+        self.assertEqual(decode_json('```JSON\n{"a": [1, 2]}\n```'), {"a": [1, 2]})
+        self.assertEqual(decode_json('```json\n{"a": 1}'), {"a": 1})
+        with self.assertRaises(ParseError) as ctx:
+            decode_json("No JSON here")
+        self.assertEqual(ctx.exception.reason, "no_json")
+    
+    def test_parse_llm_response_schemas(self):
+        """Test validation against the exercise schemas."""
+        grammar = '{"instruction": "Pick one", "options": ["is", "are"], "correct_answer": "is", "explanation": "x"}'
+        self.assertEqual(parse_llm_response(grammar, "grammar")["correct_answer"], "is")
+        
+        with self.assertRaises(ParseError) as ctx:
+            parse_llm_response('{"instruction": "Spell it", "hint": "h"}', "spelling")
+        self.assertEqual(ctx.exception.reason, "missing_field")
+        
+        with self.assertRaises(ParseError) as ctx:
+            parse_llm_response('{"instruction": "Order", "words": "a b", "correct_answer": "b a"}', "sentence_structure")
+        self.assertEqual(ctx.exception.reason, "bad_field")
+    
+    def test_parse_plain_text_passage(self):
+        """Test the plain-text fallback for passages and the parse counters."""
+        before = parse_stats().get("passage", {}).get("fallback", 0)
+        passage = parse_llm_response("Title: Tide Pools\nText: Crabs hide under rocks.", "passage", allow_plain_text=True)
+        
+        self.assertEqual(passage, {"title": "Tide Pools", "text": "Crabs hide under rocks."})
+        self.assertEqual(parse_stats()["passage"]["fallback"], before + 1)
+        with self.assertRaises(ParseError):
+            parse_llm_response("Title: Tide Pools\nText: Crabs hide under rocks.", "passage")
+    
+    def test_parse_json_array(self):
+        """Test parsing well-formed and wrapped arrays."""
+        self.assertEqual(parse_json_array('```json\n[{"a": 1}, {"a": 2}]\n```'), [{"a": 1}, {"a": 2}])
+        self.assertEqual(parse_json_array('{"passages": [{"a": 1}]}'), [{"a": 1}])
+    
+    def test_parse_truncated_array(self):
+        """Test that complete items survive a truncated response."""
+        text = '```json\n[{"title": "One", "passage": "A"}, {"title": "Two", "passage": "B"}, {"title": "Th'
+        self.assertEqual(parse_json_array(text), [
+            {"title": "One", "passage": "A"},
+            {"title": "Two", "passage": "B"}
+        ])
+    
+    def test_parse_without_array(self):
+        """Test that a response without any array is rejected."""
+        with self.assertRaises(ValueError):
+            parse_json_array('{"title": "One"}')
+    
+    def test_stream_parser(self):
+        """Test splitting a streamed passage into title and text deltas."""
+        parser = PassageStreamParser()
+        events = []
+        for chunk in ["**Title: The ", "Comet**\n", "\nText: A bright", " comet flew by.", "\n"]:
+            events.extend(parser.feed(chunk))
+        events.extend(parser.close())
+        
+        self.assertEqual(events[0], ("title", "The Comet"))
+        self.assertEqual("".join(value for event, value in events if event == "text").strip(), "A bright comet flew by.")
+        self.assertEqual(parser.text, "A bright comet flew by.")
+
+
+if __name__ == "__main__":
+    unittest.main()
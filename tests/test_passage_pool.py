@@ -0,0 +1,97 @@
+import unittest
+import sys
+import os
+import time
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.passage_pool import PassagePool
+
+
+def wait_for(condition, timeout=2.0):
+    """Poll until condition() is true or the timeout expires."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestPassagePool(unittest.TestCase):
+    """Test cases for the background passage pool."""
+    
+    def setUp(self):
+        self.calls = []
+        
+        def producer(level, interest):
+            self.calls.append((level, interest))
+            return {"title": f"{interest} {len(self.calls)}", "passage": level}
+        
+        self.pool = PassagePool(producer=producer, capacity=3, max_workers=1)
+    
+    def tearDown(self):
+        self.pool.shutdown()
+    
+    def test_miss_schedules_refill(self):
+        """Test that an empty queue misses and is refilled in the background."""
+        self.assertIsNone(self.pool.take("easy", ["Space"]))
+        self.assertTrue(wait_for(lambda: self.pool.stats()["queued"] == 1))
+        
+        passage = self.pool.take("EASY", ["space"])
+        self.assertEqual(passage["passage"], "easy")
+        self.assertEqual(self.calls[0], ("easy", "Space"))
+    
+    def test_refill_follows_demand(self):
+        """Test that repeated demand deepens the queue up to capacity."""
+        for _ in range(5):
+            self.pool.prime("medium", ["Music"])
+            wait_for(lambda: self.pool.stats()["refilling"] == 0)
+        
+        self.assertEqual(self.pool.stats()["queued"], 3)
+    
+    def test_non_string_interests_skipped(self):
+        """Test that numbers and nulls among the interests are ignored instead of raising."""
+        self.assertIsNone(self.pool.take("easy", [3, None, "Space", ""]))
+        self.assertTrue(wait_for(lambda: self.pool.stats()["queued"] == 1))
+        self.assertEqual(self.calls, [("easy", "Space")])
+    
+    def test_offer_respects_capacity(self):
+        """Test that offered passages are bounded by capacity."""
+        results = [self.pool.offer("hard", "Physics", {"title": str(i)}) for i in range(4)]
+        self.assertEqual(results, [True, True, True, False])
+        self.assertEqual(self.pool.take("hard", ["Physics"])["title"], "0")
+    
+    def test_idle_keys_evicted(self):
+        """Test that only max_keys interests are tracked, least recently used dropped first."""
+        pool = PassagePool(producer=lambda level, interest: None, max_workers=1, max_keys=2)
+        try:
+            pool.offer("easy", "Art", {"title": "art"})
+            pool.offer("easy", "Music", {"title": "music"})
+            pool.offer("easy", "Art", {"title": "art 2"})
+            pool.offer("easy", "Space", {"title": "space"})
+            
+            stats = pool.stats()
+            self.assertEqual((stats["keys"], stats["evicted_keys"], stats["queued"]), (2, 1, 3))
+            self.assertEqual(pool.take("easy", ["Art"])["title"], "art")
+            self.assertIsNone(pool.take("easy", ["Music"]))
+        finally:
+            pool.shutdown()
+    
+    def test_failed_production(self):
+        """Test that producer errors are counted and leave the queue empty."""
+        def failing_producer(level, interest):
+            raise RuntimeError("upstream down")
+        
+        pool = PassagePool(producer=failing_producer, max_workers=1)
+        try:
+            pool.prime("easy", ["Art"])
+            self.assertTrue(wait_for(lambda: pool.stats()["failed"] == 1))
+            self.assertIsNone(pool.take("easy", ["Art"]))
+        finally:
+            pool.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.readability_gate import ReadabilityGate
+
+SIMPLE = {"title": "Simple", "text": "The cat sat on the mat. It was a good day. We had fun."}
+COMPLEX = {
+    "title": "Complex",
+    "text": "The intricate relationship between technological innovation and societal transformation "
+            "has been extensively documented throughout contemporary historiography."
+}
+
+
+class TestReadabilityGate(unittest.TestCase):
+    """Test cases for the readability acceptance gate."""
+
+    def setUp(self):
+        self.gate = ReadabilityGate({"easy": (0.0, 5.0), "hard": (8.0, 12.0)}, max_attempts=2)
+
+    def test_accepts_in_band(self):
+        """Test that a passage inside the band is accepted on the first attempt."""
+        hints = []
+        passage = self.gate.generate("easy", lambda hint: hints.append(hint) or SIMPLE)
+
+        self.assertIs(passage, SIMPLE)
+        self.assertEqual(hints, [None])
+        self.assertEqual(self.gate.stats()["easy"]["acceptance_rate"], 1.0)
+
+    def test_regenerates_with_hint(self):
+        """Test that a rejected draft is regenerated with feedback in the prompt."""
+        drafts = iter([COMPLEX, SIMPLE])
+        hints = []
+        passage = self.gate.generate("easy", lambda hint: hints.append(hint) or next(drafts))
+
+        self.assertIs(passage, SIMPLE)
+        self.assertIsNone(hints[0])
+        self.assertIn("simpler words", hints[1])
+        self.assertEqual(self.gate.stats()["easy"]["attempts"], 2)
+
+    def test_budget_and_near_match(self):
+        """Test that the closest candidate wins once the attempt budget is spent."""
+        calls = []
+        passage = self.gate.generate("easy", lambda hint: calls.append(hint) or COMPLEX, near_matches=[SIMPLE])
+
+        self.assertIs(passage, SIMPLE)
+        self.assertEqual(len(calls), 2)
+        stats = self.gate.stats()["easy"]
+        self.assertEqual((stats["rejected"], stats["near_matches"], stats["acceptance_rate"]), (1, 1, 0.0))
+
+        # Without near matches the best rejected draft is still served
+        self.assertIs(self.gate.generate("hard", lambda hint: SIMPLE), SIMPLE)
+
+    def test_failures_and_unknown_levels(self):
+        """Test that failed calls stop early and unbanded levels are not scored."""
+        calls = []
+        self.assertIsNone(self.gate.generate("easy", lambda hint: calls.append(hint), near_matches=[SIMPLE]))
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.gate.stats()["easy"]["failed"], 1)
+
+        self.assertIs(self.gate.generate("unknown", lambda hint: COMPLEX), COMPLEX)
+        self.assertTrue(self.gate.check("unknown", COMPLEX))
+        self.assertFalse(self.gate.check("easy", COMPLEX))
+
+
+if __name__ == "__main__":
+    unittest.main()
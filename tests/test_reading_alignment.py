@@ -0,0 +1,56 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.reading_alignment import align_tokens, tokenize, words_per_minute
+from utils.reading_pipeline import ReadingPipeline
+
+
+class TestReadingAlignment(unittest.TestCase):
+    """Test cases for the read-aloud alignment engine."""
+    
+    def test_tokenize(self):
+        """Test that punctuation and case are normalized but display words kept."""
+        words, tokens = tokenize("Don’t stop, Sam!")
+        self.assertEqual(words, ["Don’t", "stop", "Sam"])
+        self.assertEqual(tokens, ["don't", "stop", "sam"])
+    
+    def test_align_tokens(self):
+        """Test each kind of edit in a short alignment."""
+        operations = align_tokens(["the", "big", "dog", "ran"], ["the", "bog", "dog", "dog"])
+        self.assertEqual([op for op, _, _ in operations], ["match", "substitute", "match", "substitute"])
+        
+        operations = align_tokens(["a", "b", "c"], ["a", "c", "c", "d"])
+        self.assertEqual(sum(op != "match" for op, _, _ in operations), 2)
+    
+    def test_narrow_band_still_aligns(self):
+        """Test that a zero band still returns a complete alignment."""
+        operations = align_tokens(list("abcdef"), list("abef"), band=0)
+        self.assertEqual([i for _, i, _ in operations if i is not None], list(range(6)))
+        self.assertEqual([j for _, _, j in operations if j is not None], list(range(4)))
+    
+    def test_alignment_scores(self):
+        """Test accuracy, error lists and reading speed."""
+        result = ReadingPipeline().run(
+            "The quick brown fox jumps over the dog.",
+            "the quack brown fox fox jumps the dog",
+            duration_seconds=4.0
+        )
+        self.assertAlmostEqual(result["accuracy"], 75.0)
+        self.assertEqual(result["substitutions"], [{"index": 1, "expected": "quick", "spoken": "quack"}])
+        self.assertEqual(result["omissions"], [{"index": 5, "expected": "over"}])
+        self.assertEqual(len(result["insertions"]), 1)
+        self.assertEqual(result["difficult_words"], ["quick", "over"])
+        self.assertAlmostEqual(result["words_per_minute"], 120.0)
+    
+    def test_words_per_minute_without_timing(self):
+        """Test that missing timing gives no reading speed."""
+        self.assertIsNone(words_per_minute(100, None))
+        self.assertIsNone(ReadingPipeline().run("one two", "one two")["words_per_minute"])
+
+
+if __name__ == "__main__":
+    unittest.main()
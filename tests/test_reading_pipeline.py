@@ -0,0 +1,58 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.reading_pipeline import ReadingPipeline
+
+
+class TestReadingPipeline(unittest.TestCase):
+    """Test cases for the staged reading analysis pipeline."""
+    
+    def test_default_pipeline(self):
+        """Test that the default stages produce scores, errors, feedback and timings."""
+        result = ReadingPipeline().run("The cat sat on the mat.", "the cat sat on the hat", duration_seconds=3.0)
+        
+        self.assertAlmostEqual(result["accuracy"], 100.0 * 5 / 6)
+        self.assertEqual(result["difficult_words"], ["mat"])
+        self.assertTrue(result["areas_for_improvement"])
+        self.assertEqual(
+            list(result["timings"]),
+            ["normalize", "align", "score", "diagnose", "feedback", "total"]
+        )
+    
+    def test_swap_and_remove_stages(self):
+        """Test replacing, adding and dropping stages."""
+        def exact_align(state):
+            state["operations"] = [
+                ("match" if ref == spoken else "substitute", i, i)
+                for i, (ref, spoken) in enumerate(zip(state["reference"], state["spoken"]))
+            ]
+        
+        def tag(state):
+            state["result"]["tagged"] = True
+        
+        pipeline = ReadingPipeline().with_stage("align", exact_align).with_stage("feedback", None)
+        pipeline = pipeline.with_stage("tag", tag, after="score")
+        result = pipeline.run("one two three", "one too three")
+        
+        self.assertEqual([name for name, _ in pipeline.stages], ["normalize", "align", "score", "tag", "diagnose"])
+        self.assertTrue(result["tagged"])
+        self.assertNotIn("strengths", result)
+        self.assertEqual(result["substitutions"][0]["spoken"], "too")
+    
+    def test_timing_stats(self):
+        """Test that timings accumulate across runs."""
+        pipeline = ReadingPipeline()
+        pipeline.run("a b c", "a b c")
+        pipeline.run("a b c", "a c")
+        
+        stats = pipeline.timing_stats()
+        self.assertEqual(stats["align"]["runs"], 2)
+        self.assertGreaterEqual(stats["total"]["max_ms"], stats["total"]["avg_ms"])
+
+
+if __name__ == "__main__":
+    unittest.main()
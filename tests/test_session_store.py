@@ -0,0 +1,201 @@
+import unittest
+import sys
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, session
+
+from utils.session_store import (
+    MemoryBackend, SessionBackend, SQLiteBackend, ServerSideSessionInterface, WriteBehindBackend
+)
+
+
+class TestSessionStore(unittest.TestCase):
+    """Test cases for the server-side session store."""
+
+    def test_memory_backend_lru(self):
+        """Test that the least recently used session is evicted first."""
+        backend = MemoryBackend(maxsize=2)
+        backend.save("a", "1")
+        backend.save("b", "2")
+        backend.load("a")
+        backend.save("c", "3")
+
+        self.assertEqual(backend.load("a"), "1")
+        self.assertIsNone(backend.load("b"))
+        self.assertEqual(backend.stats()["evictions"], 1)
+
+    def test_sqlite_backend_persists_and_expires(self):
+        """Test that sessions survive a new backend and expire after the TTL."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "sessions.db")
+            first = SQLiteBackend(path)
+            first.save("a", "1")
+            first.close()
+
+            self.assertEqual(SQLiteBackend(path).load("a"), "1")
+            expiring = SQLiteBackend(path, ttl=0.01)
+            time.sleep(0.02)
+            self.assertIsNone(expiring.load("a"))
+            self.assertEqual(expiring.purge_expired(), 1)
+            expiring.close()
+
+    def test_incomplete_backend_rejected(self):
+        """Test that a backend missing a method fails when created, not on first use."""
+        class NoTouch(SessionBackend):
+            def load(self, session_id):
+                return None
+
+            def save(self, session_id, payload):
+                pass
+
+            def delete(self, session_id):
+                pass
+
+        with self.assertRaises(TypeError):
+            NoTouch()
+
+    def test_sqlite_close_closes_every_thread(self):
+        """Test that close() reaches the connections opened by other threads."""
+        with tempfile.TemporaryDirectory() as directory:
+            backend = SQLiteBackend(os.path.join(directory, "sessions.db"))
+            connections = [backend._connection()]
+            worker = threading.Thread(target=lambda: connections.append(backend._connection()))
+            worker.start()
+            worker.join()
+
+            backend.close()
+            for connection in connections:
+                with self.assertRaises(sqlite3.ProgrammingError):
+                    connection.execute("SELECT 1")
+            backend.save("a", "1")
+            self.assertEqual(backend.load("a"), "1")
+            backend.close()
+
+    def test_sqlite_purges_abandoned_sessions_on_save(self):
+        """Test that saving deletes expired rows that are never loaded again."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "sessions.db")
+            backend = SQLiteBackend(path, ttl=0.05, purge_interval=0)
+            backend.save("abandoned", "1")
+            time.sleep(0.1)
+            backend.save("active", "2")
+
+            connection = sqlite3.connect(path)
+            self.assertEqual(connection.execute("SELECT id FROM sessions").fetchall(), [("active",)])
+            connection.close()
+            self.assertEqual(backend.stats()["purged"], 1)
+            backend.close()
+
+    def test_write_behind(self):
+        """Test that saves and deletes are buffered until a flush."""
+        backend = MemoryBackend()
+        backend.save("gone", "x")
+        buffered = WriteBehindBackend(backend, flush_interval=60)
+        buffered.save("a", "1")
+        buffered.delete("gone")
+
+        self.assertEqual(buffered.load("a"), "1")
+        self.assertIsNone(backend.load("a"))
+        self.assertIsNone(buffered.load("gone"))
+
+        self.assertEqual(buffered.flush(), 2)
+        self.assertEqual(backend.load("a"), "1")
+        self.assertIsNone(backend.load("gone"))
+        buffered.close()
+
+    def test_save_through_shared_by_workers(self):
+        """Test that with save_through each worker's save is visible to the other at once."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "sessions.db")
+            first = WriteBehindBackend(SQLiteBackend(path), flush_interval=60, save_through=True)
+            second = WriteBehindBackend(SQLiteBackend(path), flush_interval=60, save_through=True)
+            first.save("a", "1")
+            self.assertEqual(second.load("a"), "1")
+            second.save("a", "2")
+            self.assertEqual(first.load("a"), "2")
+            first.delete("a")
+            self.assertIsNone(second.load("a"))
+            self.assertEqual(first.stats()["buffered_saves"], 0)
+            first.close()
+            second.close()
+
+    def test_touch_restarts_expiry(self):
+        """Test that a buffered touch keeps a session alive past its last save."""
+        with tempfile.TemporaryDirectory() as directory:
+            sqlite = SQLiteBackend(os.path.join(directory, "sessions.db"), ttl=0.2)
+            buffered = WriteBehindBackend(sqlite, flush_interval=60, save_through=True)
+            buffered.save("a", "1")
+            time.sleep(0.12)
+            buffered.touch("a")
+            self.assertEqual(buffered.flush(), 1)
+            time.sleep(0.12)
+            self.assertEqual(sqlite.load("a"), "1")
+            self.assertEqual(sqlite.stats()["touches"], 1)
+            buffered.close()
+
+    def test_session_interface(self):
+        """Test that the cookie carries only an id, sent once, and unknown ids are replaced."""
+        app = Flask(__name__)
+        backend = MemoryBackend()
+        app.session_interface = ServerSideSessionInterface(backend)
+
+        @app.route("/bump")
+        def bump():
+            session["count"] = session.get("count", 0) + 1
+            session["interests"] = ["space", "animals"]
+            return str(session["count"])
+
+        @app.route("/read")
+        def read():
+            return str(session.get("count", 0))
+
+        client = app.test_client()
+        first = client.get("/bump")
+        cookie = first.headers["Set-Cookie"]
+        session_id = client.get_cookie("session").value
+        self.assertNotIn("space", cookie)
+        self.assertIn("space", backend.load(session_id))
+
+        second = client.get("/bump")
+        self.assertEqual(second.get_data(as_text=True), "2")
+        self.assertNotIn("Set-Cookie", second.headers)
+        self.assertEqual(client.get("/read").get_data(as_text=True), "2")
+
+        client.set_cookie("session", "x" * 43)
+        self.assertEqual(client.get("/bump").get_data(as_text=True), "1")
+        self.assertNotEqual(client.get_cookie("session").value, "x" * 43)
+
+    def test_cookie_refresh_touches_session(self):
+        """Test that refreshing a permanent cookie also keeps the stored session alive."""
+        app = Flask(__name__)
+        app.session_interface = ServerSideSessionInterface(MemoryBackend(ttl=0.2))
+
+        @app.route("/login")
+        def login():
+            session.permanent = True
+            session["user"] = "ana"
+            return ""
+
+        @app.route("/read")
+        def read():
+            return session.get("user", "")
+
+        client = app.test_client()
+        client.get("/login")
+        time.sleep(0.12)
+        refreshed = client.get("/read")
+        self.assertEqual(refreshed.get_data(as_text=True), "ana")
+        self.assertIn("Set-Cookie", refreshed.headers)
+        time.sleep(0.12)
+        self.assertEqual(client.get("/read").get_data(as_text=True), "ana")
+
+
+if __name__ == "__main__":
+    unittest.main()
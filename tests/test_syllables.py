@@ -0,0 +1,42 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.syllables import guide, guides, preload, split_syllables, syllabify, syllable_stats
+
+
+class TestSyllables(unittest.TestCase):
+    """Test cases for the shared syllabification engine."""
+    
+    def test_split_syllables(self):
+        """Test syllable breaks, including a trailing consonant cluster."""
+        self.assertEqual(split_syllables("cat"), ["cat"])
+        self.assertEqual(split_syllables("reading"), ["rea", "ding"])
+        self.assertEqual(split_syllables("hippopotamus"), ["hi", "ppo", "po", "ta", "mus"])
+        self.assertEqual(split_syllables(""), [])
+    
+    def test_guide(self):
+        """Test the pronunciation guide format and case handling."""
+        self.assertEqual(guide("Reading"), "Rea·ding (READING)")
+        self.assertEqual(syllabify("tiger"), "ti·ger")
+    
+    def test_guides_batch(self):
+        """Test guides for a list of words with repeats."""
+        result = guides(["ocean", "planet", "ocean"])
+        self.assertEqual(list(result), ["ocean", "planet"])
+        self.assertEqual(result["planet"], "pla·net (PLANET)")
+    
+    def test_preload(self):
+        """Test precomputing the table from passages."""
+        before = syllable_stats()["precomputed"]
+        added = preload(["The volcano erupted.", "volcano"])
+        self.assertLessEqual(added, 3)
+        self.assertGreaterEqual(syllable_stats()["precomputed"], before + added)
+        self.assertEqual(syllabify("volcano"), "vo·lca·no")
+
+
+if __name__ == "__main__":
+    unittest.main()
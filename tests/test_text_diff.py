@@ -0,0 +1,63 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.text_diff import classify_spelling_errors, diff, spelling_comparison
+
+
+class TestTextDiff(unittest.TestCase):
+    """Test cases for the spelling diff engine."""
+    
+    def test_transposition(self):
+        """Test that swapped letters count as one edit."""
+        distance, opcodes = diff("receive", "recieve")
+        self.assertEqual(distance, 1)
+        self.assertIn(("transpose", 3, 3), opcodes)
+    
+    def test_insert_and_delete(self):
+        """Test that a shifted letter is reported as extra plus missing, not a run of errors."""
+        distance, opcodes = diff("necessary", "neccesary")
+        self.assertEqual(distance, 2)
+        self.assertEqual([op for op, _, _ in opcodes if op != "match"], ["insert", "delete"])
+    
+    def test_threshold(self):
+        """Test that the diff gives up beyond the edit budget."""
+        self.assertIsNone(diff("elephant", "xyz", max_distance=3))
+        self.assertIsNone(diff("abcdef", "badcfe", max_distance=2))
+        self.assertEqual(diff("abcdef", "badcfe", max_distance=3)[0], 3)
+    
+    def test_spelling_comparison(self):
+        """Test the feedback list, including case-insensitive matching."""
+        comparison = spelling_comparison("Cat", "cta")
+        self.assertEqual(comparison[0], {"char": "C", "status": "correct", "index": 0})
+        self.assertEqual(comparison[1], {"char": "at", "status": "transposed", "user_char": "ta", "index": 1})
+        
+        missing = spelling_comparison("dog", "")
+        self.assertEqual([item["status"] for item in missing], ["missing"] * 3)
+    
+    def test_fallback_over_budget(self):
+        """Test the positional comparison used when the answer is too far off."""
+        comparison = spelling_comparison("elephant", "zz", max_distance=2)
+        self.assertEqual(len(comparison), 8)
+        self.assertEqual(comparison[0]["status"], "incorrect")
+
+    
+    def test_classify_spelling_errors(self):
+        """Test error classification from the comparison."""
+        flags = classify_spelling_errors("believe", spelling_comparison("believe", "beleive"))
+        self.assertTrue(flags["transposed"])
+        self.assertTrue(flags["ie_ei"])
+        
+        flags = classify_spelling_errors("committee", spelling_comparison("committee", "comitee"))
+        self.assertTrue(flags["double_consonant"])
+        self.assertFalse(flags["ie_ei"])
+        
+        flags = classify_spelling_errors("planet", spelling_comparison("planet", "planit"))
+        self.assertEqual(flags, {"transposed": False, "vowel": True, "double_consonant": False, "ie_ei": False})
+
+
+if __name__ == "__main__":
+    unittest.main()
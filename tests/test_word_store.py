@@ -0,0 +1,89 @@
+import unittest
+import sys
+import os
+
+# Add parent directory to path so we can import modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.word_store import WordStore, parse_word_database
+
+SAMPLE_DATABASE = '''
+const wordDatabase = {
+  beginner: {
+    animals: [
+      { word: "cat", hint: "A small furry pet that meows" },
+      { word: "rabbit", hint: "It hops" }
+    ]
+  },
+  intermediate: {
+    science: [
+      { word: "molecule", hint: "Group of atoms" }
+    ]
+  },
+  challenges: {
+    ie_ei_words: [
+      { word: "receive", hint: "To get something", note: "'i' before 'e', except after 'c'" }
+    ],
+    homophones: [
+      { word: "their", hint: "Belonging to them", wrong: ["there", "they're"] }
+    ]
+  }
+};
+
+const phraseDatabase = {
+  beginner: [
+    { text: "My cat likes to play.", hint: "About a pet's activity" }
+  ]
+};
+'''
+
+
+class TestWordStore(unittest.TestCase):
+    """Test cases for the server-side word store."""
+
+    def setUp(self):
+        self.store = WordStore(*parse_word_database(SAMPLE_DATABASE))
+
+    def test_parse(self):
+        """Test parsing the JavaScript tables."""
+        words, phrases = parse_word_database(SAMPLE_DATABASE)
+        self.assertEqual([entry.word for entry in words], ["cat", "rabbit", "molecule", "receive", "their"])
+        self.assertEqual(words[3].note, "'i' before 'e', except after 'c'")
+        self.assertEqual(words[4].wrong, ("there", "they're"))
+        self.assertEqual(phrases[0].text, "My cat likes to play.")
+        self.assertEqual(self.store.categories()["challenges"], ["ie_ei_words", "homophones"])
+
+    def test_find(self):
+        """Test lookups through the indexes."""
+        self.assertEqual([entry.word for entry in self.store.find(level="beginner")], ["cat", "rabbit"])
+        self.assertEqual([entry.word for entry in self.store.find(pattern="double_consonant")], ["rabbit"])
+        self.assertEqual([entry.word for entry in self.store.find(pattern="ie_ei")], ["receive", "their"])
+        self.assertEqual([entry.word for entry in self.store.find(level="beginner", length=3)], ["cat"])
+        self.assertEqual(self.store.find(level="beginner", syllables=4), [])
+
+    def test_sampling_without_replacement(self):
+        """Test that a session sees every word of a pool before any repeats."""
+        drawn = [self.store.next_word("s1", "beginner", "animals")["target_word"] for _ in range(4)]
+        self.assertEqual(sorted(drawn[:2]), ["cat", "rabbit"])
+        self.assertEqual(sorted(drawn[2:]), ["cat", "rabbit"])
+        self.assertEqual(self.store.stats()["reshuffles"], 1)
+
+    def test_fallbacks(self):
+        """Test the level, category and challenge fallbacks."""
+        self.assertEqual(self.store.next_word("s1", "unknown")["target_word"], "molecule")
+        self.assertEqual(self.store.next_word("s1", "intermediate", "unknown")["target_word"], "molecule")
+        self.assertEqual(self.store.next_word("s1", challenge="homophones")["target_word"], "their")
+        self.assertIsNone(self.store.next_phrase("s1", "unknown"))
+        self.assertEqual(self.store.next_phrase("s1", "beginner")["target_text"], "My cat likes to play.")
+
+    def test_deck_eviction(self):
+        """Test that the least recently used session decks are dropped."""
+        store = WordStore(self.store.words, self.store.phrases, max_decks=2)
+        for session_key in ("a", "b", "c"):
+            store.next_word(session_key, "beginner")
+        self.assertEqual(store.stats()["decks"], 2)
+        self.assertEqual(store.stats()["evicted"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
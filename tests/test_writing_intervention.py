@@ -0,0 +1,143 @@
+import unittest
+import sys
+import os
+import random
+
+# The writing services live in the Flask app, which imports them as top-level packages
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "rebuild"))
+
+from services.writing_intervention import AchievementService, WritingAnalysisService
+
+ESSAY = (
+    "My dog is called Max. He was adopted last spring, and he loves the park! "
+    "However, he is scared of cats, birds, bikes, and loud trucks. "
+    "Therefore we walk early. Do you have a pet? Moreover the neighbours like him"
+)
+
+
+def scores(analysis):
+    """The parts of an analysis that do not depend on when it ran."""
+    return (analysis.grammar_score, analysis.vocabulary_score, analysis.structure_score,
+            analysis.organization_score, analysis.suggestions, analysis.strengths_identified,
+            analysis.areas_for_improvement)
+
+
+class TestIncrementalWritingAnalyzer(unittest.TestCase):
+    """Test cases for incremental writing analysis."""
+
+    def setUp(self):
+        self.service = WritingAnalysisService()
+
+    def test_typing_matches_full_analysis(self):
+        """Test that analyzing after every keystroke agrees with a fresh analysis."""
+        analyzer = self.service.incremental_analyzer()
+        for end in range(0, len(ESSAY) + 1, 3):
+            self.assertEqual(scores(analyzer.update(ESSAY[:end])), scores(self.service.analyze_text(ESSAY[:end])))
+
+    def test_random_edits_match_full_analysis(self):
+        """Test that replacing, inserting and deleting text anywhere keeps the totals right."""
+        rng = random.Random(5)
+        words = ESSAY.replace(".", " .").replace("!", " !").replace("?", " ?").split()
+        analyzer = self.service.incremental_analyzer()
+        for _ in range(300):
+            position = rng.randrange(len(words) + 1)
+            action = rng.random()
+            if action < 0.4 and words:
+                del words[min(position, len(words) - 1)]
+            elif action < 0.8:
+                words.insert(position, rng.choice(words or ["word"]))
+            else:
+                words.insert(position, rng.choice([".", ",", "!", "however"]))
+            content = " ".join(words)
+            self.assertEqual(scores(analyzer.update(content)), scores(self.service.analyze_text(content)))
+
+    def test_vocabulary_counts_whole_words(self):
+        """Test that words with inner punctuation count as one word, as in a whitespace split of the draft."""
+        text = "It cost 3.50 today, e.g. at https://example.com/a.b?c=1 and more.Then it rose.So it goes. it goes"
+        words = text.lower().split()
+        expected = len(set(words)) / len(words) * 100
+
+        self.assertAlmostEqual(self.service.analyze_text(text).vocabulary_score, expected)
+        analyzer = self.service.incremental_analyzer()
+        for end in range(len(text) + 1):
+            analyzer.update(text[:end])
+        self.assertAlmostEqual(analyzer.update(text).vocabulary_score, expected)
+        self.assertAlmostEqual(analyzer.update(text.replace("3.50", "4.75")).vocabulary_score, expected)
+
+    def test_only_edited_sentences_reanalyzed(self):
+        """Test that an edit to one sentence reuses the analysis of the others."""
+        analyzer = self.service.incremental_analyzer()
+        analyzer.update(ESSAY)
+        analyzed = analyzer.stats['sentences_analyzed']
+
+        analyzer.update(ESSAY.replace("Max", "Rex"))
+        self.assertEqual(analyzer.stats['sentences_analyzed'], analyzed + 1)
+
+
+class TestAchievementService(unittest.TestCase):
+    """Test cases for per-student achievements."""
+
+    def setUp(self):
+        self.service = AchievementService()
+
+    def test_users_are_isolated(self):
+        """Test that one student's unlock does not show up for another."""
+        unlocked = self.service.update_metrics("ana", {'avg_sentence_score': 90})
+        self.assertEqual([achievement.title for achievement in unlocked], ["Sentence Sculptor"])
+
+        ana = {achievement.id: achievement for achievement in self.service.achievements_for("ana")}
+        ben = {achievement.id: achievement for achievement in self.service.achievements_for("ben")}
+        self.assertTrue(ana[2].unlocked)
+        self.assertFalse(ben[2].unlocked)
+        self.assertEqual(ben[2].progress, 0)
+        # The shared catalog is never modified
+        self.assertFalse(self.service.achievements[1].unlocked)
+
+    def test_unlocks_once(self):
+        """Test that an achievement is reported only on the update that unlocks it."""
+        self.assertEqual(self.service.update_metrics("ana", {'organization_score': 40}), [])
+        self.assertEqual(len(self.service.update_metrics("ana", {'organization_score': 86})), 1)
+        self.assertEqual(self.service.update_metrics("ana", {'organization_score': 95}), [])
+        self.assertEqual(self.service.update_metrics("ana", {'organization_score': 10}), [])
+        self.assertTrue(self.service.achievements_for("ana")[2].unlocked)
+
+    def test_unchanged_metrics_return_early(self):
+        """Test that resubmitting the same metrics leaves the state untouched."""
+        self.service.update_metrics("ana", {'avg_sentence_score': 50, 'organization_score': 60})
+        state = self.service._states["ana"]
+
+        self.assertEqual(self.service.update_metrics("ana", {'avg_sentence_score': 50}), [])
+        self.assertIs(self.service._states["ana"], state)
+        self.service.update_metrics("ana", {'avg_sentence_score': 55})
+        self.assertIsNot(self.service._states["ana"], state)
+        self.assertEqual(self.service.achievements_for("ana")[1].progress, 68)
+
+    def test_max_users(self):
+        """Test that the least recently updated students are forgotten beyond max_users."""
+        service = AchievementService(max_users=2)
+        service.update_metrics("ana", {'avg_sentence_score': 90})
+        service.update_metrics("ben", {'avg_sentence_score': 90})
+        service.update_metrics("ana", {'avg_sentence_score': 90})
+        service.update_metrics("cy", {'avg_sentence_score': 90})
+
+        self.assertTrue(service.achievements_for("ana")[1].unlocked)
+        self.assertFalse(service.achievements_for("ben")[1].unlocked)
+        self.assertEqual(len(service._states), 2)
+        self.assertEqual(service.stats['evictions'], 1)
+
+    def test_evicted_student_starts_over(self):
+        """Test that a forgotten student unlocks their achievements again from the next metrics."""
+        service = AchievementService(max_users=1)
+        service.update_metrics("ana", {'words_written': 1200, 'avg_sentence_score': 90})
+        with self.assertLogs('services.writing_intervention', level='INFO') as logs:
+            service.update_metrics("ben", {'avg_sentence_score': 10})
+        self.assertIn("2 unlocked", logs.output[0])
+
+        self.assertFalse(any(achievement.unlocked for achievement in service.achievements_for("ana")))
+        unlocked = service.update_metrics("ana", {'words_written': 1250})
+        self.assertEqual([achievement.title for achievement in unlocked], ["Word Wizard"])
+        self.assertFalse(service.achievements_for("ana")[1].unlocked)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,248 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+def make_cache_key(level: str, interests: Iterable[str], template_version: str) -> str:
+    """
+    Build a content-addressed key for a generated passage.
+
+    The key only depends on what actually changes the prompt: the reading level,
+    the interests (case-insensitive, order-independent) and the prompt template
+    version, so bumping the template invalidates every cached entry.
+
+    Args:
+        level (str): Reading level the passage was generated for
+        interests (Iterable[str]): Interests used in the prompt
+        template_version (str): Version tag of the prompt template
+
+    Returns:
+        str: Hex digest identifying the request
+    """
+    normalized = {
+        "level": (level or "").strip().lower(),
+        "interests": sorted({i.strip().lower() for i in interests if i and i.strip()}),
+        "template": template_version,
+    }
+    payload = json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TTLCache:
+    """
+    A thread-safe LRU cache with per-entry expiry and an optional disk tier.
+
+    Entries live in memory up to ``maxsize`` items and are evicted least recently
+    used first. When ``disk_dir`` is set, every entry is also written there as a
+    small JSON file so the cache survives restarts; a memory miss falls through
+    to disk and promotes the entry back into memory. Expired files, and the
+    oldest files beyond ``disk_maxsize``, are deleted by a sweep that runs on
+    put at most once per ``sweep_interval`` seconds.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: Optional[float] = 3600.0, disk_dir: Optional[str] = None,
+                 disk_maxsize: Optional[int] = None, sweep_interval: float = 600.0):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize (int): Maximum number of entries kept in memory
+            ttl (float, optional): Seconds before an entry expires, None to never expire
+            disk_dir (str, optional): Directory for the persistent tier, None for memory only
+            disk_maxsize (int, optional): Maximum number of entries kept on disk, None for no limit
+            sweep_interval (float): Minimum seconds between sweeps of the disk tier
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self.disk_maxsize = disk_maxsize
+        self.sweep_interval = sweep_interval
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._next_sweep = 0.0
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "expired": 0, "disk_pruned": 0}
+
+        if self.disk_dir:
+            try:
+                os.makedirs(self.disk_dir, exist_ok=True)
+            except OSError as e:
+                logger.warning(f"Disabling disk cache tier at {self.disk_dir}: {e}")
+                self.disk_dir = None
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Look up a value, checking memory first and then the disk tier.
+
+        Args:
+            key (str): Cache key
+
+        Returns:
+            Any: The cached value, or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if not self._is_expired(stored_at, now):
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return value
+                del self._entries[key]
+                self._stats["expired"] += 1
+
+        entry = self._read_disk(key)
+        if entry is not None:
+            stored_at, value = entry
+            if not self._is_expired(stored_at, now):
+                with self._lock:
+                    self._store(key, stored_at, value)
+                    self._stats["disk_hits"] += 1
+                return value
+            self._delete_disk(key)
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        Store a value in memory and, if enabled, on disk.
+
+        Args:
+            key (str): Cache key
+            value (Any): JSON-serializable value to cache
+        """
+        stored_at = time.time()
+        with self._lock:
+            self._store(key, stored_at, value)
+            sweep = self.disk_dir is not None and stored_at >= self._next_sweep
+            if sweep:
+                self._next_sweep = stored_at + self.sweep_interval
+        self._write_disk(key, stored_at, value)
+        if sweep:
+            self.prune_disk()
+
+    def prune_disk(self) -> int:
+        """
+        Delete expired entries from the disk tier, then the oldest beyond disk_maxsize.
+
+        Files are aged by modification time, which is when the entry was stored.
+
+        Returns:
+            int: Number of files deleted
+        """
+        if not self.disk_dir:
+            return 0
+        now = time.time()
+        live = []
+        removed = 0
+        try:
+            with os.scandir(self.disk_dir) as entries:
+                for entry in entries:
+                    if not entry.is_file():
+                        continue
+                    try:
+                        modified = entry.stat().st_mtime
+                    except OSError:
+                        continue
+                    if entry.name.endswith(".json") and not self._is_expired(modified, now):
+                        live.append((modified, entry.path))
+                    elif entry.name.endswith(".json") or now - modified > 60:
+                        # Expired entries, and temp files left by a write that never finished
+                        removed += self._remove_file(entry.path)
+        except OSError as e:
+            logger.warning(f"Could not sweep disk cache tier at {self.disk_dir}: {e}")
+            return removed
+
+        if self.disk_maxsize is not None and len(live) > self.disk_maxsize:
+            live.sort()
+            for _, path in live[:len(live) - self.disk_maxsize]:
+                removed += self._remove_file(path)
+
+        with self._lock:
+            self._stats["disk_pruned"] += removed
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss counters for the cache.
+
+        Returns:
+            Dict: Counters plus the current size and hit rate
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((stats["hits"] + stats["disk_hits"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+    def _is_expired(self, stored_at: float, now: float) -> bool:
+        """Check whether an entry stored at ``stored_at`` has outlived the TTL."""
+        return self.ttl is not None and now - stored_at > self.ttl
+
+    def _store(self, key: str, stored_at: float, value: Any) -> None:
+        """Insert an entry in memory and evict the LRU entries. Caller holds the lock."""
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _disk_path(self, key: str) -> str:
+        """Get the file used to persist ``key``."""
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[tuple]:
+        """Read an entry from the disk tier."""
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._disk_path(key), "r", encoding="utf-8") as f:
+                record = json.load(f)
+            return record["stored_at"], record["value"]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable cache entry {key}: {e}")
+            return None
+
+    def _write_disk(self, key: str, stored_at: float, value: Any) -> None:
+        """Atomically write an entry to the disk tier."""
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"stored_at": stored_at, "value": value}, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning(f"Could not persist cache entry {key}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _delete_disk(self, key: str) -> None:
+        """Remove an expired entry from the disk tier."""
+        with self._lock:
+            self._stats["disk_pruned"] += self._remove_file(self._disk_path(key))
+
+    @staticmethod
+    def _remove_file(path: str) -> int:
+        """Delete a file, returning 1 if it was deleted and 0 otherwise."""
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
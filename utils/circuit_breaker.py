@@ -0,0 +1,207 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    A circuit breaker driven by error rate and latency percentiles.
+
+    The breaker watches a rolling window of recent calls. While closed, every
+    call is allowed; once the window shows too many errors or a slow tail
+    latency it opens and rejects calls outright. After a cooldown it moves to
+    half-open and lets a probe call through, closing again if the probe succeeds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, window: int = 20, min_calls: int = 5, error_threshold: float = 0.5,
+                 latency_threshold: Optional[float] = 8.0, latency_percentile: float = 0.95,
+                 cooldown: float = 30.0, half_open_max_calls: int = 1):
+        """
+        Initialize the circuit breaker.
+
+        Args:
+            name (str): Name shown in health output
+            window (int): Number of recent calls considered
+            min_calls (int): Calls required in the window before the breaker can trip
+            error_threshold (float): Error rate (0-1) at which the breaker opens
+            latency_threshold (float, optional): Seconds; the breaker opens when the
+                latency percentile exceeds it. None disables latency tripping
+            latency_percentile (float): Percentile (0-1) compared to latency_threshold
+            cooldown (float): Seconds to stay open before allowing a probe
+            half_open_max_calls (int): Concurrent probe calls allowed while half-open
+        """
+        self.name = name
+        self.min_calls = min_calls
+        self.error_threshold = error_threshold
+        self.latency_threshold = latency_threshold
+        self.latency_percentile = latency_percentile
+        self.cooldown = cooldown
+        self.half_open_max_calls = half_open_max_calls
+        self._calls: deque = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._trip_reason: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stats = {"allowed": 0, "rejected": 0, "trips": 0}
+
+    @property
+    def state(self) -> str:
+        """Get the current state, moving from open to half-open once the cooldown has passed."""
+        with self._lock:
+            self._advance(time.time())
+            return self._state
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a call may go upstream, reserving a probe slot if half-open.
+
+        Every allowed call must be followed by record_success or record_failure.
+
+        Returns:
+            bool: True if the call may proceed
+        """
+        with self._lock:
+            self._advance(time.time())
+            if self._state == self.OPEN or (
+                self._state == self.HALF_OPEN and self._probes >= self.half_open_max_calls
+            ):
+                self._stats["rejected"] += 1
+                return False
+            if self._state == self.HALF_OPEN:
+                self._probes += 1
+            self._stats["allowed"] += 1
+            return True
+
+    def record_success(self, latency: float) -> None:
+        """
+        Record a successful call.
+
+        Args:
+            latency (float): Call duration in seconds
+        """
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                # A slow probe is not evidence of recovery
+                if self.latency_threshold is None or latency <= self.latency_threshold:
+                    self._close()
+                    return
+                self._open("slow probe")
+                return
+            self._calls.append((True, latency))
+            self._evaluate()
+
+    def record_failure(self, latency: float) -> None:
+        """
+        Record a failed call.
+
+        Args:
+            latency (float): Call duration in seconds
+        """
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._probes = max(0, self._probes - 1)
+                self._open("probe failed")
+                return
+            self._calls.append((False, latency))
+            self._evaluate()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        Describe the breaker for health checks.
+
+        Returns:
+            Dict: State, window metrics and counters
+        """
+        with self._lock:
+            now = time.time()
+            self._advance(now)
+            error_rate, latency = self._window_metrics()
+            snapshot = {
+                "name": self.name,
+                "state": self._state,
+                "calls_in_window": len(self._calls),
+                "error_rate": round(error_rate, 3),
+                f"p{int(self.latency_percentile * 100)}_latency": round(latency, 3),
+                "trip_reason": self._trip_reason,
+                "retry_in": round(max(0.0, self._opened_at + self.cooldown - now), 1) if self._state == self.OPEN else 0.0,
+            }
+            snapshot.update(self._stats)
+        return snapshot
+
+    def _advance(self, now: float) -> None:
+        """Move from open to half-open after the cooldown. Caller holds the lock."""
+        if self._state == self.OPEN and now - self._opened_at >= self.cooldown:
+            self._state = self.HALF_OPEN
+            self._probes = 0
+            logger.info(f"Circuit '{self.name}' half-open, allowing a probe call")
+
+    def _window_metrics(self) -> tuple:
+        """Compute the error rate and latency percentile of the window. Caller holds the lock."""
+        if not self._calls:
+            return 0.0, 0.0
+        errors = sum(1 for ok, _ in self._calls if not ok)
+        latencies = sorted(latency for _, latency in self._calls)
+        index = min(len(latencies) - 1, int(len(latencies) * self.latency_percentile))
+        return errors / len(self._calls), latencies[index]
+
+    def _evaluate(self) -> None:
+        """Open the breaker if the window crosses a threshold. Caller holds the lock."""
+        if self._state != self.CLOSED or len(self._calls) < self.min_calls:
+            return
+        error_rate, latency = self._window_metrics()
+        if error_rate >= self.error_threshold:
+            self._open(f"error rate {error_rate:.0%}")
+        elif self.latency_threshold is not None and latency > self.latency_threshold:
+            self._open(f"p{int(self.latency_percentile * 100)} latency {latency:.1f}s")
+
+    def _open(self, reason: str) -> None:
+        """Open the breaker. Caller holds the lock."""
+        self._state = self.OPEN
+        self._opened_at = time.time()
+        self._trip_reason = reason
+        self._stats["trips"] += 1
+        logger.warning(f"Circuit '{self.name}' opened: {reason}")
+
+    def _close(self) -> None:
+        """Close the breaker and start a fresh window. Caller holds the lock."""
+        self._state = self.CLOSED
+        self._calls.clear()
+        self._trip_reason = None
+        logger.info(f"Circuit '{self.name}' closed")
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(name: str, **kwargs: Any) -> CircuitBreaker:
+    """
+    Get the process-wide breaker with the given name, creating it on first use.
+
+    Args:
+        name (str): Breaker name, e.g. "gemini"
+        **kwargs: CircuitBreaker options, only used when the breaker is created
+
+    Returns:
+        CircuitBreaker: The shared breaker
+    """
+    with _registry_lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker(name, **kwargs)
+        return breaker
@@ -1,6 +1,13 @@
 import logging
 import re
-from typing import List, Dict, Any
+from functools import lru_cache
+from itertools import chain
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from utils.syllables import split_syllables, syllabify
+from utils.word_frequency import default_table
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -23,30 +30,194 @@ def clean_text(text: str) -> str:
     
     return cleaned
 
-def extract_difficult_words(text: str, min_length: int = 7) -> List[str]:
+# Words as \b\w+\b sees them
+_WORD_PATTERN = re.compile(r'\w+')
+
+def iter_words(text: Union[str, Iterable[str]]) -> Iterator[str]:
     """
-    Extract potentially difficult words from text based on length.
+    Stream the lowercase words of a text.
+    
+    The text may be one string or any iterable of chunks, such as an open
+    file; a word split across two chunks is joined before it is yielded.
     
     Args:
-        text (str): The text to analyze
-        min_length (int): Minimum word length to consider difficult
+        text (Union[str, Iterable[str]]): The text, or its chunks in order
+        
+    Yields:
+        str: Each word, in order
+    """
+    if isinstance(text, str):
+        for match in _WORD_PATTERN.finditer(text):
+            yield match.group().lower()
+        return
+    
+    carry = ''
+    for chunk in text:
+        buffer = carry + chunk
+        carry = ''
+        for match in _WORD_PATTERN.finditer(buffer):
+            if match.end() == len(buffer):
+                # The word may continue in the next chunk
+                carry = match.group()
+            else:
+                yield match.group().lower()
+    if carry:
+        yield carry.lower()
+
+def length_score(word: str) -> int:
+    """Score a word by its number of characters."""
+    return len(word)
+
+def syllable_score(word: str) -> int:
+    """Score a word by its number of syllables."""
+    return len(split_syllables(word))
+
+def frequency_score(word: str) -> int:
+    """Score a word by its rank in the bundled frequency table; unlisted words rank last."""
+    table = default_table()
+    rank = table.rank(word)
+    return rank if rank is not None else len(table) + 1
+
+# Scorer name -> (score function, default threshold). A word is difficult
+# when its score reaches the threshold.
+SCORERS: Dict[str, Tuple[Callable[[str], float], Callable[[], float]]] = {
+    "length": (length_score, lambda: 7),
+    "syllables": (syllable_score, lambda: 3),
+    "frequency": (frequency_score, lambda: len(default_table()) + 1),
+}
+
+def iter_difficult_words(text: Union[str, Iterable[str]], scorer: Union[str, Callable[[str], float]] = "length",
+                         threshold: Optional[float] = None) -> Iterator[str]:
+    """
+    Stream the distinct difficult words of a text in first-seen order.
+    
+    Each word is scored once; the words already seen are kept in a set, so the
+    whole pass is linear in the length of the text.
+    
+    Args:
+        text (Union[str, Iterable[str]]): The text, or its chunks in order
+        scorer (Union[str, Callable]): "length", "syllables", "frequency" or a
+            function that scores a lowercase word
+        threshold (float, optional): Lowest score that counts as difficult;
+            defaults to the named scorer's threshold
+        
+    Yields:
+        str: Each difficult word, once
+        
+    Raises:
+        ValueError: If the scorer name is unknown, or a custom scorer has no threshold
+    """
+    if callable(scorer):
+        score = scorer
+        if threshold is None:
+            raise ValueError("A threshold is required with a custom scorer")
+    elif scorer in SCORERS:
+        score, default_threshold = SCORERS[scorer]
+        if threshold is None:
+            threshold = default_threshold()
+    else:
+        raise ValueError(f"Unknown scorer: {scorer}")
+    
+    seen = set()
+    for word in iter_words(text):
+        if word in seen:
+            continue
+        seen.add(word)
+        if score(word) >= threshold:
+            yield word
+
+def extract_difficult_words(text: Union[str, Iterable[str]], min_length: int = 7,
+                            scorer: Union[str, Callable[[str], float]] = "length",
+                            threshold: Optional[float] = None) -> List[str]:
+    """
+    Extract potentially difficult words from text.
+    
+    Args:
+        text (Union[str, Iterable[str]]): The text to analyze, or its chunks in order
+        min_length (int): Minimum word length to consider difficult with the length scorer
+        scorer (Union[str, Callable]): "length", "syllables", "frequency" or a custom scoring function
+        threshold (float, optional): Lowest score that counts as difficult, overriding the default
         
     Returns:
         List[str]: List of difficult words
     """
-    # Split text into words and remove punctuation
-    words = re.findall(r'\b\w+\b', text.lower())
+    if scorer == "length" and threshold is None:
+        threshold = min_length
+    return list(iter_difficult_words(text, scorer, threshold))
+
+# One pass over a text: words, sentence-ending punctuation runs, and any other
+# visible characters (which make a piece between terminators count as a sentence)
+_STATS_TOKEN_PATTERN = re.compile(r'(\w+)|([.!?]+)|[^\w\s.!?]+')
+_VOWEL_GROUP_PATTERN = re.compile(r'[aeiouy]+')
+
+class ScannedText(NamedTuple):
+    """Tokens of a text as calculate_reading_stats counts them."""
+    words: List[str]
+    syllables: List[int]
+    sentence_ids: List[int]
+    sentence_count: int
+
+@lru_cache(maxsize=16384)
+def count_syllables(word: str) -> int:
+    """
+    Count the syllables of a lowercase word (very rough approximation).
     
-    # Filter for words longer than min_length
-    difficult_words = [word for word in words if len(word) >= min_length]
+    Args:
+        word (str): The lowercase word
+        
+    Returns:
+        int: Number of vowel groups, less a silent final 'e', and at least one
+    """
+    # Count vowel groups as syllables
+    count = len(_VOWEL_GROUP_PATTERN.findall(word))
+    # Adjust for some common patterns
+    if word.endswith('e') and len(word) > 2 and word[-2] not in 'aeiou':
+        count -= 1
+    if count == 0:
+        count = 1
+    return count
+
+def scan_text(text: str) -> ScannedText:
+    """
+    Tokenize a text for reading statistics in a single pass.
+    
+    Words are \\b\\w+\\b runs; a sentence is any stretch between runs of
+    '.', '!' or '?' that contains a visible character. Syllable counts come
+    from the memoized count_syllables.
+    
+    Args:
+        text (str): The text to analyze
+        
+    Returns:
+        ScannedText: Words, their syllable counts and sentence indexes, and the sentence count
+    """
+    words = []
+    syllables = []
+    sentence_ids = []
+    sentence_count = 0
+    in_sentence = False
     
-    # Remove duplicates while preserving order
-    unique_words = []
-    for word in difficult_words:
-        if word not in unique_words:
-            unique_words.append(word)
+    # Words repeat a lot within one text, so look each spelling up only once
+    seen: Dict[str, int] = {}
+    for word, stop in _STATS_TOKEN_PATTERN.findall(text):
+        if word:
+            count = seen.get(word)
+            if count is None:
+                count = seen[word] = count_syllables(word.lower())
+            words.append(word)
+            syllables.append(count)
+            sentence_ids.append(sentence_count)
+            in_sentence = True
+        elif stop:
+            if in_sentence:
+                sentence_count += 1
+                in_sentence = False
+        else:
+            in_sentence = True
+    if in_sentence:
+        sentence_count += 1
     
-    return unique_words
+    return ScannedText(words, syllables, sentence_ids, sentence_count)
 
 def calculate_reading_stats(text: str) -> Dict[str, Any]:
     """
@@ -58,27 +229,10 @@ def calculate_reading_stats(text: str) -> Dict[str, Any]:
     Returns:
         Dict: Reading statistics
     """
-    # Count words
-    words = re.findall(r'\b\w+\b', text)
-    word_count = len(words)
-    
-    # Count sentences
-    sentences = re.split(r'[.!?]+', text)
-    sentence_count = len([s for s in sentences if s.strip()])
-    
-    # Count syllables (very rough approximation)
-    syllable_count = 0
-    for word in words:
-        word = word.lower()
-        # Count vowel groups as syllables
-        vowel_groups = re.findall(r'[aeiouy]+', word)
-        count = len(vowel_groups)
-        # Adjust for some common patterns
-        if word.endswith('e') and len(word) > 2 and word[-2] not in 'aeiou':
-            count -= 1
-        if count == 0:
-            count = 1
-        syllable_count += count
+    scanned = scan_text(text)
+    word_count = len(scanned.words)
+    sentence_count = scanned.sentence_count
+    syllable_count = sum(scanned.syllables)
     
     # Calculate averages
     avg_words_per_sentence = word_count / max(1, sentence_count)
@@ -104,6 +258,85 @@ def calculate_reading_stats(text: str) -> Dict[str, Any]:
     
     return stats
 
+# Fields of calculate_reading_stats, as a NumPy record
+READING_STATS_DTYPE = np.dtype([
+    ("word_count", np.int64),
+    ("sentence_count", np.int64),
+    ("syllable_count", np.int64),
+    ("avg_words_per_sentence", np.float64),
+    ("avg_syllables_per_word", np.float64),
+    ("flesch_reading_ease", np.float64),
+    ("flesch_kincaid_grade", np.float64),
+])
+
+def _round_half_even(values: np.ndarray, digits: int) -> np.ndarray:
+    """
+    Round non-negative floats exactly like Python's round(value, digits).
+    
+    np.round scales by 10**digits first, which moves values sitting just below
+    a midpoint (39 / 20 is stored as 1.94999...) onto it. Here the comparison
+    with the midpoint is done on the exact product, kept as a sum of two floats.
+    """
+    scale = 10.0 ** digits
+    lower = np.floor(values * scale)
+    # Split each value in two halves so value * (2 * scale) is exact as high + low
+    spread = values * 134217729.0
+    high = spread - (spread - values)
+    low = values - high
+    difference = (high * (2 * scale) - (2 * lower + 1)) + low * (2 * scale)
+    rounded = lower + (difference > 0) + ((difference == 0) & (lower % 2 == 1))
+    return rounded / scale
+
+# Each visible stretch between runs of '.', '!' or '?' is one sentence
+_SENTENCE_PATTERN = re.compile(r'[^.!?\s][^.!?]*')
+
+def calculate_reading_stats_batch(texts: Iterable[str]) -> np.recarray:
+    """
+    Calculate reading statistics for many texts at once.
+    
+    The texts are tokenized into one flat array of per-word syllable counts
+    with a parallel array of owning text ids, using only C-level regex calls
+    and one syllable lookup per distinct word in the corpus. Totals are
+    bincount reductions and the readability formulas run over whole columns.
+    Values match calculate_reading_stats text for text. Wrap the result in
+    pandas.DataFrame for a table.
+    
+    Args:
+        texts (Iterable[str]): The texts to analyze
+        
+    Returns:
+        np.recarray: One record per text with the fields of calculate_reading_stats
+    """
+    texts = list(texts)
+    word_lists = [_WORD_PATTERN.findall(text) for text in texts]
+    words = list(chain.from_iterable(word_lists))
+    counts = {word: count_syllables(word.lower()) for word in set(words)}
+    syllables = np.fromiter(map(counts.__getitem__, words), dtype=np.int64, count=len(words))
+    
+    count = len(texts)
+    word_counts = np.fromiter(map(len, word_lists), dtype=np.int64, count=count)
+    text_ids = np.repeat(np.arange(count), word_counts)
+    syllable_counts = np.bincount(text_ids, weights=syllables, minlength=count).astype(np.int64)
+    sentence_array = np.fromiter((len(_SENTENCE_PATTERN.findall(text)) for text in texts), dtype=np.int64, count=count)
+    
+    # Calculate averages
+    avg_words_per_sentence = word_counts / np.maximum(1, sentence_array)
+    avg_syllables_per_word = syllable_counts / np.maximum(1, word_counts)
+    
+    # Calculate readability scores (simplified Flesch-Kincaid), clamped as in calculate_reading_stats
+    flesch_reading_ease = np.clip(206.835 - (1.015 * avg_words_per_sentence) - (84.6 * avg_syllables_per_word), 0, 100)
+    flesch_kincaid_grade = np.clip((0.39 * avg_words_per_sentence) + (11.8 * avg_syllables_per_word) - 15.59, 0, 12)
+    
+    stats = np.recarray(count, dtype=READING_STATS_DTYPE)
+    stats.word_count = word_counts
+    stats.sentence_count = sentence_array
+    stats.syllable_count = syllable_counts
+    stats.avg_words_per_sentence = _round_half_even(avg_words_per_sentence, 1)
+    stats.avg_syllables_per_word = _round_half_even(avg_syllables_per_word, 2)
+    stats.flesch_reading_ease = _round_half_even(flesch_reading_ease, 1)
+    stats.flesch_kincaid_grade = _round_half_even(flesch_kincaid_grade, 1)
+    return stats
+
 def format_word_for_display(word: str) -> str:
     """
     Format a word for display with syllable breaks.
@@ -115,18 +348,4 @@ def format_word_for_display(word: str) -> str:
         str: Formatted word with syllable breaks
     """
     # This is a simplified approach - a real implementation would use a dictionary
-    vowels = 'aeiouy'
-    syllables = []
-    current = ""
-    
-    for i, char in enumerate(word):
-        current += char
-        if char.lower() in vowels and i < len(word) - 1 and word[i+1].lower() not in vowels:
-            syllables.append(current)
-            current = ""
-    
-    if current:
-        syllables.append(current)
-    
-    # Join with dots
-    return "·".join(syllables) 
\ No newline at end of file
+    return syllabify(word) 
\ No newline at end of file
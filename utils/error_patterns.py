@@ -0,0 +1,139 @@
+import logging
+from typing import Any, Dict, FrozenSet, Iterable, List
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+VOWELS = frozenset("aeiou")
+CONSONANTS = frozenset("bcdfghjklmnpqrstvwxyz")
+
+
+class WordPattern:
+    """Precomputed spelling traps of one word, as character positions."""
+
+    __slots__ = ("word", "vowel_positions", "double_positions", "ie_ei_positions")
+
+    def __init__(self, word: str):
+        """
+        Scan a word once for its vowels, doubled consonants and ie/ei digraphs.
+
+        Args:
+            word (str): The lowercased word
+        """
+        self.word = word
+        self.vowel_positions: FrozenSet[int] = frozenset(i for i, char in enumerate(word) if char in VOWELS)
+        doubles = set()
+        digraphs = set()
+        for i in range(len(word) - 1):
+            pair = word[i:i + 2]
+            if pair[0] == pair[1] and pair[0] in CONSONANTS:
+                doubles.update((i, i + 1))
+            elif pair in ("ie", "ei"):
+                digraphs.update((i, i + 1))
+        self.double_positions: FrozenSet[int] = frozenset(doubles)
+        self.ie_ei_positions: FrozenSet[int] = frozenset(digraphs)
+
+
+class ErrorPatternIndex:
+    """
+    Word patterns for every target word, built once and looked up per answer.
+
+    Classifying an answer is then a lookup of the target's pattern plus a
+    comparison of the positions the diff marked as wrong. Words that are not in
+    the index are scanned per call and not kept, so targets sent by clients
+    cannot grow the index.
+    """
+
+    def __init__(self, words: Iterable[str] = ()):
+        """
+        Initialize the index.
+
+        Args:
+            words (Iterable[str]): Target words to index up front
+        """
+        self._patterns: Dict[str, WordPattern] = {}
+        self.add(words)
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def add(self, words: Iterable[str]) -> int:
+        """
+        Index target words.
+
+        Args:
+            words (Iterable[str]): Words to index
+
+        Returns:
+            int: Number of words that were not indexed yet
+        """
+        added = 0
+        for word in words:
+            key = (word or "").strip().lower()
+            if key and key not in self._patterns:
+                self._patterns[key] = WordPattern(key)
+                added += 1
+        return added
+
+    def get(self, word: str) -> WordPattern:
+        """
+        Get the pattern of a word, scanning it without storing on a miss.
+
+        Args:
+            word (str): The target word
+
+        Returns:
+            WordPattern: The word's pattern
+        """
+        key = (word or "").strip().lower()
+        pattern = self._patterns.get(key)
+        return pattern if pattern is not None else WordPattern(key)
+
+    def classify(self, target: str, comparison: List[Dict[str, Any]]) -> Dict[str, bool]:
+        """
+        Classify the errors of a spelling attempt.
+
+        Args:
+            target (str): The correct spelling
+            comparison (List[Dict]): Output of utils.text_diff.spelling_comparison;
+                each wrong item carries the target "index" it applies to
+
+        Returns:
+            Dict[str, bool]: Flags for transposed, vowel, double_consonant and ie_ei errors
+        """
+        pattern = self.get(target)
+        word = pattern.word
+        flags = {"transposed": False, "vowel": False, "double_consonant": False, "ie_ei": False}
+
+        for item in comparison:
+            status = item["status"]
+            if status == "correct":
+                continue
+            index = item.get("index", -1)
+            typed = item.get("user_char", "").lower()
+            if status == "transposed":
+                flags["transposed"] = True
+                touched = (index, index + 1)
+            elif status == "extra":
+                # An extra letter sits between two target letters; check what it did to them
+                neighbours = (index - 1, index)
+                if typed in CONSONANTS and any(0 <= i < len(word) and word[i] == typed for i in neighbours):
+                    # The user doubled a single consonant
+                    flags["double_consonant"] = True
+                if typed in ("i", "e") and any(i in pattern.ie_ei_positions for i in neighbours):
+                    flags["ie_ei"] = True
+                touched = ()
+            else:
+                touched = (index,)
+
+            if any(i in pattern.vowel_positions for i in touched) or any(char in VOWELS for char in typed):
+                flags["vowel"] = True
+            if any(i in pattern.double_positions for i in touched):
+                flags["double_consonant"] = True
+            if any(i in pattern.ie_ei_positions for i in touched):
+                flags["ie_ei"] = True
+        return flags
+
+
+# Process-wide index shared by every spelling checker
+error_index = ErrorPatternIndex()
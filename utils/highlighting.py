@@ -0,0 +1,192 @@
+import html
+import logging
+import re
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Tuple
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_CSS_CLASS = "highlighted-word"
+
+# Words as \b sees them
+_TOKEN_PATTERN = re.compile(r"\w+")
+# Characters that join the tokens of one word: apostrophes in contractions and
+# hyphens (ASCII, Unicode hyphen, non-breaking hyphen) in compounds like "e-mail"
+_JOINERS = ("'", "’", "-", "\u2010", "\u2011")
+
+
+class WordHighlighter:
+    """
+    Highlights a fixed set of words and phrases in text.
+
+    The set is compiled once into an Aho-Corasick automaton whose alphabet is
+    lowercased word tokens, so matching is a single pass over the tokens of the
+    text regardless of how many words are in the set. Because matching works on
+    whole tokens, word boundaries behave like ``\\b`` in a regex. Phrases (and
+    contractions and hyphenated words, which tokenize as several words) match
+    only when their words are separated by whitespace, an apostrophe or a
+    hyphen in the text.
+    """
+
+    def __init__(self, words: Iterable[str]):
+        """
+        Build the automaton.
+
+        Args:
+            words (Iterable[str]): Words or phrases to highlight; case is ignored
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._lengths: List[Tuple[int, ...]] = [()]
+        self.size = 0
+
+        for word in words:
+            tokens = [token.lower() for token in _TOKEN_PATTERN.findall(word or "")]
+            if tokens:
+                self._add(tokens)
+        self._fail = self._link()
+
+    def highlight(self, text: str, css_class: str = DEFAULT_CSS_CLASS) -> str:
+        """
+        Wrap every occurrence of the words in a span, escaping the rest as HTML.
+
+        Overlapping matches are resolved leftmost-longest, so "ice cream" wins
+        over "cream" when both are in the set.
+
+        Args:
+            text (str): Plain text to highlight
+            css_class (str): Class of the wrapping span
+
+        Returns:
+            str: HTML-safe text with highlighted words
+        """
+        spans = self.find(text)
+        if not spans:
+            return html.escape(text)
+
+        opening = f'<span class="{html.escape(css_class)}">'
+        parts = []
+        position = 0
+        for start, end in spans:
+            parts.append(html.escape(text[position:start]))
+            parts.append(opening)
+            parts.append(html.escape(text[start:end]))
+            parts.append("</span>")
+            position = end
+        parts.append(html.escape(text[position:]))
+        return "".join(parts)
+
+    def find(self, text: str) -> List[Tuple[int, int]]:
+        """
+        Find the character spans of all non-overlapping matches.
+
+        Args:
+            text (str): Text to search
+
+        Returns:
+            List[Tuple[int, int]]: (start, end) offsets in ascending order
+        """
+        if not self.size or not text:
+            return []
+
+        goto, fail, lengths = self._goto, self._fail, self._lengths
+        bounds = []
+        candidates = []
+        node = 0
+        for index, match in enumerate(_TOKEN_PATTERN.finditer(text)):
+            bounds.append(match.span())
+            token = match.group().lower()
+            while node and token not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(token, 0)
+            for length in lengths[node]:
+                candidates.append((index - length + 1, index))
+
+        # Leftmost-longest, skipping phrases split by punctuation
+        candidates.sort(key=lambda candidate: (candidate[0], -candidate[1]))
+        spans = []
+        last = -1
+        for first, final in candidates:
+            if first <= last or not self._contiguous(text, bounds, first, final):
+                continue
+            spans.append((bounds[first][0], bounds[final][1]))
+            last = final
+        return spans
+
+    def _add(self, tokens: List[str]) -> None:
+        """Insert one tokenized pattern into the trie."""
+        node = 0
+        for token in tokens:
+            child = self._goto[node].get(token)
+            if child is None:
+                child = len(self._goto)
+                self._goto[node][token] = child
+                self._goto.append({})
+                self._lengths.append(())
+            node = child
+        if len(tokens) not in self._lengths[node]:
+            self._lengths[node] += (len(tokens),)
+            self.size += 1
+
+    def _link(self) -> List[int]:
+        """Compute failure links breadth first and merge outputs along them."""
+        fail = [0] * len(self._goto)
+        queue = list(self._goto[0].values())
+        for node in queue:
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                target = fail[node]
+                while target and token not in self._goto[target]:
+                    target = fail[target]
+                fallback = self._goto[target].get(token, 0)
+                fail[child] = fallback if fallback != child else 0
+                self._lengths[child] += tuple(
+                    length for length in self._lengths[fail[child]] if length not in self._lengths[child]
+                )
+        return fail
+
+    @staticmethod
+    def _contiguous(text: str, bounds: List[Tuple[int, int]], first: int, final: int) -> bool:
+        """Check that the tokens of a phrase match are separated only by whitespace or one joiner."""
+        for index in range(first, final):
+            gap = text[bounds[index][1]:bounds[index + 1][0]]
+            if not gap.isspace() and gap not in _JOINERS:
+                return False
+        return True
+
+
+@lru_cache(maxsize=128)
+def _compiled(words: FrozenSet[str]) -> WordHighlighter:
+    """Build and cache the highlighter for one word set."""
+    return WordHighlighter(words)
+
+
+def get_highlighter(words: Iterable[str]) -> WordHighlighter:
+    """
+    Get the highlighter for a set of words, building it on first use.
+
+    Highlighters are cached by the set of lowercased words, so repeated
+    requests with the same difficult words reuse the compiled automaton.
+
+    Args:
+        words (Iterable[str]): Words or phrases to highlight
+
+    Returns:
+        WordHighlighter: The shared highlighter
+    """
+    return _compiled(frozenset(word.strip().lower() for word in words if word and word.strip()))
+
+
+def highlight_words(text: str, words: Iterable[str], css_class: str = DEFAULT_CSS_CLASS) -> str:
+    """
+    Highlight words in text with a cached highlighter.
+
+    Args:
+        text (str): Plain text to highlight
+        words (Iterable[str]): Words or phrases to highlight
+        css_class (str): Class of the wrapping span
+
+    Returns:
+        str: HTML-safe text with highlighted words
+    """
+    return get_highlighter(words).highlight(text, css_class)
@@ -0,0 +1,438 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, Optional
+
+from utils.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Default cap on upstream calls in flight across every client in the process
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+
+# Default per-call deadline in seconds
+DEFAULT_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "15"))
+
+
+class _StubResponse:
+    """Mimics the ``.text`` attribute of a Gemini response."""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class StubBackend:
+    """
+    An offline stand-in for ``genai.GenerativeModel``.
+
+    Returns canned JSON shaped like the real prompts expect after a configurable
+    delay, so the request path can be load-tested without an API key or quota.
+    """
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.1, error_rate: float = 0.0):
+        """
+        Initialize the stub backend.
+
+        Args:
+            latency (float): Mean response time in seconds
+            jitter (float): Maximum random deviation from the mean, in seconds
+            error_rate (float): Fraction of calls that raise an error
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+
+    def generate_content(self, prompt: str, stream: bool = False) -> Any:
+        """
+        Produce a canned response for a prompt.
+
+        Args:
+            prompt (str): The prompt that would be sent to the model
+            stream (bool): Return an iterator of partial responses instead
+
+        Returns:
+            _StubResponse: Object with a ``text`` attribute, like the real SDK,
+                or an iterator of them when streaming
+        """
+        if stream:
+            return self._stream(prompt)
+        time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+        if self.error_rate and random.random() < self.error_rate:
+            raise RuntimeError("Stub backend simulated an upstream error")
+        return _StubResponse(self._respond(prompt))
+
+    def _stream(self, prompt: str) -> Iterator[_StubResponse]:
+        """Yield the canned response a few words at a time, spread over the latency."""
+        if self.error_rate and random.random() < self.error_rate:
+            raise RuntimeError("Stub backend simulated an upstream error")
+        words = re.findall(r"\S+\s*", self._respond(prompt))
+        chunks = ["".join(words[i:i + 4]) for i in range(0, len(words), 4)]
+        for chunk in chunks:
+            time.sleep(max(0.0, self.latency / len(chunks)))
+            yield _StubResponse(chunk)
+
+    def _respond(self, prompt: str) -> str:
+        """Build a response matching the kind of exercise the prompt asks for."""
+        tag = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:6]
+        lowered = prompt.lower()
+        passage_text = (
+            "The team gathered early in the morning. Everyone was ready to learn something new. "
+            "They worked together and shared their ideas. By the end of the day, they had "
+            "discovered how much they could do as a group."
+        )
+
+        if "title on the first line" in lowered:
+            return f"Stub Passage {tag}\n\n{passage_text}"
+        if "json array" in lowered:
+            # Batch prompt: answer every numbered request the requested number of times
+            requests = re.findall(r"^\s*(\d+)\. ", prompt, re.MULTILINE)
+            per_request = re.search(r"(\d+) for each", prompt)
+            count = int(per_request.group(1)) if per_request else 1
+            data = [
+                {"request": int(number), "title": f"Stub Passage {tag}-{number}-{i + 1}", "passage": passage_text}
+                for number in requests
+                for i in range(count)
+            ]
+        elif "spelling exercise" in lowered:
+            data = {
+                "instruction": "Listen to the word and type it correctly.",
+                "target_word": "adventure",
+                "hint": "An exciting experience",
+                "audio_url": None
+            }
+        elif "grammar exercise" in lowered:
+            data = {
+                "instruction": "Choose the correct word to complete the sentence: The team ___ winning.",
+                "options": ["is", "are", "am"],
+                "correct_answer": "is",
+                "explanation": "We use 'is' with a singular collective noun like 'team'."
+            }
+        elif "sentence structure exercise" in lowered:
+            data = {
+                "instruction": "Put these words in the correct order to make a sentence: ran, dog, the",
+                "words": ["ran", "dog", "the"],
+                "correct_answer": "The dog ran",
+                "explanation": "The subject comes before the verb."
+            }
+        else:
+            data = {"title": f"Stub Passage {tag}", "passage": passage_text, "text": passage_text}
+
+        return f"```json\n{json.dumps(data)}\n```"
+
+
+class _Runtime:
+    """A background event loop shared by every client in the process."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """Get the running loop, starting its thread on first use."""
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="llm-client-loop", daemon=True)
+                thread.start()
+                self._loop = loop
+            return self._loop
+
+    def semaphore(self) -> asyncio.Semaphore:
+        """Get the process-wide semaphore. Must be called on the loop thread."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(DEFAULT_MAX_CONCURRENCY)
+        return self._semaphore
+
+
+_runtime = _Runtime()
+
+
+class _SharedStream:
+    """One upstream stream, replayed from the start to every reader that joins while it runs."""
+
+    def __init__(self):
+        self.chunks = []
+        self.finished = False
+        self.error: Optional[Exception] = None
+        self.readers = 1
+        self.cancelled = threading.Event()
+        self.changed = threading.Condition()
+
+    def put(self, kind: str, value: Any) -> None:
+        """Record a chunk, an error or the end of the stream and wake the readers."""
+        with self.changed:
+            if kind == "chunk":
+                self.chunks.append(value)
+            else:
+                self.error = value if kind == "error" else None
+                self.finished = True
+            self.changed.notify_all()
+
+
+class LLMClient:
+    """
+    A non-blocking wrapper around a model with a ``generate_content`` method.
+
+    Calls run on a background asyncio loop. Each call has a deadline, the number
+    of upstream calls in flight is capped by a semaphore, and identical prompts
+    issued concurrently share a single upstream call. With a circuit breaker
+    attached, calls fail fast with CircuitOpenError while the upstream is unhealthy.
+    """
+
+    def __init__(self, backend: Any, timeout: Optional[float] = None, max_concurrency: Optional[int] = None,
+                 breaker: Optional[CircuitBreaker] = None):
+        """
+        Initialize the client.
+
+        Args:
+            backend (Any): Object with a blocking ``generate_content(prompt)`` method
+            timeout (float, optional): Per-call deadline in seconds, defaults to LLM_TIMEOUT
+            max_concurrency (int, optional): Private in-flight cap for this client;
+                by default all clients share the process-wide LLM_MAX_CONCURRENCY cap
+            breaker (CircuitBreaker, optional): Breaker fed with every upstream outcome
+        """
+        self.backend = backend
+        self.breaker = breaker
+        self.timeout = timeout if timeout is not None else DEFAULT_TIMEOUT
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._streams: Dict[str, _SharedStream] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=(max_concurrency or DEFAULT_MAX_CONCURRENCY) * 2,
+            thread_name_prefix="llm-client"
+        )
+        self._stats_lock = threading.Lock()
+        self._stats = {"calls": 0, "upstream_calls": 0, "coalesced": 0, "timeouts": 0, "errors": 0, "rejected": 0}
+
+    def available(self) -> bool:
+        """
+        Check whether calls are currently expected to go upstream.
+
+        Returns:
+            bool: False when there is no backend or the circuit is open
+        """
+        if self.backend is None:
+            return False
+        return self.breaker is None or self.breaker.state != CircuitBreaker.OPEN
+
+    def generate(self, prompt: str, timeout: Optional[float] = None) -> str:
+        """
+        Generate a response from a blocking context such as a Flask view.
+
+        Args:
+            prompt (str): The prompt to send
+            timeout (float, optional): Deadline for this call, overriding the default
+
+        Returns:
+            str: The response text
+
+        Raises:
+            TimeoutError: If the deadline passes before the model responds
+            CircuitOpenError: If the circuit breaker is rejecting calls
+        """
+        future = asyncio.run_coroutine_threadsafe(self.agenerate(prompt, timeout), _runtime.loop())
+        return future.result()
+
+    async def agenerate(self, prompt: str, timeout: Optional[float] = None) -> str:
+        """
+        Generate a response from a coroutine running on the client's loop.
+
+        Args:
+            prompt (str): The prompt to send
+            timeout (float, optional): Deadline for this call, overriding the default
+
+        Returns:
+            str: The response text
+
+        Raises:
+            TimeoutError: If the deadline passes before the model responds
+            CircuitOpenError: If the circuit breaker is rejecting calls
+        """
+        deadline = timeout if timeout is not None else self.timeout
+        self._count("calls")
+
+        task = self._inflight.get(prompt)
+        if task is None:
+            # Coalesced callers ride on an already admitted call, so only new
+            # upstream calls ask the breaker
+            if self.breaker is not None and not self.breaker.allow_request():
+                self._count("rejected")
+                raise CircuitOpenError(f"Circuit '{self.breaker.name}' is open")
+            task = asyncio.ensure_future(self._call_upstream(prompt))
+            self._inflight[prompt] = task
+            task.add_done_callback(lambda _: self._inflight.pop(prompt, None))
+        else:
+            self._count("coalesced")
+
+        try:
+            # Shield the shared task so one caller's deadline does not cancel it
+            # for the other callers waiting on the same prompt
+            return await asyncio.wait_for(asyncio.shield(task), deadline)
+        except asyncio.TimeoutError:
+            self._count("timeouts")
+            raise TimeoutError(f"LLM call exceeded its {deadline:.1f}s deadline")
+
+    def stream(self, prompt: str, timeout: Optional[float] = None) -> Iterator[str]:
+        """
+        Stream a response chunk by chunk from a blocking context.
+
+        Identical prompts streamed concurrently share one upstream stream; a
+        caller that joins late first gets the chunks already received. Streams
+        count against the in-flight cap and feed the circuit breaker like any
+        other call.
+
+        Args:
+            prompt (str): The prompt to send
+            timeout (float, optional): Deadline for the whole stream, overriding the default
+
+        Returns:
+            Iterator[str]: Text chunks in the order the model produces them
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is rejecting calls
+        """
+        self._count("calls")
+        with self._stats_lock:
+            shared = self._streams.get(prompt)
+            if shared is not None:
+                shared.readers += 1
+                self._stats["coalesced"] += 1
+        if shared is None:
+            # Coalesced callers ride on an already admitted stream, so only new
+            # upstream streams ask the breaker
+            if self.breaker is not None and not self.breaker.allow_request():
+                self._count("rejected")
+                raise CircuitOpenError(f"Circuit '{self.breaker.name}' is open")
+            shared = _SharedStream()
+            with self._stats_lock:
+                self._streams[prompt] = shared
+            asyncio.run_coroutine_threadsafe(self._stream_upstream(prompt, shared), _runtime.loop())
+        return self._read_stream(prompt, shared, timeout if timeout is not None else self.timeout)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get client counters.
+
+        Returns:
+            Dict: Call, coalescing, timeout and error counters
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._inflight) + len(self._streams)
+        return stats
+
+    async def _call_upstream(self, prompt: str) -> str:
+        """Run the blocking backend call on a worker thread under the semaphore."""
+        async with self._get_semaphore():
+            self._count("upstream_calls")
+            loop = asyncio.get_running_loop()
+            started = time.perf_counter()
+            try:
+                # Bound how long a hung upstream call can hold a semaphore slot
+                response = await asyncio.wait_for(
+                    loop.run_in_executor(self._executor, self.backend.generate_content, prompt),
+                    self.timeout
+                )
+                text = response.text
+            except Exception as e:
+                self._count("errors")
+                if self.breaker is not None:
+                    self.breaker.record_failure(time.perf_counter() - started)
+                logger.error(f"LLM call failed: {e}")
+                raise
+            if self.breaker is not None:
+                self.breaker.record_success(time.perf_counter() - started)
+            return text
+
+    def _read_stream(self, prompt: str, shared: _SharedStream, deadline: float) -> Iterator[str]:
+        """Yield the shared stream's chunks until it finishes, fails or the deadline passes."""
+        expires_at = time.monotonic() + deadline
+        position = 0
+        try:
+            while True:
+                with shared.changed:
+                    while position == len(shared.chunks) and not shared.finished:
+                        remaining = expires_at - time.monotonic()
+                        if remaining <= 0:
+                            self._count("timeouts")
+                            raise TimeoutError(f"LLM stream exceeded its {deadline:.1f}s deadline")
+                        shared.changed.wait(remaining)
+                    chunks = shared.chunks[position:]
+                    finished, error = shared.finished, shared.error
+                position += len(chunks)
+                yield from chunks
+                if error is not None:
+                    raise error
+                if finished:
+                    return
+        finally:
+            # Stop pulling from upstream once every reader went away early
+            with self._stats_lock:
+                shared.readers -= 1
+                if shared.readers == 0:
+                    shared.cancelled.set()
+                    self._forget_stream(prompt, shared)
+
+    def _forget_stream(self, prompt: str, shared: _SharedStream) -> None:
+        """Stop offering a stream to new callers. Caller holds the stats lock."""
+        if self._streams.get(prompt) is shared:
+            del self._streams[prompt]
+
+    async def _stream_upstream(self, prompt: str, shared: _SharedStream) -> None:
+        """Pump a streaming backend call into ``shared`` under the semaphore."""
+        try:
+            async with self._get_semaphore():
+                self._count("upstream_calls")
+                loop = asyncio.get_running_loop()
+                started = time.perf_counter()
+                try:
+                    await asyncio.wait_for(
+                        loop.run_in_executor(self._executor, self._pump_stream, prompt, shared),
+                        self.timeout
+                    )
+                except Exception as e:
+                    shared.cancelled.set()
+                    self._count("errors")
+                    if self.breaker is not None:
+                        self.breaker.record_failure(time.perf_counter() - started)
+                    logger.error(f"LLM stream failed: {e}")
+                    shared.put("error", e)
+                    return
+                if self.breaker is not None:
+                    self.breaker.record_success(time.perf_counter() - started)
+                shared.put("done", None)
+        finally:
+            with self._stats_lock:
+                self._forget_stream(prompt, shared)
+
+    def _pump_stream(self, prompt: str, shared: _SharedStream) -> None:
+        """Iterate the backend's streaming response on a worker thread."""
+        for chunk in self.backend.generate_content(prompt, stream=True):
+            if shared.cancelled.is_set():
+                return
+            text = chunk.text
+            if text:
+                shared.put("chunk", text)
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Get the semaphore that caps this client's in-flight calls."""
+        if self.max_concurrency is None:
+            return _runtime.semaphore()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _count(self, name: str) -> None:
+        """Increment a counter."""
+        with self._stats_lock:
+            self._stats[name] += 1
@@ -0,0 +1,330 @@
+import json
+import logging
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+FENCE = "```"
+
+# Required fields per response type: ((accepted names, expected type), ...).
+# A field with several names is satisfied by any one of them.
+SCHEMAS: Dict[str, Tuple[Tuple[Tuple[str, ...], type], ...]] = {
+    "passage": ((("title",), str), (("text", "passage"), str)),
+    "spelling": ((("instruction",), str), (("target_word",), str), (("hint",), str)),
+    "grammar": ((("instruction",), str), (("options",), list), (("correct_answer",), str)),
+    "sentence_structure": ((("instruction",), str), (("words",), list), (("correct_answer",), str)),
+}
+
+_decoder = json.JSONDecoder()
+_metrics_lock = threading.Lock()
+_metrics: Dict[str, Dict[str, Any]] = {}
+
+
+class ParseError(ValueError):
+    """Raised when a model response cannot be turned into the expected structure."""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+def _payload_bounds(text: str) -> Tuple[int, int]:
+    """
+    Locate the region of a response that should hold the payload.
+
+    If the response has a markdown fence the region is the body of the first
+    fence (running to the end of the text if the closing fence was cut off);
+    otherwise it is the whole response. A language tag after the opening fence
+    is left in place, since the JSON search skips it anyway. Only indices are
+    returned, nothing is copied.
+    """
+    fence = text.find(FENCE)
+    if fence == -1:
+        return 0, len(text)
+    start = fence + len(FENCE)
+    end = text.find(FENCE, start)
+    return start, end if end != -1 else len(text)
+
+
+def _json_start(text: str, start: int, end: int) -> int:
+    """Index of the first '{' or '[' in text[start:end], or -1."""
+    brace = text.find("{", start, end)
+    bracket = text.find("[", start, end)
+    if brace == -1:
+        return bracket
+    if bracket == -1:
+        return brace
+    return min(brace, bracket)
+
+
+def decode_json(response_text: str) -> Any:
+    """
+    Decode the first JSON value in a model response.
+
+    The decoder runs directly on the original string from the first '{' or '['
+    inside the payload region, so fenced, prose-wrapped and trailing-text
+    responses all parse without intermediate string copies.
+
+    Args:
+        response_text (str): Raw response text from the model
+
+    Returns:
+        Any: The decoded JSON value
+
+    Raises:
+        ParseError: If no JSON value can be decoded
+    """
+    start, end = _payload_bounds(response_text)
+    index = _json_start(response_text, start, end)
+    if index == -1:
+        raise ParseError("no_json", "No JSON object or array found in model response")
+    try:
+        value, _ = _decoder.raw_decode(response_text, index)
+    except ValueError as e:
+        raise ParseError("invalid_json", f"Invalid JSON in model response: {e}") from e
+    return value
+
+
+def validate(data: Any, schema: str) -> Dict[str, Any]:
+    """
+    Check a decoded response against a response-type schema.
+
+    Args:
+        data (Any): Decoded JSON
+        schema (str): One of the SCHEMAS keys
+
+    Returns:
+        Dict: The data, unchanged
+
+    Raises:
+        ParseError: If the data is not an object or a required field is missing,
+            empty or of the wrong type
+    """
+    if not isinstance(data, dict):
+        raise ParseError("not_object", f"Expected a JSON object for {schema}, got {type(data).__name__}")
+    for names, expected in SCHEMAS[schema]:
+        for name in names:
+            value = data.get(name)
+            if value is not None:
+                break
+        if value is None:
+            raise ParseError("missing_field", f"{schema} response is missing '{names[0]}'")
+        if not isinstance(value, expected) or not value:
+            raise ParseError("bad_field", f"{schema} response has an invalid '{names[0]}'")
+    return data
+
+
+def parse_llm_response(response_text: str, schema: str, allow_plain_text: bool = False) -> Dict[str, Any]:
+    """
+    Parse and validate a model response of a known type.
+
+    Args:
+        response_text (str): Raw response text from the model
+        schema (str): Response type: passage, spelling, grammar or sentence_structure
+        allow_plain_text (bool): For passages, fall back to reading a plain-text
+            "Title: ... Text: ..." (or title-then-blank-line) response
+
+    Returns:
+        Dict: The validated response
+
+    Raises:
+        ParseError: If the response cannot be parsed or fails validation
+    """
+    if schema not in SCHEMAS:
+        raise KeyError(f"Unknown response schema: {schema}")
+
+    try:
+        data = validate(decode_json(response_text), schema)
+    except ParseError as e:
+        if not (allow_plain_text and schema == "passage"):
+            _record(schema, e.reason)
+            raise
+        logger.info(f"Falling back to plain-text passage parsing: {e}")
+        fallback = _parse_plain_passage(response_text)
+        if fallback is None:
+            _record(schema, e.reason)
+            raise
+        _record(schema, "fallback")
+        return fallback
+
+    _record(schema, "ok")
+    return data
+
+
+def parse_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Get parse outcome counters per response type.
+
+    Returns:
+        Dict: For each schema, counts of "ok", "fallback" and failure reasons
+    """
+    with _metrics_lock:
+        return {schema: dict(counts) for schema, counts in _metrics.items()}
+
+
+def _record(schema: str, outcome: str) -> None:
+    """Count one parse outcome."""
+    with _metrics_lock:
+        counts = _metrics.setdefault(schema, {})
+        counts[outcome] = counts.get(outcome, 0) + 1
+
+
+def _parse_plain_passage(response_text: str) -> Optional[Dict[str, str]]:
+    """Read a passage that came back as plain text instead of JSON."""
+    start, end = _payload_bounds(response_text)
+    title_at = response_text.find("Title:", start, end)
+    text_at = response_text.find("Text:", title_at + 1 if title_at != -1 else start, end)
+    if title_at != -1 and text_at != -1:
+        # Drop markdown emphasis around labels such as "**Title:**"
+        title = response_text[title_at + len("Title:"):text_at].strip().strip("*_# ").strip()
+        text = response_text[text_at + len("Text:"):end].strip().lstrip("*_ ").strip()
+    else:
+        # Best guess: a title line followed by a blank line and the body
+        body = response_text[start:end].strip()
+        split_at = body.find("\n\n")
+        if split_at == -1:
+            title, text = "Interesting Facts", body
+        else:
+            title, text = body[:split_at].strip(), body[split_at + 2:].strip()
+    if not text:
+        return None
+    return {"title": title or "Interesting Facts", "text": text}
+
+
+def parse_json_array(response_text: str) -> List[Any]:
+    """
+    Parse a JSON array from a model response, salvaging what it can.
+
+    A well-formed array is returned as is, and an object wrapping a single list
+    value (e.g. ``{"passages": [...]}``) is unwrapped. If the array is cut off
+    or has a broken element, every complete element before the damage is
+    returned instead of failing the whole batch.
+
+    Args:
+        response_text (str): Raw response text from the model
+
+    Returns:
+        List: The parsed elements, possibly empty
+
+    Raises:
+        ValueError: If the response contains no JSON array at all
+    """
+    try:
+        data = decode_json(response_text)
+    except ParseError:
+        data = None
+
+    if isinstance(data, list):
+        return data
+    if isinstance(data, dict):
+        lists = [value for value in data.values() if isinstance(value, list)]
+        if len(lists) == 1:
+            return lists[0]
+
+    start, end = _payload_bounds(response_text)
+    index = response_text.find("[", start, end)
+    if index == -1:
+        raise ValueError("No JSON array found in model response")
+
+    # Decode element by element so a truncated tail only loses its own items
+    items = []
+    index += 1
+    while index < end:
+        while index < end and response_text[index] in " \t\r\n,":
+            index += 1
+        if index >= end or response_text[index] == "]":
+            break
+        try:
+            item, index = _decoder.raw_decode(response_text, index)
+        except ValueError:
+            logger.warning(f"Dropping malformed tail of JSON array after {len(items)} items")
+            break
+        items.append(item)
+
+    return items
+
+
+class PassageStreamParser:
+    """
+    Incrementally split a streamed plain-text passage into title and body.
+
+    The streaming prompt asks for the title on the first line followed by the
+    passage text. Chunks are fed as they arrive; the title is emitted once its
+    line is complete and the body is emitted as deltas from then on. Markdown
+    emphasis and "Title:"/"Text:" labels that models like to add are dropped.
+    """
+
+    def __init__(self):
+        self.title: Optional[str] = None
+        self.text = ""
+        self._buffer = ""
+        self._body_started = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, str]]:
+        """
+        Consume a chunk of model output.
+
+        Args:
+            chunk (str): The next piece of streamed text
+
+        Returns:
+            List[Tuple[str, str]]: Events as ("title", title) or ("text", delta)
+        """
+        self._buffer += chunk
+        events = []
+
+        if self.title is None:
+            # Skip blank lines before the title
+            self._buffer = self._buffer.lstrip()
+            newline = self._buffer.find("\n")
+            if newline == -1:
+                return events
+            self.title = _clean_label(self._buffer[:newline], "title:")
+            self._buffer = self._buffer[newline + 1:]
+            events.append(("title", self.title))
+
+        if not self._body_started:
+            self._buffer = self._buffer.lstrip()
+            # Wait until a possible "Text:" label can be recognized
+            if len(self._buffer) < len("text:") and "\n" not in self._buffer:
+                return events
+            if self._buffer[:5].lower() == "text:":
+                self._buffer = self._buffer[5:].lstrip()
+            self._body_started = True
+
+        if self._buffer:
+            self.text += self._buffer
+            events.append(("text", self._buffer))
+            self._buffer = ""
+        return events
+
+    def close(self) -> List[Tuple[str, str]]:
+        """
+        Flush whatever is left once the stream ends.
+
+        Returns:
+            List[Tuple[str, str]]: Remaining events
+        """
+        events = []
+        if self.title is None:
+            # Single-line output: treat it as the body
+            self.title = "Reading Passage"
+            events.append(("title", self.title))
+            self._body_started = True
+        if self._buffer.strip():
+            delta = self._buffer if self._body_started else self._buffer.lstrip()
+            self.text += delta
+            events.append(("text", delta))
+        self._buffer = ""
+        self.text = self.text.rstrip()
+        return events
+
+
+def _clean_label(line: str, label: str) -> str:
+    """Strip markdown decoration and a leading label such as "Title:" from a line."""
+    cleaned = line.strip().strip("#*_ ").strip()
+    if cleaned.lower().startswith(label):
+        cleaned = cleaned[len(label):].strip().strip("*_ ").strip()
+    return cleaned
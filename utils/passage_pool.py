@@ -0,0 +1,214 @@
+import logging
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+
+class PassagePool:
+    """
+    A warm stock of pre-generated passages, refilled in the background.
+
+    Passages are kept in a bounded queue per (level, interest). Requests pop from
+    those queues in O(1) and never wait on the producer; every lookup counts as
+    demand for its queues, and the pool keeps each queue stocked in proportion to
+    how often it was asked for recently. At most ``max_keys`` (level, interest)
+    pairs are tracked; beyond that the least recently requested pair that is not
+    being refilled is forgotten along with its queued passages.
+    """
+
+    def __init__(self, producer: Callable[[str, str], Optional[Dict[str, Any]]], capacity: int = 3,
+                 max_workers: int = 2, demand_window: float = 600.0, max_keys: int = 256):
+        """
+        Initialize the pool.
+
+        Args:
+            producer (Callable): Called as producer(level, interest) on a worker
+                thread; returns a passage, or None if generation failed
+            capacity (int): Maximum number of passages queued per (level, interest)
+            max_workers (int): Number of background producer threads
+            demand_window (float): Seconds of request history used to size refills
+            max_keys (int): Maximum number of (level, interest) pairs tracked
+        """
+        self.producer = producer
+        self.capacity = capacity
+        self.demand_window = demand_window
+        self.max_keys = max_keys
+        self._queues: Dict[Tuple[str, str], deque] = {}
+        self._demand: Dict[Tuple[str, str], deque] = {}
+        # Original spelling of each tracked interest, least recently requested first
+        self._interests: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._refilling = set()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="passage-pool")
+        self._stats = {"hits": 0, "misses": 0, "produced": 0, "failed": 0, "evicted_keys": 0}
+
+    def take(self, level: str, interests: Iterable[str]) -> Optional[Dict[str, Any]]:
+        """
+        Pop a ready passage for the first interest that has one in stock.
+
+        Args:
+            level (str): Reading level
+            interests (Iterable[str]): Interests in order of preference
+
+        Returns:
+            Dict: A passage, or None if every matching queue is empty
+        """
+        keys = self._record_demand(level, interests)
+        passage = None
+        with self._lock:
+            for key in keys:
+                queue = self._queues.get(key)
+                if queue:
+                    passage = queue.popleft()
+                    break
+            self._stats["hits" if passage is not None else "misses"] += 1
+
+        self._schedule_refills(keys)
+        return passage
+
+    def prime(self, level: str, interests: Iterable[str]) -> None:
+        """
+        Signal upcoming demand so the queues start filling before the first request.
+
+        Args:
+            level (str): Reading level
+            interests (Iterable[str]): Interests that are about to be requested
+        """
+        self._schedule_refills(self._record_demand(level, interests))
+
+    def offer(self, level: str, interest: str, passage: Dict[str, Any]) -> bool:
+        """
+        Add an externally generated passage to a queue.
+
+        Args:
+            level (str): Reading level
+            interest (str): Interest the passage was written for
+            passage (Dict): The passage
+
+        Returns:
+            bool: True if the passage was queued, False if the queue is full
+        """
+        key = self._key(level, interest)
+        with self._lock:
+            self._track(key, interest)
+            queue = self._queues.setdefault(key, deque())
+            if len(queue) >= self.capacity:
+                return False
+            queue.append(passage)
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get pool counters.
+
+        Returns:
+            Dict: Hit/miss/production counters and the number of queued passages
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["queued"] = sum(len(queue) for queue in self._queues.values())
+            stats["refilling"] = len(self._refilling)
+            stats["keys"] = len(self._interests)
+        return stats
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the background producers.
+
+        Args:
+            wait (bool): Whether to wait for in-flight refills to finish
+        """
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+    def _key(self, level: str, interest: str) -> Tuple[str, str]:
+        """Normalize a (level, interest) pair into a queue key."""
+        return (level or "").strip().lower(), interest.strip().lower()
+
+    def _record_demand(self, level: str, interests: Iterable[str]) -> list:
+        """Timestamp a request against each interest's queue and return the keys."""
+        now = time.time()
+        keys = []
+        with self._lock:
+            for interest in interests:
+                # Sessions saved before interests were validated may hold other JSON values
+                if not isinstance(interest, str) or not interest.strip():
+                    continue
+                key = self._key(level, interest)
+                if key in keys:
+                    continue
+                keys.append(key)
+                self._track(key, interest)
+                history = self._demand.setdefault(key, deque(maxlen=self.capacity))
+                history.append(now)
+        return keys
+
+    def _track(self, key: Tuple[str, str], interest: str) -> None:
+        """Mark ``key`` as recently used and forget idle keys beyond max_keys. Caller holds the lock."""
+        self._interests.setdefault(key, interest)
+        self._interests.move_to_end(key)
+        if len(self._interests) <= self.max_keys:
+            return
+        for idle in list(self._interests):
+            if len(self._interests) <= self.max_keys:
+                break
+            if idle == key or idle in self._refilling:
+                continue
+            del self._interests[idle]
+            self._queues.pop(idle, None)
+            self._demand.pop(idle, None)
+            self._stats["evicted_keys"] += 1
+
+    def _target_depth(self, key: Tuple[str, str], now: float) -> int:
+        """Number of passages to keep queued for ``key``. Caller holds the lock."""
+        history = self._demand.get(key, ())
+        recent = sum(1 for stamp in history if now - stamp <= self.demand_window)
+        return min(self.capacity, max(1, recent))
+
+    def _schedule_refills(self, keys: Iterable[Tuple[str, str]]) -> None:
+        """Submit a refill job for every key that is below its target depth."""
+        now = time.time()
+        with self._lock:
+            for key in keys:
+                queue = self._queues.get(key)
+                depth = len(queue) if queue else 0
+                if key in self._refilling or depth >= self._target_depth(key, now):
+                    continue
+                self._refilling.add(key)
+                try:
+                    self._executor.submit(self._refill, key)
+                except RuntimeError:
+                    # Executor has been shut down
+                    self._refilling.discard(key)
+
+    def _refill(self, key: Tuple[str, str]) -> None:
+        """Produce passages for ``key`` until it reaches its target depth."""
+        level = key[0]
+        try:
+            while True:
+                with self._lock:
+                    interest = self._interests[key]
+                    queue = self._queues.setdefault(key, deque())
+                    if len(queue) >= self._target_depth(key, time.time()):
+                        return
+
+                try:
+                    passage = self.producer(level, interest)
+                except Exception as e:
+                    logger.error(f"Error pre-generating passage for {key}: {e}")
+                    passage = None
+
+                with self._lock:
+                    if passage is None:
+                        self._stats["failed"] += 1
+                        return
+                    self._stats["produced"] += 1
+                    if len(queue) < self.capacity:
+                        queue.append(passage)
+        finally:
+            with self._lock:
+                self._refilling.discard(key)
@@ -0,0 +1,198 @@
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from utils.data_processing import calculate_reading_stats, calculate_reading_stats_batch
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Model calls allowed per passage, first try included
+DEFAULT_MAX_ATTEMPTS = int(os.getenv("READABILITY_MAX_ATTEMPTS", "2"))
+
+# Accepted Flesch-Kincaid grades per reading level, for both apps' level names.
+# The bands overlap because the score is rough and clamps at grade 12.
+GRADE_BANDS: Dict[str, Tuple[float, float]] = {
+    "beginner": (0.0, 3.0),
+    "elementary": (0.0, 6.0),
+    "intermediate": (4.0, 11.0),
+    "advanced": (7.0, 12.0),
+    "expert": (9.0, 12.0),
+    "easy": (0.0, 5.0),
+    "medium": (4.0, 11.0),
+    "hard": (8.0, 12.0),
+}
+
+
+def passage_text(passage: Dict[str, Any]) -> str:
+    """Get the body of a passage in either app's format."""
+    return passage.get("text") or passage.get("passage") or ""
+
+
+class ReadabilityGate:
+    """
+    Accepts generated passages only when they read at the requested level.
+
+    A passage is scored with calculate_reading_stats and accepted when its
+    Flesch-Kincaid grade lies inside the level's band. Rejected passages are
+    regenerated until the attempt budget is spent; after that the candidate
+    closest to the band wins, whether it is one of the rejected generations or
+    a ready-made near match such as a cached or sample passage.
+    """
+
+    def __init__(self, bands: Optional[Dict[str, Tuple[float, float]]] = None,
+                 max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        """
+        Initialize the gate.
+
+        Args:
+            bands (Dict, optional): Grade band per level, defaults to GRADE_BANDS
+            max_attempts (int): Model calls allowed per passage, first try included
+        """
+        self.bands = dict(bands or GRADE_BANDS)
+        self.max_attempts = max(1, max_attempts)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def grade(self, text: str) -> float:
+        """Score a text's Flesch-Kincaid grade."""
+        return calculate_reading_stats(text)["flesch_kincaid_grade"]
+
+    def distance(self, level: str, grade: float) -> float:
+        """
+        How many grades a score lies outside the level's band.
+
+        Args:
+            level (str): Reading level
+            grade (float): Flesch-Kincaid grade
+
+        Returns:
+            float: 0 inside the band (or for levels without one), otherwise the gap to the nearest edge
+        """
+        band = self.bands.get(level)
+        if band is None:
+            return 0.0
+        low, high = band
+        return max(low - grade, grade - high, 0.0)
+
+    def check(self, level: str, passage: Dict[str, Any]) -> bool:
+        """
+        Score one passage and record the outcome without regenerating.
+
+        Args:
+            level (str): Requested reading level
+            passage (Dict): The passage
+
+        Returns:
+            bool: Whether the passage reads at the level
+        """
+        if level not in self.bands:
+            return True
+        accepted = self.distance(level, self.grade(passage_text(passage))) == 0
+        self._record(level, attempts=1, accepted=int(accepted), rejected=int(not accepted))
+        return accepted
+
+    def retry_hint(self, level: str, grade: float) -> str:
+        """
+        Describe how a rejected draft missed its band, for the next prompt.
+
+        Args:
+            level (str): Requested reading level
+            grade (float): Grade of the rejected draft
+
+        Returns:
+            str: One sentence asking for simpler or harder text
+        """
+        low, high = self.bands[level]
+        direction = "simpler words and shorter sentences" if grade > high else "richer vocabulary and longer sentences"
+        return (f"A previous draft read at grade {grade:.1f}, outside grades {low:.0f}-{high:.0f}. "
+                f"Use {direction}.")
+
+    def generate(self, level: str, produce: Callable[[Optional[str]], Optional[Dict[str, Any]]],
+                 near_matches: Iterable[Dict[str, Any]] = ()) -> Optional[Dict[str, Any]]:
+        """
+        Generate a passage that reads at the requested level.
+
+        Args:
+            level (str): Requested reading level
+            produce (Callable): Called as produce(hint) for each attempt; hint is
+                None first, then a retry_hint sentence to add to the prompt.
+                Returns a passage, or None when generation failed
+            near_matches (Iterable[Dict]): Ready passages to fall back on when
+                no generation is accepted
+
+        Returns:
+            Dict: An accepted passage, else the candidate closest to the band,
+                or None if the first call failed
+        """
+        if level not in self.bands:
+            return produce(None)
+
+        best, best_distance = None, float("inf")
+        hint = None
+        attempts = 0
+        while attempts < self.max_attempts:
+            attempts += 1
+            passage = produce(hint)
+            if passage is None:
+                # A failed call is not a readability miss; don't spend more of the budget on it,
+                # and leave the fallback to the caller unless a draft already came back
+                self._record(level, attempts=attempts, failed=1)
+                return None if best is None else self._nearest(level, best, best_distance, near_matches)
+
+            grade = self.grade(passage_text(passage))
+            distance = self.distance(level, grade)
+            if distance == 0:
+                self._record(level, attempts=attempts, accepted=1)
+                return passage
+            logger.info(f"Rejected {level} passage at grade {grade:.1f} (attempt {attempts}/{self.max_attempts})")
+            if distance < best_distance:
+                best, best_distance = passage, distance
+            hint = self.retry_hint(level, grade)
+
+        self._record(level, attempts=attempts, rejected=1)
+        return self._nearest(level, best, best_distance, near_matches)
+
+    def _nearest(self, level: str, best: Optional[Dict[str, Any]], best_distance: float,
+                 near_matches: Iterable[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """Pick whichever of the best rejected draft and the ready passages is closest to the band."""
+        candidates = list(near_matches)
+        if not candidates:
+            return best
+        grades = calculate_reading_stats_batch(passage_text(candidate) for candidate in candidates).flesch_kincaid_grade
+        distance, index = min((self.distance(level, float(grade)), index) for index, grade in enumerate(grades))
+        if distance < best_distance:
+            self._record(level, near_matches=1)
+            return candidates[index]
+        return best
+
+    def _record(self, level: str, **counts: int) -> None:
+        """Add to a level's counters."""
+        with self._lock:
+            stats = self._stats.setdefault(level, {
+                "requests": 0, "accepted": 0, "rejected": 0, "failed": 0, "attempts": 0, "near_matches": 0
+            })
+            if "attempts" in counts:
+                stats["requests"] += 1
+            for name, value in counts.items():
+                stats[name] += value
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the per-level acceptance counters.
+
+        Returns:
+            Dict: Requests, accepted, rejected, failed, model attempts, near
+                matches served and acceptance rate for each level seen
+        """
+        with self._lock:
+            result = {}
+            for level, stats in self._stats.items():
+                judged = stats["accepted"] + stats["rejected"]
+                result[level] = {**stats, "acceptance_rate": round(stats["accepted"] / judged, 3) if judged else None}
+            return result
+
+
+# Process-wide gate shared by every passage generator
+readability_gate = ReadabilityGate()
@@ -0,0 +1,241 @@
+import logging
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Extra diagonals searched on each side beyond the length difference
+DEFAULT_BAND = 25
+
+# Comfortable oral reading pace in words per minute
+TARGET_WPM_RANGE = (90.0, 150.0)
+
+_WORD_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z0-9]+)*")
+
+# Edit costs. A substitution costs less than an omission plus an insertion, so
+# a misread word lines up with the word it replaced, but more than a single
+# omission or insertion, so ties favour the alignment with the most matches.
+GAP_COST = 2
+SUBSTITUTION_COST = 3
+
+# Back-pointers stored by the DP
+_DIAGONAL, _OMIT, _INSERT = 0, 1, 2
+
+
+def tokenize(text: str) -> Tuple[List[str], List[str]]:
+    """
+    Split text into display words and their normalized forms.
+
+    Normalization lowercases, drops surrounding punctuation and treats curly
+    apostrophes as straight ones, so "Don’t," and "don't" compare equal.
+
+    Args:
+        text (str): Text to tokenize
+
+    Returns:
+        Tuple[List[str], List[str]]: Original words and normalized tokens, index-aligned
+    """
+    words = []
+    tokens = []
+    for word in (text or "").split():
+        token = "".join(_WORD_PATTERN.findall(word.lower().replace("’", "'")))
+        if token:
+            words.append(word.strip(".,;:!?\"()[]{}“”"))
+            tokens.append(token)
+    return words, tokens
+
+
+def align_tokens(reference: Sequence[str], spoken: Sequence[str],
+                 band: int = DEFAULT_BAND) -> List[Tuple[str, Optional[int], Optional[int]]]:
+    """
+    Align two token sequences with a banded weighted edit-distance DP.
+
+    Only cells within ``abs(len(reference) - len(spoken)) + band`` diagonals of
+    the main diagonal are filled, so long passages cost O(n * band) instead of
+    O(n * m). The band always contains a complete path, so an alignment is
+    always returned; it is optimal unless the reader drifted further than the
+    band from the text.
+
+    Args:
+        reference (Sequence[str]): Expected tokens
+        spoken (Sequence[str]): Tokens that were read aloud
+        band (int): Extra diagonals searched on each side
+
+    Returns:
+        List[Tuple]: Operations in order as (op, reference_index, spoken_index),
+            where op is "match", "substitute", "omit" or "insert"
+    """
+    n, m = len(reference), len(spoken)
+    width = abs(n - m) + max(0, band)
+    inf = GAP_COST * (n + m) + 1
+
+    # Row i covers spoken indices lo(i)..hi(i); each row stores costs and back-pointers
+    previous = [GAP_COST * j for j in range(min(m, width) + 1)]
+    previous_lo = 0
+    pointers = [bytearray([_INSERT]) * len(previous)]
+
+    for i in range(1, n + 1):
+        lo = max(0, i - width)
+        hi = min(m, i + width)
+        row = [inf] * (hi - lo + 1)
+        back = bytearray(hi - lo + 1)
+        token = reference[i - 1]
+        previous_hi = previous_lo + len(previous) - 1
+
+        for j in range(lo, hi + 1):
+            # Omitting the reference word: come from (i - 1, j)
+            best = previous[j - previous_lo] + GAP_COST if previous_lo <= j <= previous_hi else inf
+            move = _OMIT
+            if j > lo:
+                cost = row[j - 1 - lo] + GAP_COST
+                if cost < best:
+                    best, move = cost, _INSERT
+            if j > 0 and previous_lo <= j - 1 <= previous_hi:
+                cost = previous[j - 1 - previous_lo] + (SUBSTITUTION_COST if token != spoken[j - 1] else 0)
+                if cost <= best:
+                    best, move = cost, _DIAGONAL
+            row[j - lo] = best
+            back[j - lo] = move
+
+        pointers.append(back)
+        previous, previous_lo = row, lo
+
+    # Walk the back-pointers from (n, m) to (0, 0)
+    operations = []
+    i, j = n, m
+    while i > 0 or j > 0:
+        move = pointers[i][j - max(0, i - width)] if i > 0 else _INSERT
+        if move == _DIAGONAL:
+            op = "match" if reference[i - 1] == spoken[j - 1] else "substitute"
+            operations.append((op, i - 1, j - 1))
+            i, j = i - 1, j - 1
+        elif move == _OMIT:
+            operations.append(("omit", i - 1, None))
+            i -= 1
+        else:
+            operations.append(("insert", None, j - 1))
+            j -= 1
+    operations.reverse()
+    return operations
+
+
+def words_per_minute(word_count: int, duration_seconds: Optional[float]) -> Optional[float]:
+    """
+    Convert a word count and reading time into words per minute.
+
+    Args:
+        word_count (int): Words read
+        duration_seconds (float, optional): Reading time in seconds
+
+    Returns:
+        float: Words per minute, or None if the duration is unknown or not positive
+    """
+    if not duration_seconds or duration_seconds <= 0:
+        return None
+    return word_count * 60.0 / duration_seconds
+
+
+def duration_from_timestamps(timestamps: Optional[Sequence[float]]) -> Optional[float]:
+    """
+    Get the reading time spanned by per-word timestamps.
+
+    Args:
+        timestamps (Sequence[float], optional): Time in seconds at which each word was spoken
+
+    Returns:
+        float: Seconds from the first to the last word, or None with fewer than two stamps
+    """
+    if not timestamps or len(timestamps) < 2:
+        return None
+    return float(max(timestamps)) - float(min(timestamps))
+
+
+def fluency_score(accuracy: float, wpm: Optional[float], insertions: int, spoken_words: int) -> float:
+    """
+    Combine accuracy, pace and self-corrections into a 0-100 fluency score.
+
+    Args:
+        accuracy (float): Word accuracy percentage
+        wpm (float, optional): Reading speed; when unknown the score is accuracy-based
+        insertions (int): Extra words spoken (repeats, self-corrections)
+        spoken_words (int): Total words spoken
+
+    Returns:
+        float: Fluency score
+    """
+    low, high = TARGET_WPM_RANGE
+    if wpm is None:
+        pace = accuracy
+    elif wpm < low:
+        pace = 100.0 * wpm / low
+    elif wpm > high:
+        pace = max(0.0, 100.0 - (wpm - high))
+    else:
+        pace = 100.0
+    repeat_penalty = 100.0 * insertions / spoken_words if spoken_words else 0.0
+    return max(0.0, min(100.0, 0.6 * accuracy + 0.4 * pace - 0.5 * repeat_penalty))
+
+
+def score_operations(operations: Sequence[Tuple[str, Optional[int], Optional[int]]], total_words: int,
+                     spoken_words: int, duration_seconds: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Compute the headline metrics of an alignment.
+
+    Args:
+        operations (Sequence[Tuple]): Output of align_tokens
+        total_words (int): Number of passage tokens
+        spoken_words (int): Number of transcript tokens
+        duration_seconds (float, optional): Reading time in seconds
+
+    Returns:
+        Dict: accuracy, words_per_minute (None without timing), fluency_score and word counts
+    """
+    correct = sum(1 for op, _, _ in operations if op == "match")
+    inserted = sum(1 for op, _, _ in operations if op == "insert")
+    accuracy = 100.0 * correct / total_words if total_words else 0.0
+    wpm = words_per_minute(spoken_words, duration_seconds)
+    return {
+        "accuracy": accuracy,
+        "words_per_minute": wpm,
+        "fluency_score": fluency_score(accuracy, wpm, inserted, spoken_words),
+        "total_words": total_words,
+        "spoken_words": spoken_words,
+        "correct_words": correct,
+    }
+
+
+def collect_errors(operations: Sequence[Tuple[str, Optional[int], Optional[int]]], reference_words: Sequence[str],
+                   spoken_words: Sequence[str]) -> Dict[str, Any]:
+    """
+    List the reading errors of an alignment using the display words.
+
+    Args:
+        operations (Sequence[Tuple]): Output of align_tokens
+        reference_words (Sequence[str]): Passage words as displayed
+        spoken_words (Sequence[str]): Transcript words as displayed
+
+    Returns:
+        Dict: substitutions, omissions, insertions and difficult_words (missed
+            passage words in order, without repeats)
+    """
+    substitutions = []
+    omissions = []
+    insertions = []
+    difficult_words = {}
+    for op, ref_index, spoken_index in operations:
+        if op == "substitute":
+            substitutions.append({"index": ref_index, "expected": reference_words[ref_index],
+                                  "spoken": spoken_words[spoken_index]})
+            difficult_words.setdefault(reference_words[ref_index], None)
+        elif op == "omit":
+            omissions.append({"index": ref_index, "expected": reference_words[ref_index]})
+            difficult_words.setdefault(reference_words[ref_index], None)
+        elif op == "insert":
+            insertions.append({"index": spoken_index, "spoken": spoken_words[spoken_index]})
+    return {
+        "substitutions": substitutions,
+        "omissions": omissions,
+        "insertions": insertions,
+        "difficult_words": list(difficult_words),
+    }
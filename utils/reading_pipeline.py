@@ -0,0 +1,186 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from utils.reading_alignment import (
+    DEFAULT_BAND, align_tokens, collect_errors, duration_from_timestamps, score_operations, tokenize
+)
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# A stage reads and updates the shared analysis state in place
+Stage = Callable[[Dict[str, Any]], None]
+
+
+def normalize_stage(state: Dict[str, Any]) -> None:
+    """Tokenize the passage and transcript and settle the reading duration."""
+    state["reference_words"], state["reference"] = tokenize(state["original_text"])
+    state["spoken_words"], state["spoken"] = tokenize(state["spoken_text"])
+    if state.get("duration_seconds") is None:
+        state["duration_seconds"] = duration_from_timestamps(state.get("timestamps"))
+
+
+def align_stage(state: Dict[str, Any]) -> None:
+    """Align the transcript tokens against the passage tokens."""
+    state["operations"] = align_tokens(state["reference"], state["spoken"], band=state.get("band", DEFAULT_BAND))
+
+
+def score_stage(state: Dict[str, Any]) -> None:
+    """Compute accuracy, reading speed and fluency."""
+    state["result"].update(score_operations(
+        state["operations"], len(state["reference"]), len(state["spoken"]), state["duration_seconds"]
+    ))
+
+
+def diagnose_stage(state: Dict[str, Any]) -> None:
+    """List substitutions, omissions, insertions and the words to practise."""
+    state["result"].update(collect_errors(state["operations"], state["reference_words"], state["spoken_words"]))
+
+
+def feedback_stage(state: Dict[str, Any]) -> None:
+    """Turn the scores and errors into strengths and areas for improvement."""
+    result = state["result"]
+    wpm = result.get("words_per_minute")
+    error_words = result.get("difficult_words", [])[:3]
+
+    strengths = []
+    areas_for_improvement = []
+    if result.get("accuracy", 0) >= 90:
+        strengths.append("Accurate reading of almost every word")
+    if wpm and 90 <= wpm <= 150:
+        strengths.append("Comfortable reading pace")
+    if not result.get("insertions"):
+        strengths.append("No repeated or added words")
+    if error_words:
+        areas_for_improvement.append(f"Some difficulty with words like '{', '.join(error_words)}'")
+    if result.get("omissions"):
+        areas_for_improvement.append(f"Skipped {len(result['omissions'])} word(s); try following along with a finger")
+    if wpm and wpm < 90:
+        areas_for_improvement.append("Could improve reading speed")
+
+    result["error_words"] = error_words
+    result["strengths"] = strengths or ["Completed the reading"]
+    result["areas_for_improvement"] = areas_for_improvement
+
+
+DEFAULT_STAGES: Tuple[Tuple[str, Stage], ...] = (
+    ("normalize", normalize_stage),
+    ("align", align_stage),
+    ("score", score_stage),
+    ("diagnose", diagnose_stage),
+    ("feedback", feedback_stage),
+)
+
+
+class ReadingPipeline:
+    """
+    Reading analysis as a sequence of named, individually timed stages.
+
+    Each stage is a function that reads and updates a shared state dict; the
+    analysis result is built up in ``state["result"]``. Stages can be swapped,
+    added or dropped with ``with_stage`` to try a different aligner or scorer
+    without touching the rest of the pipeline. Every run reports how long each
+    stage took, and cumulative timings are kept for profiling.
+    """
+
+    def __init__(self, stages: Optional[Sequence[Tuple[str, Stage]]] = None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            stages (Sequence[Tuple[str, Stage]], optional): Ordered (name, stage)
+                pairs; defaults to normalize, align, score, diagnose, feedback
+        """
+        self.stages: List[Tuple[str, Stage]] = list(stages if stages is not None else DEFAULT_STAGES)
+        self._lock = threading.Lock()
+        self._timings: Dict[str, Dict[str, float]] = {}
+
+    def with_stage(self, name: str, stage: Optional[Stage], after: Optional[str] = None) -> "ReadingPipeline":
+        """
+        Get a copy of the pipeline with one stage replaced, added or removed.
+
+        Args:
+            name (str): Stage name
+            stage (Stage, optional): The new stage; None removes the stage
+            after (str, optional): For a new stage, the stage to insert it after;
+                it is appended at the end otherwise
+
+        Returns:
+            ReadingPipeline: The new pipeline
+        """
+        stages = [(existing, func) for existing, func in self.stages if existing != name or stage is not None]
+        if stage is not None:
+            names = [existing for existing, _ in stages]
+            if name in names:
+                stages[names.index(name)] = (name, stage)
+            elif after in names:
+                stages.insert(names.index(after) + 1, (name, stage))
+            else:
+                stages.append((name, stage))
+        return ReadingPipeline(stages)
+
+    def run(self, original_text: str, spoken_text: str, duration_seconds: Optional[float] = None,
+            timestamps: Optional[Sequence[float]] = None, **options: Any) -> Dict[str, Any]:
+        """
+        Analyze a transcript against the passage it was read from.
+
+        Args:
+            original_text (str): The passage text
+            spoken_text (str): Transcript of what was read
+            duration_seconds (float, optional): Reading time in seconds
+            timestamps (Sequence[float], optional): Per-word times in seconds
+            **options: Extra state for custom stages, e.g. band for the aligner
+
+        Returns:
+            Dict: The analysis result, with per-stage milliseconds under "timings"
+        """
+        state = dict(options)
+        state.update({
+            "original_text": original_text or "",
+            "spoken_text": spoken_text or "",
+            "duration_seconds": duration_seconds,
+            "timestamps": timestamps,
+            "result": {},
+        })
+
+        timings = {}
+        started = time.perf_counter()
+        for name, stage in self.stages:
+            stage_started = time.perf_counter()
+            stage(state)
+            timings[name] = (time.perf_counter() - stage_started) * 1000.0
+        timings["total"] = (time.perf_counter() - started) * 1000.0
+
+        self._record(timings)
+        result = state["result"]
+        result["timings"] = {name: round(elapsed, 3) for name, elapsed in timings.items()}
+        return result
+
+    def timing_stats(self) -> Dict[str, Dict[str, float]]:
+        """
+        Get cumulative stage timings.
+
+        Returns:
+            Dict: For each stage and "total", the run count and average and
+                maximum milliseconds
+        """
+        with self._lock:
+            return {
+                name: {
+                    "runs": int(entry["runs"]),
+                    "avg_ms": round(entry["total_ms"] / entry["runs"], 3),
+                    "max_ms": round(entry["max_ms"], 3),
+                }
+                for name, entry in self._timings.items()
+            }
+
+    def _record(self, timings: Dict[str, float]) -> None:
+        """Add one run's timings to the cumulative totals."""
+        with self._lock:
+            for name, elapsed in timings.items():
+                entry = self._timings.setdefault(name, {"runs": 0, "total_ms": 0.0, "max_ms": 0.0})
+                entry["runs"] += 1
+                entry["total_ms"] += elapsed
+                entry["max_ms"] = max(entry["max_ms"], elapsed)
@@ -0,0 +1,558 @@
+import logging
+import os
+import re
+import secrets
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Session ids are random URL-safe tokens; anything else in the cookie is ignored
+_SESSION_ID_PATTERN = re.compile(r'^[A-Za-z0-9_-]{32,64}$')
+
+
+class SessionBackend(ABC):
+    """
+    Storage for serialized sessions, keyed by session id.
+
+    Backends store the payload strings produced by ServerSideSessionInterface
+    and must be safe to call from several request threads at once.
+    """
+
+    @abstractmethod
+    def load(self, session_id: str) -> Optional[str]:
+        """
+        Get a stored session.
+
+        Args:
+            session_id (str): Session id from the cookie
+
+        Returns:
+            str: The serialized session, or None if unknown or expired
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def save(self, session_id: str, payload: str) -> None:
+        """
+        Store a session, replacing any previous version.
+
+        Args:
+            session_id (str): Session id
+            payload (str): Serialized session
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        """
+        Forget a session.
+
+        Args:
+            session_id (str): Session id
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def touch(self, session_id: str) -> None:
+        """
+        Restart a session's expiry without changing it, when its cookie is refreshed.
+
+        Args:
+            session_id (str): Session id
+        """
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """Release resources, writing out anything still buffered."""
+
+    def stats(self) -> Dict[str, Any]:
+        """Get counters for health output."""
+        return {}
+
+
+class MemoryBackend(SessionBackend):
+    """
+    Sessions held in this process, least recently used evicted first.
+
+    The fastest backend, but sessions are lost on restart and not shared
+    between worker processes.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: Optional[float] = None):
+        """
+        Initialize the backend.
+
+        Args:
+            maxsize (int): Maximum number of sessions kept
+            ttl (float, optional): Seconds a session lives after its last save or touch, None to keep until evicted
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "saves": 0, "evictions": 0}
+
+    def load(self, session_id: str) -> Optional[str]:
+        """Get a session that is still live, marking it recently used."""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None and (self.ttl is None or time.time() - entry[0] <= self.ttl):
+                self._sessions.move_to_end(session_id)
+                self._stats["hits"] += 1
+                return entry[1]
+            if entry is not None:
+                del self._sessions[session_id]
+            self._stats["misses"] += 1
+            return None
+
+    def save(self, session_id: str, payload: str) -> None:
+        """Store a session and evict the least recently used beyond maxsize."""
+        with self._lock:
+            self._sessions[session_id] = (time.time(), payload)
+            self._sessions.move_to_end(session_id)
+            self._stats["saves"] += 1
+            while len(self._sessions) > self.maxsize:
+                self._sessions.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def delete(self, session_id: str) -> None:
+        """Forget a session."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def touch(self, session_id: str) -> None:
+        """Restart a session's expiry."""
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None:
+                self._sessions[session_id] = (time.time(), entry[1])
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit, save and eviction counters."""
+        with self._lock:
+            return {**self._stats, "backend": "memory", "size": len(self._sessions)}
+
+
+class SQLiteBackend(SessionBackend):
+    """
+    Sessions in a local SQLite database, shared by every worker on the host.
+
+    Each thread gets its own connection. The database runs in WAL mode so
+    readers in other workers are not blocked while one worker writes.
+    Abandoned sessions are deleted by a purge that runs on save at most once
+    per ``purge_interval`` seconds.
+    """
+
+    def __init__(self, path: str, ttl: Optional[float] = None, purge_interval: float = 3600.0):
+        """
+        Initialize the backend, creating the database if needed.
+
+        Args:
+            path (str): Database file
+            ttl (float, optional): Seconds a session lives after its last save or touch, None to keep forever
+            purge_interval (float): Minimum seconds between purges of expired sessions
+        """
+        self.path = path
+        self.ttl = ttl
+        self.purge_interval = purge_interval
+        self._local = threading.local()
+        # Every thread's connection, so close() can reach them all
+        self._connections: Dict[threading.Thread, sqlite3.Connection] = {}
+        self._lock = threading.Lock()
+        self._next_purge = 0.0
+        self._stats = {"loads": 0, "misses": 0, "saves": 0, "touches": 0, "purged": 0}
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS sessions (id TEXT PRIMARY KEY, payload TEXT NOT NULL, updated REAL NOT NULL)"
+        )
+        connection.execute("CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated)")
+        connection.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # Used only by this thread, but closed by whichever thread calls close()
+            connection = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            with self._lock:
+                finished = [thread for thread in self._connections if not thread.is_alive()]
+                for thread in finished:
+                    self._connections.pop(thread).close()
+                self._connections[threading.current_thread()] = connection
+        return connection
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        """Add to a counter."""
+        with self._lock:
+            self._stats[name] += amount
+
+    def load(self, session_id: str) -> Optional[str]:
+        """Read a session that is still live."""
+        row = self._connection().execute(
+            "SELECT payload, updated FROM sessions WHERE id = ?", (session_id,)
+        ).fetchone()
+        self._count("loads")
+        if row is None or (self.ttl is not None and time.time() - row[1] > self.ttl):
+            self._count("misses")
+            return None
+        return row[0]
+
+    def save(self, session_id: str, payload: str) -> None:
+        """Store one session."""
+        self.save_many({session_id: payload})
+
+    def save_many(self, payloads: Dict[str, str]) -> None:
+        """
+        Store several sessions in one transaction.
+
+        Args:
+            payloads (Dict[str, str]): Serialized session per session id
+        """
+        now = time.time()
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO sessions (id, payload, updated) VALUES (?, ?, ?)",
+                [(session_id, payload, now) for session_id, payload in payloads.items()]
+            )
+        self._count("saves", len(payloads))
+
+        with self._lock:
+            purge = self.ttl is not None and now >= self._next_purge
+            if purge:
+                self._next_purge = now + self.purge_interval
+        if purge:
+            try:
+                self.purge_expired()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not purge expired sessions: {e}")
+
+    def delete(self, session_id: str) -> None:
+        """Delete a session row."""
+        connection = self._connection()
+        with connection:
+            connection.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def touch(self, session_id: str) -> None:
+        """Restart one session's expiry."""
+        self.touch_many([session_id])
+
+    def touch_many(self, session_ids: Iterable[str]) -> None:
+        """
+        Restart the expiry of several sessions in one transaction.
+
+        Args:
+            session_ids (Iterable[str]): Session ids; unknown ones are ignored
+        """
+        now = time.time()
+        rows = [(now, session_id) for session_id in session_ids]
+        connection = self._connection()
+        with connection:
+            connection.executemany("UPDATE sessions SET updated = ? WHERE id = ?", rows)
+        self._count("touches", len(rows))
+
+    def purge_expired(self) -> int:
+        """
+        Delete sessions past their TTL.
+
+        Returns:
+            int: Number of sessions deleted
+        """
+        if self.ttl is None:
+            return 0
+        connection = self._connection()
+        with connection:
+            deleted = connection.execute("DELETE FROM sessions WHERE updated < ?", (time.time() - self.ttl,)).rowcount
+        self._count("purged", deleted)
+        return deleted
+
+    def close(self) -> None:
+        """Close every thread's connection; a later call opens a new one."""
+        with self._lock:
+            connections, self._connections = list(self._connections.values()), {}
+            self._local = threading.local()
+        for connection in connections:
+            connection.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get load, save and purge counters."""
+        with self._lock:
+            return {**self._stats, "backend": "sqlite"}
+
+
+class WriteBehindBackend(SessionBackend):
+    """
+    Buffers session writes in memory and sends them to a slower backend in batches.
+
+    Saved sessions are marked dirty and answered from memory until a
+    background thread writes every dirty session in one batch, at most
+    flush_interval seconds later, so a crash loses at most that much.
+    Buffered saves are only safe when one process owns each session: another
+    worker reads the version from before the flush, and when two workers
+    change the same session within one interval, the later flush overwrites
+    the other's update. With save_through, saves and deletes go straight to
+    the backend and only expiry refreshes are batched.
+    """
+
+    def __init__(self, backend: SessionBackend, flush_interval: float = 1.0, save_through: bool = False):
+        """
+        Initialize the buffer and start its flush thread.
+
+        Args:
+            backend (SessionBackend): Backend that receives the batched writes
+            flush_interval (float): Seconds between flushes of dirty sessions
+            save_through (bool): Write saves and deletes immediately, buffering only touches
+        """
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.save_through = save_through
+        self._dirty: Dict[str, Optional[str]] = {}
+        self._touched: Dict[str, None] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._stats = {"buffered_hits": 0, "buffered_saves": 0, "buffered_touches": 0, "flushes": 0, "flushed": 0,
+                       "flush_errors": 0}
+        self._thread = threading.Thread(target=self._run, name="session-write-behind", daemon=True)
+        self._thread.start()
+
+    def load(self, session_id: str) -> Optional[str]:
+        """Get a session, preferring a buffered save over the backend."""
+        with self._lock:
+            if session_id in self._dirty:
+                self._stats["buffered_hits"] += 1
+                return self._dirty[session_id]
+        return self.backend.load(session_id)
+
+    def save(self, session_id: str, payload: str) -> None:
+        """Buffer a session until the next flush, or write it now with save_through."""
+        if self.save_through:
+            self.backend.save(session_id, payload)
+            return
+        with self._lock:
+            self._dirty[session_id] = payload
+            self._stats["buffered_saves"] += 1
+
+    def delete(self, session_id: str) -> None:
+        """Buffer a delete until the next flush, or delete now with save_through."""
+        if self.save_through:
+            self.backend.delete(session_id)
+            return
+        # None marks a pending delete, so a buffered save can't bring the session back
+        with self._lock:
+            self._dirty[session_id] = None
+
+    def touch(self, session_id: str) -> None:
+        """Buffer an expiry refresh until the next flush."""
+        with self._lock:
+            if session_id not in self._dirty:
+                self._touched[session_id] = None
+                self._stats["buffered_touches"] += 1
+
+    def flush(self) -> int:
+        """
+        Write every dirty session and expiry refresh to the backend now.
+
+        Returns:
+            int: Number of sessions written, deleted or touched
+        """
+        with self._lock:
+            dirty, self._dirty = self._dirty, {}
+            # A save restarts the expiry anyway, so touches of dirty sessions are dropped
+            touched = [session_id for session_id in self._touched if session_id not in dirty]
+            self._touched = {}
+        if not dirty and not touched:
+            return 0
+
+        saves = {session_id: payload for session_id, payload in dirty.items() if payload is not None}
+        try:
+            if saves:
+                if hasattr(self.backend, "save_many"):
+                    self.backend.save_many(saves)
+                else:
+                    for session_id, payload in saves.items():
+                        self.backend.save(session_id, payload)
+            for session_id, payload in dirty.items():
+                if payload is None:
+                    self.backend.delete(session_id)
+            if touched:
+                if hasattr(self.backend, "touch_many"):
+                    self.backend.touch_many(touched)
+                else:
+                    for session_id in touched:
+                        self.backend.touch(session_id)
+        except Exception as e:
+            logger.error(f"Session flush failed, will retry: {e}")
+            with self._lock:
+                # Newer saves made during the failed flush win over the ones being retried
+                self._dirty = {**dirty, **self._dirty}
+                self._touched.update(dict.fromkeys(touched))
+                self._stats["flush_errors"] += 1
+            return 0
+
+        with self._lock:
+            self._stats["flushes"] += 1
+            self._stats["flushed"] += len(dirty) + len(touched)
+        return len(dirty) + len(touched)
+
+    def _run(self) -> None:
+        """Flush on a timer until closed."""
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self) -> None:
+        """Stop the flush thread, write out the buffer and close the backend."""
+        self._stop.set()
+        self._thread.join()
+        self.flush()
+        self.backend.close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the buffer counters merged with the backend's."""
+        with self._lock:
+            stats = {**self._stats, "dirty": len(self._dirty) + len(self._touched)}
+        return {**self.backend.stats(), **stats}
+
+
+def create_session_backend(kind: str = "sqlite", path: Optional[str] = None, maxsize: int = 10000,
+                           ttl: Optional[float] = None, flush_interval: float = 1.0,
+                           buffer_saves: bool = False) -> SessionBackend:
+    """
+    Build a session backend by name.
+
+    Args:
+        kind (str): "memory" for the in-process LRU, "sqlite" for the shared
+            database behind a write-behind buffer
+        path (str, optional): Database file for "sqlite"
+        maxsize (int): Sessions kept by the "memory" backend
+        ttl (float, optional): Seconds a session lives after its last save or cookie refresh
+        flush_interval (float): Seconds between write-behind flushes for "sqlite"
+        buffer_saves (bool): Buffer "sqlite" saves too, not just expiry refreshes. Faster,
+            but workers that change the same session within one flush lose updates.
+
+    Returns:
+        SessionBackend: The backend
+
+    Raises:
+        ValueError: If the kind is unknown or "sqlite" has no path
+    """
+    if kind == "memory":
+        return MemoryBackend(maxsize=maxsize, ttl=ttl)
+    if kind == "sqlite":
+        if not path:
+            raise ValueError("The sqlite session backend needs a database path")
+        return WriteBehindBackend(SQLiteBackend(path, ttl=ttl), flush_interval=flush_interval,
+                                  save_through=not buffer_saves)
+    raise ValueError(f"Unknown session backend {kind!r}")
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """A session whose data lives in a backend; the cookie only carries its id."""
+
+    def __init__(self, initial: Optional[Dict[str, Any]] = None, session_id: Optional[str] = None,
+                 new: bool = False):
+        def on_update(self):
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.session_id = session_id
+        self.new = new
+        self.modified = False
+        self.accessed = False
+
+    def __getitem__(self, key: str) -> Any:
+        self.accessed = True
+        return super().__getitem__(key)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        self.accessed = True
+        return super().get(key, default)
+
+    def setdefault(self, key: str, default: Any = None) -> Any:
+        self.accessed = True
+        return super().setdefault(key, default)
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """
+    Flask session interface that keeps session data in a SessionBackend.
+
+    The cookie holds an opaque random id, set once when the session is first
+    written, so later responses don't re-send it. Modified sessions are
+    serialized with Flask's tagged JSON (the same types the cookie session
+    supports) and saved to the backend at the end of the request.
+    """
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, backend: SessionBackend):
+        """
+        Initialize the interface.
+
+        Args:
+            backend (SessionBackend): Where sessions are stored
+        """
+        self.backend = backend
+
+    def open_session(self, app, request) -> ServerSideSession:
+        """Load the session named by the cookie, or start a new one."""
+        session_id = request.cookies.get(self.get_cookie_name(app))
+        if session_id and _SESSION_ID_PATTERN.match(session_id):
+            payload = self.backend.load(session_id)
+            if payload is not None:
+                try:
+                    return ServerSideSession(self.serializer.loads(payload), session_id=session_id)
+                except ValueError as e:
+                    logger.warning(f"Discarding unreadable session: {e}")
+        # Unknown ids are never adopted, so a client can't pick its own session id
+        return ServerSideSession(session_id=secrets.token_urlsafe(32), new=True)
+
+    def save_session(self, app, session: ServerSideSession, response) -> None:
+        """Save a modified session and set the cookie when it is new."""
+        cookie = {
+            "domain": self.get_cookie_domain(app),
+            "path": self.get_cookie_path(app),
+            "secure": self.get_cookie_secure(app),
+            "samesite": self.get_cookie_samesite(app),
+            "httponly": self.get_cookie_httponly(app),
+        }
+        if hasattr(self, "get_cookie_partitioned"):
+            cookie["partitioned"] = self.get_cookie_partitioned(app)
+        name = self.get_cookie_name(app)
+
+        if session.accessed:
+            response.vary.add("Cookie")
+
+        if not session:
+            if session.modified and not session.new:
+                self.backend.delete(session.session_id)
+                response.delete_cookie(name, **cookie)
+                response.vary.add("Cookie")
+            return
+
+        # The id never changes, so the cookie is only sent when it is new or needs a fresh expiry
+        refresh = session.new or (session.permanent and app.config["SESSION_REFRESH_EACH_REQUEST"])
+        if session.modified:
+            self.backend.save(session.session_id, self.serializer.dumps(dict(session)))
+        elif refresh:
+            # The stored session must live as long as the cookie now promises
+            self.backend.touch(session.session_id)
+
+        if refresh:
+            response.set_cookie(name, session.session_id, expires=self.get_expiration_time(app, session), **cookie)
+            response.vary.add("Cookie")
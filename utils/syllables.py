@@ -0,0 +1,113 @@
+import logging
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+SYLLABLE_SEPARATOR = "·"
+VOWELS = frozenset("aeiouyAEIOUY")
+
+# A syllable ends after a vowel that is followed by a non-vowel
+_BREAK_PATTERN = re.compile(r"[aeiouy](?=[^aeiouy])", re.IGNORECASE)
+_WORD_PATTERN = re.compile(r"[A-Za-z]+(?:'[A-Za-z]+)*")
+
+# Precomputed syllable breaks for every word the apps ship with
+_table: Dict[str, str] = {}
+
+
+def split_syllables(word: str) -> List[str]:
+    """
+    Split a word into rough syllables.
+
+    A syllable ends after each vowel group that is followed by a consonant, and
+    a trailing consonant-only chunk is kept with the syllable before it, so
+    "cat" stays whole and "hippopotamus" becomes hi·ppo·po·ta·mus. This is a
+    reading aid, not a dictionary hyphenation.
+
+    Args:
+        word (str): The word to split
+
+    Returns:
+        List[str]: The syllables, in order
+    """
+    cuts = [match.end() for match in _BREAK_PATTERN.finditer(word)]
+    if cuts and not any(char in VOWELS for char in word[cuts[-1]:]):
+        cuts.pop()
+    bounds = [0] + cuts + [len(word)]
+    return [word[start:end] for start, end in zip(bounds, bounds[1:]) if start < end]
+
+
+@lru_cache(maxsize=4096)
+def syllabify(word: str) -> str:
+    """
+    Get a word with its syllables separated by a middle dot.
+
+    Args:
+        word (str): The word to format
+
+    Returns:
+        str: The word with syllable breaks, e.g. "rea·ding"
+    """
+    text = _table.get(word)
+    if text is None:
+        text = SYLLABLE_SEPARATOR.join(split_syllables(word))
+    return text
+
+
+@lru_cache(maxsize=4096)
+def guide(word: str) -> str:
+    """
+    Get a pronunciation guide for a word.
+
+    Args:
+        word (str): The word
+
+    Returns:
+        str: Syllable breakdown followed by the word in capitals, e.g. "rea·ding (READING)"
+    """
+    return f"{syllabify(word)} ({word.upper()})"
+
+
+def guides(words: Iterable[str]) -> Dict[str, str]:
+    """
+    Get pronunciation guides for a list of words in one call.
+
+    Args:
+        words (Iterable[str]): Words, possibly with repeats
+
+    Returns:
+        Dict[str, str]: Guide per distinct word, in first-seen order
+    """
+    return {word: guide(word) for word in dict.fromkeys(words)}
+
+
+def preload(texts: Iterable[str]) -> int:
+    """
+    Precompute syllable breaks for every word in the given texts.
+
+    Args:
+        texts (Iterable[str]): Words, phrases or whole passages
+
+    Returns:
+        int: Number of new words added to the table
+    """
+    added = 0
+    for text in texts:
+        for word in _WORD_PATTERN.findall(text or ""):
+            if word not in _table:
+                _table[word] = SYLLABLE_SEPARATOR.join(split_syllables(word))
+                added += 1
+    return added
+
+
+def syllable_stats() -> Dict[str, int]:
+    """
+    Get table and cache counters.
+
+    Returns:
+        Dict: Precomputed words and guide cache hits, misses and size
+    """
+    info = guide.cache_info()
+    return {"precomputed": len(_table), "hits": info.hits, "misses": info.misses, "cached": info.currsize}
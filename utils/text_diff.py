@@ -0,0 +1,185 @@
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from utils.error_patterns import error_index
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+# Opcodes are (op, target_index, answer_index). "delete" means a target
+# character is missing from the answer, "insert" an extra answer character,
+# and "transpose" covers two target characters typed in swapped order.
+Opcode = Tuple[str, Optional[int], Optional[int]]
+
+
+def diff(target: Sequence[str], answer: Sequence[str],
+         max_distance: Optional[int] = None) -> Optional[Tuple[int, List[Opcode]]]:
+    """
+    Compute a minimal Damerau-Levenshtein edit script from target to answer.
+
+    This is the optimal-string-alignment variant: adjacent transpositions cost
+    one edit, like substitutions, insertions and deletions. With max_distance
+    only cells within that many diagonals are filled, and the search stops as
+    soon as a whole row exceeds it, so cost is O(len * max_distance) and wildly
+    wrong answers are rejected early.
+
+    Args:
+        target (Sequence[str]): Expected characters
+        answer (Sequence[str]): Characters the user typed
+        max_distance (int, optional): Give up beyond this many edits
+
+    Returns:
+        Tuple[int, List[Opcode]]: The distance and the opcodes in target order,
+            or None if the distance exceeds max_distance
+    """
+    n, m = len(target), len(answer)
+    if max_distance is not None and abs(n - m) > max_distance:
+        return None
+    limit = max_distance if max_distance is not None else n + m
+    over = limit + 1
+
+    rows = [[j if j <= limit else over for j in range(m + 1)]]
+    for i in range(1, n + 1):
+        previous = rows[i - 1]
+        row = [over] * (m + 1)
+        if i <= limit:
+            row[0] = i
+        lo = max(1, i - limit)
+        hi = min(m, i + limit)
+        char = target[i - 1]
+        row_min = row[0]
+
+        for j in range(lo, hi + 1):
+            best = previous[j - 1] + (char != answer[j - 1])
+            if previous[j] + 1 < best:
+                best = previous[j] + 1
+            if row[j - 1] + 1 < best:
+                best = row[j - 1] + 1
+            if (i > 1 and j > 1 and char == answer[j - 2] and target[i - 2] == answer[j - 1]
+                    and char != target[i - 2] and rows[i - 2][j - 2] + 1 < best):
+                best = rows[i - 2][j - 2] + 1
+            if best > limit:
+                best = over
+            row[j] = best
+            if best < row_min:
+                row_min = best
+
+        if row_min > limit:
+            return None
+        rows.append(row)
+
+    distance = rows[n][m]
+    if distance > limit:
+        return None
+    return distance, _backtrace(rows, target, answer)
+
+
+def _backtrace(rows: List[List[int]], target: Sequence[str], answer: Sequence[str]) -> List[Opcode]:
+    """
+    Recover the opcodes from a filled DP table.
+
+    Among equally short scripts, matches and transpositions are preferred, then
+    a missing/extra pair over two substitutions, so "neccesary" reads as an
+    extra "c" and a missing "s" rather than two wrong letters.
+    """
+    opcodes = []
+    i, j = len(target), len(answer)
+    while i > 0 or j > 0:
+        current = rows[i][j]
+        if i > 0 and j > 0 and target[i - 1] == answer[j - 1] and rows[i - 1][j - 1] == current:
+            opcodes.append(("match", i - 1, j - 1))
+            i, j = i - 1, j - 1
+        elif (i > 1 and j > 1 and target[i - 1] == answer[j - 2] and target[i - 2] == answer[j - 1]
+                and target[i - 1] != target[i - 2] and rows[i - 2][j - 2] + 1 == current):
+            opcodes.append(("transpose", i - 2, j - 2))
+            i, j = i - 2, j - 2
+        elif i > 0 and rows[i - 1][j] + 1 == current:
+            opcodes.append(("delete", i - 1, None))
+            i -= 1
+        elif j > 0 and rows[i][j - 1] + 1 == current:
+            opcodes.append(("insert", None, j - 1))
+            j -= 1
+        else:
+            opcodes.append(("substitute", i - 1, j - 1))
+            i, j = i - 1, j - 1
+    opcodes.reverse()
+    return opcodes
+
+
+def default_max_distance(target: str) -> int:
+    """Edit budget for a spelling answer: a third of the target length, at least four."""
+    return max(4, len(target) // 3)
+
+
+def spelling_comparison(target: str, answer: str, max_distance: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Build the character feedback list shown after a spelling attempt.
+
+    Each entry has a status of correct, incorrect, missing, extra or
+    transposed; "char" holds the expected character(s), "user_char" what was
+    typed and "index" the target position (for extra characters, the position
+    they were typed in front of). Comparison ignores case but the original characters are shown.
+    If the answer is further than max_distance from the target, a cheap
+    position-by-position comparison is returned instead.
+
+    Args:
+        target (str): The correct spelling
+        answer (str): The user's answer
+        max_distance (int, optional): Edit budget for the full diff
+
+    Returns:
+        List[Dict]: One entry per compared character, or per swapped pair
+    """
+    result = diff([char.lower() for char in target], [char.lower() for char in answer], max_distance)
+    if result is None:
+        return _positional_comparison(target, answer)
+
+    comparison = []
+    position = 0
+    for op, i, j in result[1]:
+        if op == "match":
+            comparison.append({"char": target[i], "status": "correct", "index": i})
+        elif op == "substitute":
+            comparison.append({"char": target[i], "status": "incorrect", "user_char": answer[j], "index": i})
+        elif op == "delete":
+            comparison.append({"char": target[i], "status": "missing", "index": i})
+        elif op == "insert":
+            comparison.append({"char": "", "status": "extra", "user_char": answer[j], "index": position})
+            continue
+        else:
+            comparison.append({"char": target[i:i + 2], "status": "transposed", "user_char": answer[j:j + 2], "index": i})
+            position = i + 2
+            continue
+        position = i + 1
+    return comparison
+
+
+def _positional_comparison(target: str, answer: str) -> List[Dict[str, Any]]:
+    """Compare character by character at the same positions."""
+    comparison = []
+    for i in range(max(len(target), len(answer))):
+        if i < len(target) and i < len(answer):
+            if target[i].lower() == answer[i].lower():
+                comparison.append({"char": target[i], "status": "correct", "index": i})
+            else:
+                comparison.append({"char": target[i], "status": "incorrect", "user_char": answer[i], "index": i})
+        elif i < len(target):
+            comparison.append({"char": target[i], "status": "missing", "index": i})
+        else:
+            comparison.append({"char": "", "status": "extra", "user_char": answer[i], "index": len(target)})
+    return comparison
+
+
+def classify_spelling_errors(target: str, comparison: List[Dict[str, Any]]) -> Dict[str, bool]:
+    """
+    Classify the errors in a spelling comparison with the shared error-pattern index.
+
+    Args:
+        target (str): The correct spelling
+        comparison (List[Dict]): Output of spelling_comparison
+
+    Returns:
+        Dict[str, bool]: Flags for transposed, vowel, double_consonant and
+            ie_ei errors, each set only when a wrong character is involved
+    """
+    return error_index.classify(target, comparison)
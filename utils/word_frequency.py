@@ -0,0 +1,83 @@
+import logging
+import os
+from array import array
+from bisect import bisect_left
+from functools import lru_cache
+from typing import Iterable, Optional, Tuple
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_TABLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "word_frequency.txt")
+
+
+class FrequencyTable:
+    """
+    Frequency ranks of common words, held in two parallel compact arrays.
+
+    Words are kept sorted in one tuple and their ranks (1 = most frequent) in
+    an unsigned short array at the same positions, so a lookup is a binary
+    search and the table costs a few bytes per word on top of the strings.
+    """
+
+    def __init__(self, ranked_words: Iterable[str]):
+        """
+        Build the table.
+
+        Args:
+            ranked_words (Iterable[str]): Words, most frequent first; repeats keep their first rank
+        """
+        ranks = {}
+        for word in ranked_words:
+            word = word.strip().lower()
+            if word and word not in ranks:
+                ranks[word] = len(ranks) + 1
+        self._words: Tuple[str, ...] = tuple(sorted(ranks))
+        self._ranks = array("H", (ranks[word] for word in self._words))
+
+    @classmethod
+    def from_file(cls, path: str) -> "FrequencyTable":
+        """
+        Load a table from a text file with one word per line, most frequent first.
+
+        Lines starting with "#" are comments.
+
+        Args:
+            path (str): Path to the word list
+
+        Returns:
+            FrequencyTable: The loaded table, empty if the file cannot be read
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return cls(line for line in f if not line.startswith("#"))
+        except OSError as e:
+            logger.warning(f"Could not read word frequency table {path}: {e}")
+            return cls(())
+
+    def __len__(self) -> int:
+        return len(self._words)
+
+    def __contains__(self, word: str) -> bool:
+        return self.rank(word) is not None
+
+    def rank(self, word: str) -> Optional[int]:
+        """
+        Get the frequency rank of a word.
+
+        Args:
+            word (str): Lowercase word
+
+        Returns:
+            int: Rank starting at 1 for the most frequent word, or None if the word is not in the table
+        """
+        index = bisect_left(self._words, word)
+        if index < len(self._words) and self._words[index] == word:
+            return self._ranks[index]
+        return None
+
+
+@lru_cache(maxsize=1)
+def default_table() -> FrequencyTable:
+    """Load the bundled table of common English words on first use."""
+    return FrequencyTable.from_file(DEFAULT_TABLE)
@@ -0,0 +1,359 @@
+import json
+import logging
+import random
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from utils.error_patterns import WordPattern
+from utils.syllables import split_syllables
+
+# Set up logging
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEVEL = "intermediate"
+CHALLENGES = "challenges"
+DEFAULT_CHALLENGE = "silent_letters"
+
+# Layout of rebuild/static/data/word_database.js: one table per const, levels
+# at two spaces, categories at four and one entry per line
+_TABLE_PATTERN = re.compile(r"^const\s+(\w+)\s*=")
+_LEVEL_PATTERN = re.compile(r"^  (\w+)\s*:\s*([\[{])")
+_CATEGORY_PATTERN = re.compile(r"^    (\w+)\s*:\s*\[")
+_FIELD_PATTERN = re.compile(r'(\w+)\s*:\s*("(?:[^"\\]|\\.)*"|\[[^\]]*\])')
+
+
+class WordEntry(NamedTuple):
+    """One spelling word with the attributes it is indexed by."""
+    word: str
+    hint: str
+    level: str
+    category: str
+    note: Optional[str]
+    wrong: Tuple[str, ...]
+    syllables: int
+    patterns: Tuple[str, ...]
+
+
+class PhraseEntry(NamedTuple):
+    """One dictation phrase."""
+    text: str
+    hint: str
+    level: str
+
+
+def _patterns(word: str, category: str) -> Tuple[str, ...]:
+    """Name the spelling traps of a word, including the challenge it is listed under."""
+    pattern = WordPattern(word.lower())
+    names = []
+    if pattern.double_positions:
+        names.append("double_consonant")
+    if pattern.ie_ei_positions:
+        names.append("ie_ei")
+    if category and category not in names:
+        names.append(category)
+    return tuple(names)
+
+
+def parse_word_database(source: str) -> Tuple[List[WordEntry], List[PhraseEntry]]:
+    """
+    Parse the word and phrase tables out of word_database.js.
+
+    Args:
+        source (str): Contents of the JavaScript word database
+
+    Returns:
+        Tuple[List[WordEntry], List[PhraseEntry]]: Words and phrases in file order
+    """
+    words, phrases = [], []
+    table = level = category = None
+
+    for line in source.splitlines():
+        match = _TABLE_PATTERN.match(line)
+        if match:
+            table, level, category = match.group(1), None, None
+            continue
+        match = _LEVEL_PATTERN.match(line)
+        if match:
+            level, category = match.group(1), None
+            continue
+        match = _CATEGORY_PATTERN.match(line)
+        if match:
+            category = match.group(1)
+            continue
+
+        fields = {key: json.loads(value) for key, value in _FIELD_PATTERN.findall(line)}
+        if not fields or level is None:
+            continue
+        if table == "wordDatabase" and category and fields.get("word"):
+            word = fields["word"]
+            words.append(WordEntry(
+                word=word,
+                hint=fields.get("hint", ""),
+                level=level,
+                category=category,
+                note=fields.get("note"),
+                wrong=tuple(fields.get("wrong", ())),
+                syllables=len(split_syllables(word)),
+                patterns=_patterns(word, category if level == CHALLENGES else "")
+            ))
+        elif table == "phraseDatabase" and fields.get("text"):
+            phrases.append(PhraseEntry(text=fields["text"], hint=fields.get("hint", ""), level=level))
+    return words, phrases
+
+
+class WordStore:
+    """
+    The spelling word and dictation phrase tables, indexed for lookup and sampling.
+
+    Entries live in two flat lists and every index maps a key to a tuple of
+    positions in them, so filtering by level, category, length, syllable count
+    or error pattern is a dictionary lookup. Each session draws from its own
+    deck per pool: a random position is swapped with the last one and popped,
+    so a draw is O(1) and no entry repeats until the pool has been used up.
+    """
+
+    def __init__(self, words: Iterable[WordEntry] = (), phrases: Iterable[PhraseEntry] = (),
+                 max_decks: int = 10000):
+        """
+        Build the indexes.
+
+        Args:
+            words (Iterable[WordEntry]): Spelling words
+            phrases (Iterable[PhraseEntry]): Dictation phrases
+            max_decks (int): Session decks to keep before the least recently used are dropped
+        """
+        self.words: List[WordEntry] = list(words)
+        self.phrases: List[PhraseEntry] = list(phrases)
+        self.max_decks = max_decks
+        self._decks: "OrderedDict[Tuple, List[int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"draws": 0, "reshuffles": 0, "evicted": 0}
+
+        self._by_level: Dict[str, Tuple[int, ...]] = self._index(lambda entry: entry.level)
+        self._by_category: Dict[Tuple[str, str], Tuple[int, ...]] = self._index(
+            lambda entry: (entry.level, entry.category))
+        self._by_length: Dict[int, Tuple[int, ...]] = self._index(lambda entry: len(entry.word))
+        self._by_syllables: Dict[int, Tuple[int, ...]] = self._index(lambda entry: entry.syllables)
+        by_pattern: Dict[str, List[int]] = {}
+        for position, entry in enumerate(self.words):
+            for name in entry.patterns:
+                by_pattern.setdefault(name, []).append(position)
+        self._by_pattern: Dict[str, Tuple[int, ...]] = {name: tuple(ids) for name, ids in by_pattern.items()}
+        phrases_by_level: Dict[str, List[int]] = {}
+        for position, phrase in enumerate(self.phrases):
+            phrases_by_level.setdefault(phrase.level, []).append(position)
+        self._phrases_by_level = {level: tuple(ids) for level, ids in phrases_by_level.items()}
+
+    @classmethod
+    def from_file(cls, path: str, **kwargs) -> "WordStore":
+        """
+        Load a store from word_database.js.
+
+        Args:
+            path (str): Path to the JavaScript word database
+            **kwargs: Passed on to WordStore
+
+        Returns:
+            WordStore: The loaded store, empty if the file cannot be read
+        """
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                words, phrases = parse_word_database(f.read())
+        except OSError as e:
+            logger.warning(f"Could not read word database {path}: {e}")
+            words, phrases = [], []
+        logger.info(f"Loaded {len(words)} spelling words and {len(phrases)} phrases")
+        return cls(words, phrases, **kwargs)
+
+    def _index(self, key) -> Dict[Any, Tuple[int, ...]]:
+        """Group word positions by a key function."""
+        groups: Dict[Any, List[int]] = {}
+        for position, entry in enumerate(self.words):
+            groups.setdefault(key(entry), []).append(position)
+        return {value: tuple(ids) for value, ids in groups.items()}
+
+    def levels(self) -> List[str]:
+        """Get the word levels, without the challenge lists."""
+        return [level for level in self._by_level if level != CHALLENGES]
+
+    def categories(self) -> Dict[str, List[str]]:
+        """Get the categories of every level, challenges included, in file order."""
+        categories: Dict[str, List[str]] = {}
+        for level, category in self._by_category:
+            categories.setdefault(level, []).append(category)
+        return categories
+
+    def find(self, level: Optional[str] = None, category: Optional[str] = None, length: Optional[int] = None,
+             syllables: Optional[int] = None, pattern: Optional[str] = None) -> List[WordEntry]:
+        """
+        Find the words matching every given filter.
+
+        Args:
+            level (str, optional): Difficulty level, or "challenges"
+            category (str, optional): Category within the level
+            length (int, optional): Number of letters
+            syllables (int, optional): Number of syllables
+            pattern (str, optional): Error pattern, e.g. "double_consonant",
+                "ie_ei" or a challenge name such as "silent_letters"
+
+        Returns:
+            List[WordEntry]: Matching words in file order
+        """
+        candidates = []
+        if level is not None and category is not None:
+            candidates.append(self._by_category.get((level, category), ()))
+        elif level is not None:
+            candidates.append(self._by_level.get(level, ()))
+        elif category is not None:
+            candidates.append(tuple(position for (_, name), ids in self._by_category.items()
+                                    if name == category for position in ids))
+        if length is not None:
+            candidates.append(self._by_length.get(length, ()))
+        if syllables is not None:
+            candidates.append(self._by_syllables.get(syllables, ()))
+        if pattern is not None:
+            candidates.append(self._by_pattern.get(pattern, ()))
+
+        if not candidates:
+            return list(self.words)
+        # Walk the smallest index and probe the others
+        candidates.sort(key=len)
+        others = [set(ids) for ids in candidates[1:]]
+        return [self.words[position] for position in candidates[0]
+                if all(position in ids for ids in others)]
+
+    def word_pool(self, level: Optional[str] = None, category: Optional[str] = None) -> Tuple[Tuple, Tuple[int, ...]]:
+        """
+        Resolve the pool a word is drawn from.
+
+        Unknown levels fall back to intermediate and unknown categories to the
+        whole level, as the client-side lookup did.
+
+        Args:
+            level (str, optional): Difficulty level
+            category (str, optional): Category within the level
+
+        Returns:
+            Tuple: The pool key and the word positions in it
+        """
+        if level not in self._by_level or level == CHALLENGES:
+            level = DEFAULT_LEVEL
+        ids = self._by_category.get((level, category)) if category else None
+        if ids:
+            return ("word", level, category), ids
+        return ("word", level, ""), self._by_level.get(level, ())
+
+    def challenge_pool(self, challenge: Optional[str]) -> Tuple[Tuple, Tuple[int, ...]]:
+        """Resolve the pool of a spelling challenge, defaulting to silent letters."""
+        ids = self._by_category.get((CHALLENGES, challenge))
+        if not ids:
+            challenge = DEFAULT_CHALLENGE
+            ids = self._by_category.get((CHALLENGES, challenge), ())
+        return ("challenge", challenge), ids
+
+    def phrase_pool(self, level: Optional[str]) -> Tuple[Tuple, Tuple[int, ...]]:
+        """Resolve the pool of dictation phrases for a level."""
+        if level not in self._phrases_by_level:
+            level = DEFAULT_LEVEL
+        return ("phrase", level), self._phrases_by_level.get(level, ())
+
+    def draw(self, session_key: str, pool: Tuple[Tuple, Tuple[int, ...]]) -> Tuple[Optional[int], int]:
+        """
+        Draw a position from a pool without replacement for one session.
+
+        Args:
+            session_key (str): Identifies the student's session
+            pool (Tuple): A pool from word_pool, challenge_pool or phrase_pool
+
+        Returns:
+            Tuple[Optional[int], int]: The drawn position (None for an empty pool)
+                and how many positions are left before the deck is reshuffled
+        """
+        pool_key, ids = pool
+        if not ids:
+            return None, 0
+        deck_key = (session_key,) + pool_key
+
+        with self._lock:
+            deck = self._decks.get(deck_key)
+            if deck:
+                self._decks.move_to_end(deck_key)
+            else:
+                if deck is not None:
+                    self._stats["reshuffles"] += 1
+                deck = self._decks[deck_key] = list(ids)
+                while len(self._decks) > self.max_decks:
+                    self._decks.popitem(last=False)
+                    self._stats["evicted"] += 1
+
+            # Swap a random card to the end and pop it
+            index = random.randrange(len(deck))
+            deck[index], deck[-1] = deck[-1], deck[index]
+            position = deck.pop()
+            self._stats["draws"] += 1
+            return position, len(deck)
+
+    def next_word(self, session_key: str, level: Optional[str] = None, category: Optional[str] = None,
+                  challenge: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Draw the next spelling word for a session.
+
+        Args:
+            session_key (str): Identifies the student's session
+            level (str, optional): Difficulty level
+            category (str, optional): Category within the level
+            challenge (str, optional): Challenge list to draw from instead of a level
+
+        Returns:
+            Dict: The word exercise, or None if the store is empty
+        """
+        pool = self.challenge_pool(challenge) if challenge else self.word_pool(level, category)
+        position, remaining = self.draw(session_key, pool)
+        if position is None:
+            return None
+        entry = self.words[position]
+        return {
+            "instruction": "Listen to the word and type it correctly.",
+            "target_word": entry.word,
+            "hint": entry.hint,
+            "note": entry.note,
+            "level": entry.level,
+            "category": entry.category,
+            "syllables": entry.syllables,
+            "remaining": remaining
+        }
+
+    def next_phrase(self, session_key: str, level: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Draw the next dictation phrase for a session.
+
+        Args:
+            session_key (str): Identifies the student's session
+            level (str, optional): Difficulty level
+
+        Returns:
+            Dict: The phrase exercise, or None if the store has no phrases
+        """
+        position, remaining = self.draw(session_key, self.phrase_pool(level))
+        if position is None:
+            return None
+        phrase = self.phrases[position]
+        return {
+            "instruction": "Listen to the phrase and type it exactly as you hear it.",
+            "target_text": phrase.text,
+            "hint": phrase.hint,
+            "level": phrase.level,
+            "remaining": remaining
+        }
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get store and sampling counters.
+
+        Returns:
+            Dict: Entry and deck counts, draws, reshuffles and evicted decks
+        """
+        with self._lock:
+            return {"words": len(self.words), "phrases": len(self.phrases), "decks": len(self._decks), **self._stats}